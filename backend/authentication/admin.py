@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, OTPVerification
+from .models import User, OTPVerification, OutboundEmail
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -12,3 +12,9 @@ class OTPVerificationAdmin(admin.ModelAdmin):
     list_display = ('email', 'created_at', 'expires_at', 'is_verified', 'attempts', 'purpose')
     search_fields = ('email',)
     list_filter = ('is_verified', 'purpose')
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    search_fields = ('to_email',)
+    list_filter = ('status',)
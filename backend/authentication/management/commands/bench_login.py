@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from authentication.throttling import LoginRateThrottle
+from authentication.views import LoginView
+
+
+class Command(BaseCommand):
+    help = 'Measure single-core login throughput (password hashing alone, or the full login view)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='How long to run the benchmark')
+        parser.add_argument('--roll-no',
+                            help='Existing active account to log in as through LoginView')
+        parser.add_argument('--password',
+                            help='Password of --roll-no')
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        self.stdout.write(f"Password hasher: {hasher.algorithm}, iterations: {getattr(hasher, 'iterations', 'n/a')}")
+
+        if options['roll_no']:
+            if not options['password']:
+                raise CommandError('--password is required with --roll-no')
+            run_once = self._view_login(options['roll_no'], options['password'])
+            label = 'full logins'
+        else:
+            user = get_user_model()()
+            user.set_password('benchmark-password')
+            run_once = lambda: user.check_password('benchmark-password')
+            label = 'password checks'
+
+        # This process runs on one core, so the rate is per core
+        done = 0
+        started = time.perf_counter()
+        deadline = started + options['seconds']
+        while time.perf_counter() < deadline:
+            run_once()
+            done += 1
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{done} {label} in {elapsed:.2f}s: {done / elapsed:.1f}/s per core")
+
+    def _view_login(self, roll_no, password):
+        factory = APIRequestFactory()
+        view = LoginView.as_view(throttle_classes=[])
+
+        def run_once():
+            request = factory.post('/auth/login/', {'roll_no': roll_no, 'password': password}, format='json')
+            response = view(request)
+            if response.status_code != 200:
+                raise CommandError(f"Login failed: {response.data}")
+
+        LoginRateThrottle.reset()
+        return run_once
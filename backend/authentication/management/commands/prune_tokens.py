@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.tokens import prune_expired_tokens, token_table_sizes
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWTs in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Tokens deleted per statement')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches (default: until none are expired)')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to spread the load')
+
+    def handle(self, *args, **options):
+        before = token_table_sizes()
+        self.stdout.write(
+            f"Before: {before['outstanding']} outstanding, {before['blacklisted']} blacklisted, "
+            f"{before['expired']} expired"
+        )
+
+        deleted = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            removed = prune_expired_tokens(batch_size=options['batch_size'], max_batches=1)
+            if not removed:
+                break
+            deleted += removed
+            batches += 1
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        after = token_table_sizes()
+        self.stdout.write(
+            f"Deleted {deleted} rows in {batches} batches. After: {after['outstanding']} outstanding, "
+            f"{after['blacklisted']} blacklisted, {after['expired']} expired"
+        )
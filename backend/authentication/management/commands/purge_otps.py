@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from authentication import otp
+
+
+class Command(BaseCommand):
+    help = 'Delete expired OTP codes; run periodically (e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        removed = otp.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(f"Removed {removed} expired OTPs")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails, reusing one mail connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send what is due and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when nothing is due')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Maximum number of emails sent per connection')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.deliver(batch_size=options['batch_size'])
+            if sent or failed:
+                depth = outbox.queue_depth()
+                self.stdout.write(
+                    f"Sent {sent}, failed {failed} "
+                    f"(due {depth['due']}, deferred {depth['deferred']}, given up {depth['failed']})"
+                )
+            if options['once']:
+                if sent + failed < options['batch_size']:
+                    return
+                continue
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+"""
+Lightweight refresh-throughput counters kept in the cache.
+
+Each refresh increments per-minute buckets for successes, failures and total
+latency. Buckets expire on their own, so reading the last few minutes is a
+single get_many.
+"""
+import time
+from functools import wraps
+
+from django.core.cache import cache
+
+BUCKET_TTL = 60 * 60
+
+
+def _bucket(name, minute):
+    return f'lms:metrics:token_refresh:{name}:{minute}'
+
+
+def _incr(key, amount):
+    cache.add(key, 0, BUCKET_TTL)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, amount, BUCKET_TTL)
+
+
+def record_refresh(succeeded, duration_ms):
+    minute = int(time.time() // 60)
+    _incr(_bucket('ok' if succeeded else 'failed', minute), 1)
+    _incr(_bucket('ms', minute), int(duration_ms))
+
+
+def refresh_stats(minutes=5):
+    """Refresh counts, rate and mean latency over the last ``minutes`` minutes"""
+    current = int(time.time() // 60)
+    window = range(current - minutes + 1, current + 1)
+    keys = {name: [_bucket(name, minute) for minute in window] for name in ('ok', 'failed', 'ms')}
+    found = cache.get_many([key for names in keys.values() for key in names])
+    totals = {name: sum(found.get(key, 0) for key in names) for name, names in keys.items()}
+    handled = totals['ok'] + totals['failed']
+    return {
+        'window_minutes': minutes,
+        'succeeded': totals['ok'],
+        'failed': totals['failed'],
+        'per_second': round(handled / (minutes * 60), 3),
+        'mean_latency_ms': round(totals['ms'] / handled, 1) if handled else None,
+    }
+
+
+def metered_refresh(handler):
+    """Record the outcome and latency of a refresh endpoint's handler"""
+    @wraps(handler)
+    def wrapped(*args, **kwargs):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = handler(*args, **kwargs)
+            return response
+        finally:
+            succeeded = response is not None and response.status_code < 400
+            record_refresh(succeeded, (time.perf_counter() - started) * 1000)
+    return wrapped
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:45
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def drop_duplicate_otps(apps, schema_editor):
+    """Keep only the newest OTP per (email, purpose) before adding the constraint"""
+    OTPVerification = apps.get_model("authentication", "OTPVerification")
+    duplicates = (
+        OTPVerification.objects.values("email", "purpose")
+        .annotate(rows=Count("id"), newest=Max("id"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        OTPVerification.objects.filter(
+            email=row["email"], purpose=row["purpose"]
+        ).exclude(id=row["newest"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0004_outboundemail"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="otpverification",
+            name="authenticat_email_8c2d98_idx",
+        ),
+        migrations.AlterField(
+            model_name="otpverification",
+            name="purpose",
+            field=models.CharField(
+                choices=[
+                    ("signup", "Signup Verification"),
+                    ("reset", "Password Reset"),
+                    ("password_reset", "Password Reset"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(drop_duplicate_otps, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="otpverification",
+            unique_together={("email", "purpose")},
+        ),
+        migrations.AddIndex(
+            model_name="otpverification",
+            index=models.Index(
+                fields=["expires_at"], name="authenticat_expires_96b246_idx"
+            ),
+        ),
+    ]
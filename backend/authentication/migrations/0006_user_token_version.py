@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0005_otp_single_live_row"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Embedded in issued tokens; bumping it revokes all of them",
+            ),
+        ),
+    ]
@@ -1,11 +1,24 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
+from django.db.models import F
 from django.core.validators import RegexValidator
 from django.utils import timezone
 import hashlib
 import random
 import string
 import uuid
+from backend.cache_checks import cache_is_shared
+
+# How long a cached token version is trusted. revoke_tokens() overwrites the
+# entry, so with a shared cache revocations apply at once everywhere; a
+# per-process cache would leave other workers trusting the old version, so
+# versions are then read from the database on every request instead.
+TOKEN_VERSION_CACHE_SECONDS = getattr(settings, 'TOKEN_VERSION_CACHE_SECONDS', 60)
+
+def token_version_cache_key(user_id):
+    return f'lms:token_version:{user_id}'
 
 class User(AbstractUser):
     """Custom user model for the application"""
@@ -45,13 +58,86 @@ class User(AbstractUser):
     is_active = models.BooleanField(default=False)
     is_faculty = models.BooleanField(default=False)
     is_student = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        help_text='Embedded in issued tokens; bumping it revokes all of them'
+    )
 
     USERNAME_FIELD = 'roll_no'
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name', 'branch']
 
+    # Fields copied into access tokens so requests can be authorised without a query
+    CLAIM_FIELDS = ('roll_no', 'is_active', 'is_faculty', 'is_student', 'is_staff', 'is_superuser')
+
     def __str__(self):
         return f"{self.roll_no} - {self.get_full_name()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance._current_claims()
+        return instance
+
+    def _current_claims(self):
+        loaded = self.__dict__
+        return {name: loaded[name] for name in self.CLAIM_FIELDS if name in loaded}
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A user built from token claims loads the rest of its row in one query
+        # the first time a view touches a field the token does not carry
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def save(self, *args, **kwargs):
+        # Tokens carrying outdated roles are revoked along with the change
+        loaded = getattr(self, '_loaded_claims', {})
+        claims_changed = any(getattr(self, name) != value for name, value in loaded.items())
+        if claims_changed:
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self._current_claims()
+        if claims_changed:
+            cache.set(token_version_cache_key(self.pk), self.token_version,
+                      TOKEN_VERSION_CACHE_SECONDS)
+
+    def revoke_tokens(self):
+        """Invalidate every token issued to this user so far"""
+        User.objects.filter(pk=self.pk).update(token_version=F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        cache.set(token_version_cache_key(self.pk), self.token_version,
+                  TOKEN_VERSION_CACHE_SECONDS)
+
+    @classmethod
+    def current_token_version(cls, user_id):
+        """Token version of a user from the cache, or None if the user does not exist"""
+        if not cache_is_shared():
+            return cls.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        key = token_version_cache_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+            if version is not None:
+                cache.set(key, version, TOKEN_VERSION_CACHE_SECONDS)
+        return version
+
+    @classmethod
+    async def acurrent_token_version(cls, user_id):
+        """Async version of current_token_version()"""
+        if not cache_is_shared():
+            return await cls.objects.filter(pk=user_id).values_list('token_version', flat=True).afirst()
+        key = token_version_cache_key(user_id)
+        version = await cache.aget(key)
+        if version is None:
+            version = await cls.objects.filter(pk=user_id).values_list(
+                'token_version', flat=True).afirst()
+            if version is not None:
+                await cache.aset(key, version, TOKEN_VERSION_CACHE_SECONDS)
+        return version
+
 class OTPVerification(models.Model):
     email = models.EmailField()
     otp = models.CharField(max_length=64)
@@ -61,12 +147,15 @@ class OTPVerification(models.Model):
     attempts = models.IntegerField(default=0)
     purpose = models.CharField(max_length=20, choices=[
         ('signup', 'Signup Verification'),
-        ('reset', 'Password Reset')
+        ('reset', 'Password Reset'),
+        ('password_reset', 'Password Reset')
     ])
 
     class Meta:
+        # One live OTP per email and purpose; issuing a new one replaces it
+        unique_together = ('email', 'purpose')
         indexes = [
-            models.Index(fields=['email', 'created_at']),
+            models.Index(fields=['expires_at']),
         ]
 
     def __str__(self):
@@ -81,3 +170,34 @@ class OTPVerification(models.Model):
     def hash_otp(otp):
         """Hash the OTP using SHA-256"""
         return hashlib.sha256(otp.encode()).hexdigest()
+
+class OutboundEmail(models.Model):
+    """Mail waiting to be delivered by the send_queued_emails worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} - {self.status}"
+
+    @classmethod
+    def enqueue(cls, to_email, subject, body):
+        """Queue a message; the request never waits on the mail server"""
+        return cls.objects.create(to_email=to_email, subject=subject, body=body)
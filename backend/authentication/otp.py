@@ -0,0 +1,102 @@
+"""
+OTP store on top of OTPVerification.
+
+There is at most one row per (email, purpose): issuing a code upserts it, and
+every lookup goes through the unique index on that pair. Verification and
+attempt counting are single conditional UPDATEs, so concurrent guesses cannot
+exceed the attempt limit. Expired rows are removed by ``purge_expired()``
+(``manage.py purge_otps``).
+"""
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OTPVerification
+
+OTP_TTL = timedelta(minutes=5)
+MAX_ATTEMPTS = 3
+
+VERIFIED = 'verified'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+TOO_MANY_ATTEMPTS = 'too_many_attempts'
+MISSING = 'missing'
+
+
+def issue(email, purpose, ttl=OTP_TTL):
+    """Create or replace the live OTP for (email, purpose) and return the plain code"""
+    otp = OTPVerification.generate_otp()
+    OTPVerification.objects.bulk_create(
+        [OTPVerification(
+            email=email,
+            purpose=purpose,
+            otp=OTPVerification.hash_otp(otp),
+            expires_at=timezone.now() + ttl,
+        )],
+        update_conflicts=True,
+        unique_fields=['email', 'purpose'],
+        update_fields=['otp', 'created_at', 'expires_at', 'is_verified', 'attempts'],
+    )
+    return otp
+
+
+def _failure_reason(email, purpose, now):
+    row = OTPVerification.objects.filter(email=email, purpose=purpose, is_verified=False).first()
+    if row is None:
+        return MISSING
+    if now > row.expires_at:
+        return EXPIRED
+    return TOO_MANY_ATTEMPTS
+
+
+def verify(email, purpose, otp):
+    """Check a code and mark it verified. Returns one of the status constants."""
+    now = timezone.now()
+    live = OTPVerification.objects.filter(
+        email=email,
+        purpose=purpose,
+        is_verified=False,
+        expires_at__gte=now,
+        attempts__lt=MAX_ATTEMPTS,
+    )
+    if live.filter(otp=OTPVerification.hash_otp(otp)).update(is_verified=True):
+        return VERIFIED
+    if live.update(attempts=F('attempts') + 1):
+        return INVALID
+    return _failure_reason(email, purpose, now)
+
+
+def consume(email, purpose, otp):
+    """Delete a verified, unexpired code. Returns VERIFIED if it was there to consume."""
+    now = timezone.now()
+    verified = OTPVerification.objects.filter(email=email, purpose=purpose, is_verified=True)
+    deleted, _ = verified.filter(
+        otp=OTPVerification.hash_otp(otp), expires_at__gte=now).delete()
+    if deleted:
+        return VERIFIED
+
+    row = verified.first()
+    if row is None:
+        return MISSING
+    if row.otp != OTPVerification.hash_otp(otp):
+        return INVALID
+    return EXPIRED
+
+
+def discard(email, purpose):
+    OTPVerification.objects.filter(email=email, purpose=purpose).delete()
+
+
+def purge_expired(now=None, batch_size=1000):
+    """Delete expired OTP rows in batches. Returns the number removed."""
+    now = now or timezone.now()
+    removed = 0
+    while True:
+        ids = list(
+            OTPVerification.objects.filter(expires_at__lt=now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += OTPVerification.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,120 @@
+"""
+Delivery of queued OutboundEmail rows.
+
+Views only insert into the outbox. ``deliver()`` claims a batch of due rows,
+opens a single mail connection for the whole batch and sends each message
+over it, so SMTP/TLS setup is paid once per batch instead of once per email.
+Failures are retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS.
+
+Claiming is a short transaction of its own: the rows are leased by pushing
+``next_attempt_at`` past CLAIM_SECONDS and counting the attempt, so no row
+lock or transaction stays open while the mail server is slow. Rows of a
+worker that dies mid-batch become due again once the lease runs out.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+
+# How long a claimed batch is hidden from other workers while it is sent
+CLAIM_SECONDS = getattr(settings, 'EMAIL_OUTBOX_CLAIM_SECONDS', 10 * 60)
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``: 30s, 60s, 120s, ... capped at an hour"""
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def queue_depth():
+    """Outbox counts for monitoring"""
+    now = timezone.now()
+    pending = OutboundEmail.objects.filter(status='pending')
+    return {
+        'due': pending.filter(next_attempt_at__lte=now).count(),
+        'deferred': pending.filter(next_attempt_at__gt=now).count(),
+        'failed': OutboundEmail.objects.filter(status='failed').count(),
+    }
+
+
+def _fail(email, error, now):
+    # The attempt was already counted when the row was claimed
+    email.last_error = error[:1000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + backoff(email.attempts)
+
+
+def claim(batch_size, now):
+    """Lease up to ``batch_size`` due emails to this worker and count the attempt"""
+    with transaction.atomic():
+        # skip_locked lets several workers drain the outbox side by side
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + timedelta(seconds=CLAIM_SECONDS)
+        OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def deliver(batch_size=100, connection=None):
+    """Send up to ``batch_size`` due emails over one connection. Returns (sent, failed)."""
+    now = timezone.now()
+    sent = failed = 0
+
+    batch = claim(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    # Sent outside any transaction: a slow mail server holds no locks
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not connect to the mail server: {str(e)}")
+        for email in batch:
+            _fail(email, f"connection: {e}", now)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email.to_email],
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    logger.error(f"Error sending email {email.id} to {email.to_email}: {str(e)}")
+                    _fail(email, str(e), now)
+                    failed += 1
+                else:
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+    return sent, failed
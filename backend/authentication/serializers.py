@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import OTPVerification
+from .tokens import VERSION_CLAIM, LMSRefreshToken, blacklist, claims_are_current, outstand
 
 User = get_user_model()
 
@@ -28,3 +32,41 @@ class OTPSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'otp': {'write_only': True}
         }
+
+class LMSTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = LMSRefreshToken
+
+class LMSTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh using the token's own claims: the user's state is checked through
+    the cached token version instead of loading the row, and rotation writes
+    the blacklist and outstanding rows without extra user lookups.
+    """
+    token_class = LMSRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM not in refresh.payload:
+            return super().validate(attrs)
+
+        if not claims_are_current(refresh):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                blacklist(refresh, user_id)
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            outstand(refresh, user_id)
+
+            data['refresh'] = str(refresh)
+
+        return data
@@ -1,3 +1,311 @@
-from django.test import TestCase
+from datetime import timedelta
+from smtplib import SMTPException
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from . import metrics, otp, outbox
+from .models import OTPVerification, OutboundEmail, User
+from .throttling import LoginRateThrottle, TokenBucket
+from .tokens import prune_expired_tokens, token_table_sizes
 
-# Create your tests here.
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('mail server unavailable')
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class ReentrantBackend(EmailBackend):
+    """Looks at the outbox while a batch is being sent"""
+    seen = None
+
+    def send_messages(self, email_messages):
+        ReentrantBackend.seen = (
+            list(OutboundEmail.objects.values_list('attempts', flat=True)),
+            outbox.deliver(connection=EmailBackend()),
+        )
+        return super().send_messages(email_messages)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_otp_request_only_queues_mail(self):
+        response = self.client.post(
+            reverse('generate-otp'),
+            {'email': 'someone@student.nitandhra.ac.in'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OTPVerification.objects.count(), 1)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.status, 'pending')
+        self.assertEqual(outbox.queue_depth()['due'], 1)
+
+    def test_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            OutboundEmail.enqueue(f'user{i}@student.nitandhra.ac.in', 'Subject', 'Body')
+
+        CountingBackend.opened = 0
+        self.assertEqual(outbox.deliver(connection=CountingBackend()), (3, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status='sent').count(), 3)
+        self.assertEqual(outbox.deliver(), (0, 0))
+
+    def test_batch_is_claimed_before_sending(self):
+        OutboundEmail.enqueue('user@student.nitandhra.ac.in', 'Subject', 'Body')
+
+        self.assertEqual(outbox.deliver(connection=ReentrantBackend()), (1, 0))
+        # While sending, the row was already leased: counted, and not claimable again
+        self.assertEqual(ReentrantBackend.seen, ([1], (0, 0)))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failures_back_off_then_give_up(self):
+        email = OutboundEmail.enqueue('user@student.nitandhra.ac.in', 'Subject', 'Body')
+        self.assertEqual(outbox.deliver(connection=FailingBackend()), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(outbox.queue_depth()['deferred'], 1)
+
+        # Nothing is due until the backoff expires
+        self.assertEqual(outbox.deliver(connection=FailingBackend()), (0, 0))
+
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            attempts=outbox.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+        outbox.deliver(connection=FailingBackend())
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'failed')
+
+
+class OTPStoreTests(TestCase):
+    email = 'someone@student.nitandhra.ac.in'
+
+    def test_reissue_keeps_one_live_row(self):
+        first = otp.issue(self.email, 'password_reset')
+        second = otp.issue(self.email, 'password_reset')
+        self.assertEqual(OTPVerification.objects.filter(email=self.email).count(), 1)
+        if first != second:
+            self.assertEqual(otp.verify(self.email, 'password_reset', first), otp.INVALID)
+        self.assertEqual(otp.verify(self.email, 'password_reset', second), otp.VERIFIED)
+
+    def test_attempts_are_capped(self):
+        code = otp.issue(self.email, 'signup')
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(otp.MAX_ATTEMPTS):
+            self.assertEqual(otp.verify(self.email, 'signup', wrong), otp.INVALID)
+        self.assertEqual(otp.verify(self.email, 'signup', code), otp.TOO_MANY_ATTEMPTS)
+        self.assertEqual(OTPVerification.objects.get().attempts, otp.MAX_ATTEMPTS)
+
+    def test_expired_codes_are_rejected_and_purged(self):
+        code = otp.issue(self.email, 'signup', ttl=timedelta(minutes=-1))
+        otp.issue('other@student.nitandhra.ac.in', 'signup')
+        self.assertEqual(otp.verify(self.email, 'signup', code), otp.EXPIRED)
+        self.assertEqual(otp.purge_expired(), 1)
+        self.assertEqual(OTPVerification.objects.count(), 1)
+
+    def test_password_reset_consumes_the_code(self):
+        user = User.objects.create_user(
+            username='reset_user',
+            roll_no='500001',
+            email=self.email,
+            password='old-password',
+            is_student=True
+        )
+        code = otp.issue(self.email, 'password_reset')
+        client = APIClient()
+        response = client.post(
+            reverse('verify_otp'),
+            {'email': self.email, 'otp': code, 'purpose': 'password_reset'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {'email': self.email, 'otp': code, 'new_password': 'new-password'}
+        response = client.post(reverse('reset_password'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('new-password'))
+
+        response = client.post(reverse('reset_password'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        LoginRateThrottle.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='login_user',
+            roll_no='600001',
+            email='login_user@student.nitandhra.ac.in',
+            password='password123',
+            is_student=True,
+            is_active=True
+        )
+
+    def login(self, password='password123', roll_no='600001'):
+        return self.client.post(
+            reverse('login'), {'roll_no': roll_no, 'password': password}, format='json')
+
+    def test_login_looks_the_user_up_once(self):
+        # One SELECT for the user and one INSERT for the outstanding refresh token
+        with self.assertNumQueries(2):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+
+        self.assertEqual(self.login(password='wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login(roll_no='699999').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_roll_number_is_rate_limited(self):
+        capacity = LoginRateThrottle.buckets['roll_no'].capacity
+        for _ in range(capacity):
+            self.assertNotEqual(self.login(password='wrong').status_code,
+                                status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        # Other accounts from the same address are unaffected
+        self.assertEqual(self.login(roll_no='699999').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bucket_refills_over_time(self):
+        bucket = TokenBucket(capacity=2, refill_rate=1.0)
+        self.assertEqual(bucket.consume('k', now=0), 0)
+        self.assertEqual(bucket.consume('k', now=0), 0)
+        self.assertEqual(bucket.consume('k', now=0), 1.0)
+        self.assertEqual(bucket.consume('k', now=1.0), 0)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        LoginRateThrottle.reset()
+        self.user = User.objects.create_user(
+            username='claims_user',
+            roll_no='700001',
+            email='claims_user@student.nitandhra.ac.in',
+            password='password123',
+            first_name='Claims',
+            is_student=True,
+            is_active=True
+        )
+        response = APIClient().post(
+            reverse('login'), {'roll_no': '700001', 'password': 'password123'}, format='json')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_role_checks_skip_the_user_row(self):
+        User.current_token_version(self.user.id)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('faculty_details'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                       CACHE_SINGLE_PROCESS=False)
+    def test_per_process_cache_reads_the_version_every_time(self):
+        """Another worker's revocation must apply at once, so nothing is cached"""
+        User.current_token_version(self.user.id)
+        User.objects.filter(pk=self.user.pk).update(token_version=F('token_version') + 1)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('faculty_details'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_fields_load_in_one_query(self):
+        User.current_token_version(self.user.id)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student_details'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Claims')
+        self.assertEqual(response.data['roll_no'], '700001')
+
+    def test_role_change_revokes_tokens(self):
+        self.user.is_student = False
+        self.user.is_faculty = True
+        self.user.save()
+        response = self.client.get(reverse('faculty_details'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_explicit_revocation(self):
+        self.user.revoke_tokens()
+        response = self.client.get(reverse('student_details'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenMaintenanceTests(TestCase):
+    def setUp(self):
+        LoginRateThrottle.reset()
+        self.user = User.objects.create_user(
+            username='token_user',
+            roll_no='800001',
+            email='token_user@student.nitandhra.ac.in',
+            password='password123',
+            is_student=True,
+            is_active=True
+        )
+        self.client = APIClient()
+        response = self.client.post(
+            reverse('login'), {'roll_no': '800001', 'password': 'password123'}, format='json')
+        self.refresh = response.data['refresh']
+
+    def test_refresh_rotates_without_user_lookups(self):
+        User.current_token_version(self.user.id)
+        # Blacklist check, blacklisting the old token and recording the new one
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reused = self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(reused.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        stats = metrics.refresh_stats()
+        self.assertGreaterEqual(stats['succeeded'], 1)
+        self.assertGreaterEqual(stats['failed'], 1)
+
+    def test_legacy_endpoint_uses_the_same_path(self):
+        response = self.client.post(
+            reverse('refresh_token'), {'refresh_token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access_token', response.data)
+        self.assertIn('refresh_token', response.data)
+
+        response = self.client.post(
+            reverse('refresh_token'), {'refresh_token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.revoke_tokens()
+        response = self.client.post(
+            reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_prune_removes_only_expired_tokens(self):
+        self.client.post(reverse('token_refresh'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(token_table_sizes()['blacklisted'], 1)
+
+        OutstandingToken.objects.filter(
+            blacklistedtoken__isnull=False).update(expires_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(prune_expired_tokens(batch_size=1), 2)
+
+        sizes = token_table_sizes()
+        self.assertEqual((sizes['outstanding'], sizes['blacklisted'], sizes['expired']), (1, 0, 0))
@@ -0,0 +1,89 @@
+"""
+In-process token buckets for the login endpoint.
+
+Each client IP and each roll number gets a bucket that refills at a steady
+rate up to a burst capacity. A request takes one token from both; when either
+is empty the request is rejected with 429 before any password hashing runs.
+Buckets live in this process only, so limits apply per worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+# (burst capacity, tokens refilled per second). The IP limit is generous
+# because a whole lab or hostel can sit behind one NAT address.
+DEFAULT_LIMITS = {
+    'ip': (300, 5.0),
+    'roll_no': (5, 1 / 12),
+}
+
+MAX_TRACKED_KEYS = 100000
+
+
+class TokenBucket:
+    """A set of named token buckets sharing one capacity and refill rate"""
+
+    def __init__(self, capacity, refill_rate, max_keys=MAX_TRACKED_KEYS):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refilled(self, key, now):
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+    def consume(self, key, now=None):
+        """Take a token for ``key``. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens = self._refilled(key, now)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.refill_rate
+            # Most recently used keys stay at the end; idle ones are evicted first
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+def _build_buckets():
+    limits = {**DEFAULT_LIMITS, **getattr(settings, 'LOGIN_RATE_LIMITS', {})}
+    return {scope: TokenBucket(*limit) for scope, limit in limits.items()}
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Per-IP and per-roll-number admission control for LoginView"""
+    buckets = _build_buckets()
+
+    def allow_request(self, request, view):
+        self._wait = 0
+        keys = {'ip': self.get_ident(request)}
+        roll_no = request.data.get('roll_no') if isinstance(request.data, dict) else None
+        if roll_no:
+            keys['roll_no'] = str(roll_no)
+
+        for scope, key in keys.items():
+            bucket = self.buckets.get(scope)
+            if bucket is not None:
+                self._wait = max(self._wait, bucket.consume(key))
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
+
+    @classmethod
+    def reset(cls):
+        for bucket in cls.buckets.values():
+            bucket.clear()
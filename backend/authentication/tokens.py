@@ -0,0 +1,152 @@
+"""
+JWTs that carry the user's role, and authentication that trusts them.
+
+LMSRefreshToken (and the access tokens derived from it) embeds the fields in
+``User.CLAIM_FIELDS`` plus the user's ``token_version``. ClaimsJWTAuthentication
+builds ``request.user`` from those claims instead of loading the row; the
+remaining fields are deferred and fetched in one query only if a view reads
+them. The only per-request lookup is the token version, served from the cache,
+so bumping ``User.token_version`` revokes outstanding tokens.
+"""
+from asgiref.sync import sync_to_async
+from django.db import router
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import User
+
+VERSION_CLAIM = 'ver'
+
+
+class LMSRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for name in User.CLAIM_FIELDS:
+            token[name] = getattr(user, name)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+def claims_are_current(token):
+    """Whether a claims-carrying token still matches its user's token version"""
+    user_id = token.payload.get(api_settings.USER_ID_CLAIM)
+    return (
+        bool(token.payload.get('is_active'))
+        and User.current_token_version(user_id) == token.payload[VERSION_CLAIM]
+    )
+
+
+def outstand(token, user_id):
+    """
+    Record a newly issued refresh token as outstanding. Same as
+    Token.outstand(), which loads the user row first just to fill the
+    foreign key.
+    """
+    return OutstandingToken.objects.create(
+        user_id=user_id,
+        jti=token[api_settings.JTI_CLAIM],
+        token=str(token),
+        created_at=token.current_time,
+        expires_at=datetime_from_epoch(token['exp']),
+    )
+
+
+def blacklist(token, user_id):
+    """Blacklist a refresh token without Token.blacklist()'s user lookups"""
+    outstanding_id = OutstandingToken.objects.filter(
+        jti=token[api_settings.JTI_CLAIM]).values_list('id', flat=True).first()
+    if outstanding_id is None:
+        outstanding_id = outstand(token, user_id).id
+    # A concurrent refresh with the same token may have blacklisted it already
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=outstanding_id)], ignore_conflicts=True)
+
+
+def token_table_sizes(now=None):
+    now = now or timezone.now()
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'blacklisted': BlacklistedToken.objects.count(),
+        'expired': OutstandingToken.objects.filter(expires_at__lt=now).count(),
+    }
+
+
+def prune_expired_tokens(batch_size=1000, max_batches=None, now=None):
+    """
+    Delete expired outstanding tokens, and their blacklist entries, in
+    batches of ``batch_size`` so no statement holds locks for long. An
+    expired token is rejected on its exp claim alone. Returns rows deleted.
+    """
+    now = now or timezone.now()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        # Blacklist rows cascade in the same delete
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        batches += 1
+    return deleted
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        # Tokens issued before claims were embedded fall back to a row lookup
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        return self.user_from_claims(validated_token, User.current_token_version(user_id))
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def user_from_claims(self, validated_token, current_version):
+        """Build the user from the token's claims if ``current_version`` still matches"""
+        if current_version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        claims = {name: validated_token.get(name) for name in User.CLAIM_FIELDS}
+        claims[User._meta.pk.attname] = User._meta.pk.to_python(
+            validated_token[api_settings.USER_ID_CLAIM])
+        claims['token_version'] = validated_token[VERSION_CLAIM]
+
+        field_names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+        user = User.from_db(
+            router.db_for_read(User), field_names, [claims[name] for name in field_names])
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Coroutine version of authenticate() for plain Django async views.
+        Returns the user, or None when the request carries no token.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if VERSION_CLAIM not in validated_token:
+            return await sync_to_async(self.get_user)(validated_token)
+        user_id = self.get_user_id(validated_token)
+        return self.user_from_claims(
+            validated_token, await User.acurrent_token_version(user_id))
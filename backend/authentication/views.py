@@ -1,25 +1,31 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.shortcuts import render
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .models import OTPVerification
+from .models import OutboundEmail
+from .tokens import LMSRefreshToken, token_table_sizes
+from . import otp as otp_store
+from . import metrics, outbox
+from .metrics import metered_refresh
+from .throttling import LoginRateThrottle
 from datetime import timedelta
+import logging
 import random
 import string
-import jwt
-from .serializers import UserSerializer, OTPSerializer
+from .serializers import UserSerializer, OTPSerializer, LMSTokenRefreshSerializer
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 def generate_access_token(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = LMSRefreshToken.for_user(user)
     return str(refresh.access_token)
 
 class RegisterView(APIView):
@@ -65,22 +71,13 @@ class RegisterView(APIView):
             user.save()
 
             # Generate and send OTP
-            otp = OTPVerification.generate_otp()
-            expires_at = timezone.now() + timedelta(minutes=5)
-            OTPVerification.objects.create(
-                email=email,
-                otp=OTPVerification.hash_otp(otp),
-                expires_at=expires_at,
-                purpose='signup'
-            )
+            otp = otp_store.issue(email, 'signup')
 
-            # Send OTP email
-            send_mail(
+            # Queue OTP email; the outbox worker delivers it
+            OutboundEmail.enqueue(
+                email,
                 'Verify your NIT Andhra Account',
                 f'Your verification code is: {otp}\n\nThis code will expire in 5 minutes.',
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=False,
             )
 
             return Response({
@@ -107,42 +104,16 @@ class GenerateOTPView(APIView):
                           status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Delete any existing OTP records for this email and purpose
-            OTPVerification.objects.filter(email=email, purpose=purpose).delete()
-            
-            # Generate 6-digit OTP
-            otp = OTPVerification.generate_otp()
-            expires_at = timezone.now() + timedelta(minutes=5)
-
-            # Create new OTP record
-            OTPVerification.objects.create(
-                email=email,
-                otp=OTPVerification.hash_otp(otp),
-                expires_at=expires_at,
-                purpose=purpose
+            # Generate 6-digit OTP, replacing any live one for this email and purpose
+            otp = otp_store.issue(email, purpose)
+
+            # Queue OTP email; the outbox worker delivers it
+            OutboundEmail.enqueue(
+                email,
+                'Your OTP for NIT AP LMS',
+                f'Your OTP is: {otp}\nThis OTP will expire in 5 minutes.',
             )
-
-            # Send OTP via email
-            subject = 'Your OTP for NIT AP LMS'
-            message = f'Your OTP is: {otp}\nThis OTP will expire in 5 minutes.'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            recipient_list = [email]
-            
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    from_email,
-                    recipient_list,
-                    fail_silently=False,
-                )
-                return Response({'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
-            except Exception as e:
-                print(f'Error sending OTP: {str(e)}')
-                # Delete the OTP record if email sending fails
-                OTPVerification.objects.filter(email=email, purpose=purpose).delete()
-                return Response({'error': 'Failed to send OTP. Please try again.'}, 
-                              status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
 
         except Exception as e:
             print(f'Error generating OTP: {str(e)}')
@@ -162,56 +133,38 @@ class VerifyOTPView(APIView):
             print("Missing required fields:", {'email': email, 'otp': otp})  # Debug log
             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            print("Looking for OTP record for:", email)  # Debug log
-            otp_obj = OTPVerification.objects.get(
-                email=email,
-                purpose=purpose,
-                is_verified=False
-            )
-            print("Found OTP record:", otp_obj)  # Debug log
-        except OTPVerification.DoesNotExist:
+        result = otp_store.verify(email, purpose, otp)
+        if result == otp_store.MISSING:
             print("No OTP record found for:", email)  # Debug log
             return Response({'error': 'Invalid OTP request'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Check if OTP is expired
-        if timezone.now() > otp_obj.expires_at:
+        if result == otp_store.EXPIRED:
             print("OTP expired for:", email)  # Debug log
             return Response({'error': 'OTP has expired'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Check if max attempts exceeded
-        if otp_obj.attempts >= 3:
+        if result == otp_store.TOO_MANY_ATTEMPTS:
             print("Max attempts exceeded for:", email)  # Debug log
             return Response({'error': 'Maximum attempts exceeded'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Verify OTP
-        if otp_obj.otp == OTPVerification.hash_otp(otp):
-            print("OTP verified successfully for:", email)  # Debug log
-            otp_obj.is_verified = True
-            otp_obj.save()
-
-            if purpose == 'signup':
-                # Activate user account
-                try:
-                    user = User.objects.get(email=email)
-                    user.is_active = True
-                    user.save()
-                    print("User activated:", user.email)  # Debug log
-                    return Response({
-                        'message': 'Email verified successfully. You can now login.',
-                        'email': email
-                    }, status=status.HTTP_200_OK)
-                except User.DoesNotExist:
-                    print("User not found for:", email)  # Debug log
-                    return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({'message': 'OTP verified successfully'}, status=status.HTTP_200_OK)
-        else:
+        if result == otp_store.INVALID:
             print("Invalid OTP for:", email)  # Debug log
-            otp_obj.attempts += 1
-            otp_obj.save()
             return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
 
+        print("OTP verified successfully for:", email)  # Debug log
+        if purpose == 'signup':
+            # Activate user account
+            try:
+                user = User.objects.get(email=email)
+                user.is_active = True
+                user.save()
+                print("User activated:", user.email)  # Debug log
+                return Response({
+                    'message': 'Email verified successfully. You can now login.',
+                    'email': email
+                }, status=status.HTTP_200_OK)
+            except User.DoesNotExist:
+                print("User not found for:", email)  # Debug log
+                return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            return Response({'message': 'OTP verified successfully'}, status=status.HTTP_200_OK)
+
 class RequestPasswordResetView(APIView):
     def post(self, request):
         email = request.data.get('email')
@@ -222,23 +175,14 @@ class RequestPasswordResetView(APIView):
         try:
             user = User.objects.get(email=email)
 
-            # Generate and send OTP
-            otp = OTPVerification.generate_otp()
-            expires_at = timezone.now() + timedelta(minutes=5)
-            OTPVerification.objects.create(
-                email=email,
-                otp=OTPVerification.hash_otp(otp),
-                expires_at=expires_at,
-                purpose='password_reset'
-            )
+            # Generate and send OTP; a repeated request replaces the previous code
+            otp = otp_store.issue(email, 'password_reset')
 
-            # Send OTP email
-            send_mail(
+            # Queue OTP email; the outbox worker delivers it
+            OutboundEmail.enqueue(
+                email,
                 'Reset Your NIT Andhra Password',
                 f'Your password reset code is: {otp}\n\nThis code will expire in 5 minutes.',
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=False,
             )
 
             return Response({"message": "Password reset OTP sent successfully"})
@@ -261,23 +205,6 @@ class ResetPasswordView(APIView):
                           status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Get the OTP record
-            otp_obj = OTPVerification.objects.get(
-                email=email,
-                purpose='password_reset',
-                is_verified=True
-            )
-
-            # Verify OTP
-            if otp_obj.otp != OTPVerification.hash_otp(otp):
-                return Response({'error': 'Invalid OTP'}, 
-                              status=status.HTTP_400_BAD_REQUEST)
-
-            # Check if OTP is expired
-            if timezone.now() > otp_obj.expires_at:
-                return Response({'error': 'OTP has expired'}, 
-                              status=status.HTTP_400_BAD_REQUEST)
-
             # Get the user
             try:
                 user = User.objects.get(email=email)
@@ -285,19 +212,27 @@ class ResetPasswordView(APIView):
                 return Response({'error': 'User not found'}, 
                               status=status.HTTP_404_NOT_FOUND)
 
-            # Update password
-            user.set_password(new_password)
-            user.save()
-
-            # Delete the used OTP
-            otp_obj.delete()
+            with transaction.atomic():
+                # Use up the verified OTP; a code can reset the password only once
+                result = otp_store.consume(email, 'password_reset', otp)
+                if result == otp_store.MISSING:
+                    return Response({'error': 'Invalid or unverified OTP'}, 
+                                  status=status.HTTP_400_BAD_REQUEST)
+                if result == otp_store.INVALID:
+                    return Response({'error': 'Invalid OTP'}, 
+                                  status=status.HTTP_400_BAD_REQUEST)
+                if result == otp_store.EXPIRED:
+                    return Response({'error': 'OTP has expired'}, 
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+                # Update password and sign out every existing session
+                user.set_password(new_password)
+                user.save()
+                user.revoke_tokens()
 
             return Response({'message': 'Password reset successfully'}, 
                           status=status.HTTP_200_OK)
 
-        except OTPVerification.DoesNotExist:
-            return Response({'error': 'Invalid or unverified OTP'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f'Error resetting password: {str(e)}')
             return Response({'error': 'Failed to reset password'}, 
@@ -306,43 +241,43 @@ class ResetPasswordView(APIView):
 class LoginView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_classes = [LoginRateThrottle]
     def post(self, request):
         roll_no = request.data.get('roll_no')
         password = request.data.get('password')
         
-        print(f"Login attempt for roll_no: {roll_no}")
+        logger.debug(f"Login attempt for roll_no: {roll_no}")
         
         if not roll_no or not password:
             return Response({"error": "Roll number and password are required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            user = User.objects.get(roll_no=roll_no)
-            print(f"User found: {user.email}, is_active: {user.is_active}")
-            
-            if not user.is_active:
-                return Response({
-                    "error": "Account is not active. Please verify your email with OTP.",
-                    "email": user.email,
-                    "needs_verification": True
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Use roll_no instead of username for authentication
-            user = authenticate(username=roll_no, password=password)
-            print(f"Authentication result: {user is not None}")
-            
-            if user is None:
-                return Response({"error": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            refresh = RefreshToken.for_user(user)
+        # Fetch the user once and check the password on that instance
+        user = User.objects.filter(roll_no=roll_no).first()
+        if user is None:
+            logger.debug(f"No user found with roll_no: {roll_no}")
+            # Hash anyway so unknown roll numbers take as long as wrong passwords
+            User().set_password(password)
+            return Response({"error": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.debug(f"User found: {user.pk}, is_active: {user.is_active}")
+        if not user.is_active:
             return Response({
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-                "is_faculty": user.is_faculty
-            })
-            
-        except User.DoesNotExist:
-            print(f"No user found with roll_no: {roll_no}")
+                "error": "Account is not active. Please verify your email with OTP.",
+                "email": user.email,
+                "needs_verification": True
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        authenticated = user.check_password(password)
+        logger.debug(f"Authentication result for {user.pk}: {authenticated}")
+        if not authenticated:
             return Response({"error": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        refresh = LMSRefreshToken.for_user(user)
+        return Response({
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+            "is_faculty": user.is_faculty
+        })
 
 class StudentDetailsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -393,51 +328,47 @@ def get_branch_full_form(branch_code):
     return branch_mapping.get(branch_code, branch_code)
 
 class RefreshTokenView(APIView):
+    """Legacy refresh endpoint; same checks and rotation as auth/token/refresh/"""
     permission_classes = [AllowAny]
     authentication_classes = []
+
+    @metered_refresh
     def post(self, request):
+        refresh_token = request.data.get('refresh_token')
+        if not refresh_token:
+            return Response(
+                {'error': 'Refresh token is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = LMSTokenRefreshSerializer(data={'refresh': refresh_token})
         try:
-            refresh_token = request.data.get('refresh_token')
-            if not refresh_token:
-                return Response(
-                    {'error': 'Refresh token is required'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            serializer.is_valid(raise_exception=True)
+        except (TokenError, AuthenticationFailed) as e:
+            return Response(
+                {'error': str(e.args[0]) if e.args else 'Invalid refresh token'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
 
-            # Verify the refresh token
-            try:
-                payload = jwt.decode(
-                    refresh_token,
-                    settings.SECRET_KEY,
-                    algorithms=['HS256']
-                )
-            except jwt.ExpiredSignatureError:
-                return Response(
-                    {'error': 'Refresh token has expired'},
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
-            except jwt.InvalidTokenError:
-                return Response(
-                    {'error': 'Invalid refresh token'},
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
+        data = {'access_token': serializer.validated_data['access']}
+        if 'refresh' in serializer.validated_data:
+            # The old refresh token is blacklisted once rotated
+            data['refresh_token'] = serializer.validated_data['refresh']
+        return Response(data)
 
-            # Get user from payload
-            user_id = payload.get('user_id')
-            User = get_user_model()
-            user = User.objects.get(id=user_id)
+class MeteredTokenRefreshView(TokenRefreshView):
+    @metered_refresh
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
 
-            # Generate new access token
-            access_token = generate_access_token(user)
+class TokenMetricsView(APIView):
+    permission_classes = [IsAdminUser]
 
-            return Response({
-                'access_token': access_token
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def get(self, request):
+        return Response({
+            'refresh': metrics.refresh_stats(),
+            'tables': token_table_sizes()
+        }, status=status.HTTP_200_OK)
 
 class FacultyDetailsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -495,3 +426,9 @@ class AllStudentsView(APIView):
                 {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+class EmailQueueStatusView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(outbox.queue_depth(), status=status.HTTP_200_OK)
@@ -0,0 +1,53 @@
+"""
+What the default cache can be trusted with.
+
+Version counters, autosaved drafts, idempotency keys, token versions and the
+queues drained by the workers are kept in the default cache and shared
+between the web processes and the management-command workers. A per-process
+cache silently splits that state: bumps made by one process never reach
+another, so ETags stay stale, indexes miss new quizzes and workers see empty
+queues. A shared cache whose add() and incr() are a read then a write, such
+as the file-based and database backends, loses concurrent bumps and lets two
+requests claim the same key. CACHE_SINGLE_PROCESS lifts both concerns when
+nothing runs beside the current process, as in a test run.
+"""
+from django.conf import settings
+from django.core.management.base import CommandError
+
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+ATOMIC_BACKENDS = {
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+}
+
+
+def cache_backend(alias='default'):
+    return settings.CACHES.get(alias, {}).get('BACKEND', '')
+
+
+def single_process():
+    """Whether CACHE_SINGLE_PROCESS declares that nothing runs beside this process"""
+    return getattr(settings, 'CACHE_SINGLE_PROCESS', False)
+
+
+def cache_is_shared(alias='default'):
+    return single_process() or cache_backend(alias) not in PER_PROCESS_BACKENDS
+
+
+def cache_is_atomic(alias='default'):
+    """Shared, with add() and incr() that cannot race between processes"""
+    return single_process() or cache_backend(alias) in ATOMIC_BACKENDS
+
+
+def require_shared_cache(command):
+    """Refuse to start a worker whose state would be lost between it and the web processes"""
+    if not cache_is_atomic():
+        raise CommandError(
+            f"{command} exchanges state with the web processes through the cache, but the default "
+            f"cache ({cache_backend()}) is not shared with atomic updates. Configure Redis or memcached."
+        )
@@ -0,0 +1,77 @@
+"""
+Database connection statistics for the admin metrics endpoint.
+
+Reports, per alias, the psycopg pool's counters when pooling is enabled, how
+many connections this process has opened, and on PostgreSQL how the server's
+connections to the database are split by state. A pool whose connections are
+all in use with requests waiting is saturated.
+"""
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_opened = Counter()
+_lock = threading.Lock()
+
+
+@receiver(connection_created)
+def _count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def _mean(total, count):
+    return round(total / count, 2) if count else None
+
+
+def pool_stats(pool):
+    """In use, waiting and wait time figures from a psycopg_pool pool"""
+    stats = pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    opened = stats.get('connections_num', 0)
+    return {
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': stats.get('pool_size', 0),
+        'in_use': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+        'idle': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': requests,
+        'queued_requests': stats.get('requests_queued', 0),
+        'mean_wait_ms': _mean(stats.get('requests_wait_ms', 0), requests),
+        'failed_requests': stats.get('requests_errors', 0),
+        'connections_opened': opened,
+        'mean_connect_ms': _mean(stats.get('connections_ms', 0), opened),
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+
+def server_connections(connection):
+    """Connections to this database on the PostgreSQL server, by state"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        return dict(cursor.fetchall())
+
+
+def database_stats():
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        stats[alias] = {
+            'vendor': connection.vendor,
+            'pool': pool_stats(pool) if pool is not None else None,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'opened_by_process': _opened[alias],
+            'server_connections': server_connections(connection),
+        }
+    return stats
@@ -0,0 +1,134 @@
+"""
+Read-replica routing for the reporting endpoints.
+
+Everything goes to ``default`` unless a view or block of code opts in with
+``@replica_reads()`` / ``with replica_reads():``, in which case its reads go to
+the ``REPLICA_DATABASE`` alias when one is configured. Writes always go to
+``default``.
+
+Reads stay on the primary, even inside ``replica_reads``:
+- inside a transaction on the primary;
+- after anything was written earlier in the same request or block;
+- for a user who wrote within the last ``REPLICA_STICKY_SECONDS``, so people
+  see their own submissions and grades despite replication lag. Users are
+  pinned by ``ReplicaStickinessMiddleware`` when their request wrote.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+_use_replica = ContextVar('use_replica', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+def _pin_key(user_id):
+    return f'lms:db:pinned:{user_id}'
+
+
+def replica_alias():
+    """The database alias reporting reads may use, or None"""
+    return getattr(settings, 'REPLICA_DATABASE', None)
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for the next STICKY_SECONDS"""
+    cache.set(_pin_key(user_id), True, STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+class replica_reads:
+    """
+    Route reads to the replica inside ``with replica_reads():``, or for a view
+    decorated with ``@replica_reads()``. On a DRF view it must sit below
+    ``@api_view`` so ``request.user`` is known.
+    """
+
+    def __enter__(self):
+        self._tokens = (_use_replica.set(replica_alias() is not None), _wrote.set(False))
+        return self
+
+    def __exit__(self, *exc):
+        wrote = _wrote.get()
+        use_token, wrote_token = self._tokens
+        _use_replica.reset(use_token)
+        _wrote.reset(wrote_token)
+        if wrote:
+            # Let the enclosing request see the write too
+            _wrote.set(True)
+        return False
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if is_pinned(getattr(getattr(request, 'user', None), 'pk', None)):
+                return view(request, *args, **kwargs)
+            with replica_reads():
+                return view(request, *args, **kwargs)
+        return wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or _wrote.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != replica_alias()
+
+
+class ReplicaStickinessMiddleware:
+    """Pin users whose request wrote to the primary for a few seconds"""
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            self._pin_writer(request)
+            return response
+        finally:
+            _wrote.reset(token)
+
+    async def __acall__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if _wrote.get():
+                await sync_to_async(self._pin_writer)(request)
+            return response
+        finally:
+            _wrote.reset(token)
+
+    def _pin_writer(self, request):
+        # DRF copies the authenticated user onto the underlying request
+        user = getattr(request, 'user', None)
+        if _wrote.get() and getattr(user, 'pk', None) is not None:
+            pin_to_primary(user.pk)
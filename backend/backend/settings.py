@@ -52,7 +52,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.tokens.ClaimsJWTAuthentication',
     ),
 }
 
@@ -64,6 +64,14 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.serializers.LMSTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializers.LMSTokenRefreshSerializer",
+}
+
+# Login token buckets: scope -> (burst capacity, tokens refilled per second)
+LOGIN_RATE_LIMITS = {
+    'ip': (config('LOGIN_IP_BURST', default=300, cast=int), config('LOGIN_IP_RATE', default=5.0, cast=float)),
+    'roll_no': (config('LOGIN_ROLL_NO_BURST', default=5, cast=int), config('LOGIN_ROLL_NO_RATE', default=1 / 12, cast=float)),
 }
 
 MIDDLEWARE = [
@@ -75,6 +83,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "backend.db_router.ReplicaStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -112,6 +121,77 @@ DATABASES = {
     }
 }
 
+# Connection reuse. By default each worker keeps its connection for
+# DB_CONN_MAX_AGE seconds and checks it is alive before reusing it. DB_POOL
+# switches to psycopg 3's connection pool instead, which needs
+# `pip install "psycopg[binary,pool]"`; Django then uses psycopg 3 for all
+# connections. Pool statistics are served at /db-stats/.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Seconds a request waits for a free connection before failing
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_lifetime': config('DB_CONN_MAX_AGE', default=30 * 60, cast=int),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=10 * 60, cast=int),
+            'check': ConnectionPool.check_connection,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+# Optional read replica for the reporting endpoints (see backend/db_router.py).
+# Locally, point DB_REPLICA_HOST at the primary to exercise the routing.
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        # Tests read the replica through the test copy of the primary
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['backend.db_router.ReplicaRouter']
+
+# How long a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# QuizAssignment and StudentPerformance are range-partitioned by quiz on
+# PostgreSQL, this many quizzes per partition (see quiz/partitions.py). Run
+# `manage.py manage_partitions create` regularly, e.g. daily from cron.
+QUIZ_PARTITION_SIZE = config('QUIZ_PARTITION_SIZE', default=200, cast=int)
+
+
+# Cache
+# Version counters, idempotency keys, autosaved drafts, token versions and
+# the queues drained by the background workers (process_performance_queue,
+# flush_autosaves, expire_attempts) live here, so every web process and worker
+# must see the same cache, and concurrent add() and incr() calls must not
+# clobber each other. Only Redis and memcached give both, so Redis is the
+# default; configure it without eviction of keys that have no expiry
+# (maxmemory-policy noeviction or volatile-*) so queues are never dropped.
+# Any other backend fails the quiz system checks and the workers refuse it,
+# unless CACHE_SINGLE_PROCESS declares that everything runs in one process.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': config('CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    }
+}
+CACHE_SINGLE_PROCESS = config('CACHE_SINGLE_PROCESS', default=False, cast=bool)
+
+# Each test run gets an empty cache, as it gets an empty database
+TEST_RUNNER = 'backend.test_runner.FreshCacheTestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -187,15 +267,21 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# OTP mail goes through the outbox (authentication.OutboundEmail) and is sent by
+# `manage.py send_queued_emails`. Use the console or filebased backend locally.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
 
 # Removed debug prints for email settings
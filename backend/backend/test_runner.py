@@ -0,0 +1,27 @@
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class FreshCacheTestRunner(DiscoverRunner):
+    """
+    Runs the tests against an empty in-process cache. A test run is a single
+    process, so it needs neither Redis nor the shared-cache checks, and never
+    sees or wipes the entries of a development server.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_settings = override_settings(
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'lms-tests',
+            }},
+            CACHE_SINGLE_PROCESS=True,
+        )
+        self._cache_settings.enable()
+        caches['default'].clear()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
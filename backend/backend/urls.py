@@ -20,6 +20,7 @@ from django.urls import path, include
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
+from .views import DatabaseStatusView
 
 def home(request):
     return JsonResponse({"message": "Welcome to the LMS Backend API"}, status=200)
@@ -28,6 +29,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("auth/", include("authentication.urls")),  # Ensure authentication URLs are included
     path("quiz/", include("quiz.urls")),  # Add quiz URLs
+    path("db-stats/", DatabaseStatusView.as_view(), name="db_stats"),
     path("", home, name="home"),  # Add a home route
 ]
 
@@ -0,0 +1,13 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db_metrics import database_stats
+
+
+class DatabaseStatusView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(database_stats(), status=status.HTTP_200_OK)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class QuizConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "quiz"
+
+    def ready(self):
+        # Count connections from the first one this process opens
+        from backend import db_metrics  # noqa: F401
+        from . import checks  # noqa: F401
@@ -0,0 +1,167 @@
+"""
+Compaction of closed quizzes.
+
+Once a quiz has closed and its results are generated, its QuizAssignment
+rows are only ever read back for results pages. ``archive_quiz`` collapses
+them into one QuizArchive row per student and deletes them, so the hot
+table only holds quizzes that can still be taken. The readers below serve
+a quiz from whichever of the two holds it.
+
+Each QuizArchive.answers is zlib-compressed JSON, one list per question in
+the order of ``FIELDS``.
+"""
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import performance
+from .models import ATTEMPT_GRACE, Question, Quiz, QuizArchive, QuizAssignment, QuizResults
+
+FIELDS = ('question_id', 'student_answer', 'score', 'submitted_at', 'completed', 'is_graded', 'assigned_at')
+
+
+class ArchivedAssignment:
+    """Read-only stand-in for a QuizAssignment restored from a QuizArchive"""
+    id = None
+
+    def __init__(self, quiz, student, question, entry):
+        self.quiz = quiz
+        self.quiz_id = quiz.id
+        self.student = student
+        self.student_id = student.id
+        self.question = question
+        self.question_id = question.id
+        self.student_answer = entry['student_answer']
+        self.score = entry['score']
+        self.submitted_at = entry['submitted_at']
+        self.completed = entry['completed']
+        self.is_graded = entry['is_graded']
+        self.assigned_at = entry['assigned_at']
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def pack(rows):
+    """Compress assignment rows (tuples in FIELDS order) into an archive payload"""
+    entries = [
+        [question_id, answer, None if score is None else str(score),
+         _isoformat(submitted_at), completed, is_graded, _isoformat(assigned_at)]
+        for question_id, answer, score, submitted_at, completed, is_graded, assigned_at in rows
+    ]
+    return zlib.compress(json.dumps(entries, separators=(',', ':')).encode(), 9)
+
+
+def unpack(payload):
+    """The archived assignment fields as dicts, in question order"""
+    entries = []
+    for entry in json.loads(zlib.decompress(bytes(payload))):
+        entry = dict(zip(FIELDS, entry))
+        entry['score'] = None if entry['score'] is None else Decimal(entry['score'])
+        entry['submitted_at'] = _datetime(entry['submitted_at'])
+        entry['assigned_at'] = _datetime(entry['assigned_at'])
+        entries.append(entry)
+    return entries
+
+
+def is_archivable(quiz, now=None):
+    """Closed for good: scheduled, past its end plus the grace for late answers"""
+    now = now or timezone.now()
+    return (quiz.archived_at is None and quiz.is_scheduled
+            and quiz.scheduled_end_time is not None
+            and quiz.scheduled_end_time + ATTEMPT_GRACE < now)
+
+
+def archivable_quizzes(before):
+    """Unarchived scheduled quizzes that ended before ``before``"""
+    return Quiz.objects.filter(
+        archived_at__isnull=True, is_scheduled=True, scheduled_end_time__lt=before - ATTEMPT_GRACE
+    ).order_by('scheduled_end_time')
+
+
+def archive_quiz(quiz, batch_size=500):
+    """
+    Compact a closed quiz's assignments into QuizArchive rows and delete
+    them. Scores are settled and results generated first. Returns the
+    number of students archived, 0 if the quiz cannot be archived yet.
+    """
+    now = timezone.now()
+    if not is_archivable(quiz, now):
+        return 0
+
+    # Totals are frozen from here on, so apply any pending recomputation
+    performance.recompute_quiz(quiz.id, now)
+    if not QuizResults.objects.filter(quiz=quiz).exists():
+        QuizResults.generate_results(quiz)
+
+    with transaction.atomic():
+        quiz = Quiz.objects.select_for_update().get(pk=quiz.pk)
+        if quiz.archived_at is not None:
+            return 0
+        rows = QuizAssignment.objects.filter(quiz=quiz).order_by('student_id', 'question_id').values_list(
+            'student_id', *FIELDS)
+
+        records = []
+        student_id, answers = None, []
+        for row in rows.iterator(chunk_size=2000):
+            if row[0] != student_id and answers:
+                records.append(_record(quiz, student_id, answers))
+                answers = []
+            student_id = row[0]
+            answers.append(row[1:])
+        if answers:
+            records.append(_record(quiz, student_id, answers))
+
+        QuizArchive.objects.bulk_create(records, batch_size=batch_size)
+        QuizAssignment.objects.filter(quiz=quiz).delete()
+        quiz.archived_at = now
+        quiz.save(update_fields=['archived_at'])
+    return len(records)
+
+
+def _record(quiz, student_id, answers):
+    return QuizArchive(
+        quiz=quiz,
+        student_id=student_id,
+        question_count=len(answers),
+        completed_count=sum(1 for answer in answers if answer[FIELDS.index('completed')]),
+        answers=pack(answers),
+    )
+
+
+def is_assigned(quiz, student):
+    """Whether the quiz was assigned to the student, archived or not"""
+    if quiz.archived_at:
+        return QuizArchive.objects.filter(quiz=quiz, student=student).exists()
+    return QuizAssignment.objects.filter(quiz=quiz, student=student).exists()
+
+
+def archived_assignments(quiz, student=None):
+    """
+    ArchivedAssignment objects for an archived quiz, optionally for one
+    student, with student and question loaded like
+    ``select_related('student', 'question')``.
+    """
+    records = QuizArchive.objects.filter(quiz=quiz).select_related('student').order_by('student_id')
+    if student is not None:
+        records = records.filter(student=student)
+    unpacked = [(record.student, unpack(record.answers)) for record in records]
+    questions = Question.objects.in_bulk(
+        {entry['question_id'] for _, entries in unpacked for entry in entries})
+
+    # Answers to questions deleted since go, as their assignments would have
+    return [
+        ArchivedAssignment(quiz, student, questions[entry['question_id']], entry)
+        for student, entries in unpacked
+        for entry in entries
+        if entry['question_id'] in questions
+    ]
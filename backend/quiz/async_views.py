@@ -0,0 +1,273 @@
+"""
+Async versions of the hot student endpoints, mounted under ``async/``, and
+the live quiz event stream.
+
+They return the same payloads as their counterparts in views.py but are
+native coroutines, so under the ASGI entry point (backend/asgi.py) a request
+waiting on the database or cache does not hold a worker thread. Queries use
+Django's async ORM; helpers that are sync-only (the schedule index, version
+counters, model save hooks) run in one ``sync_to_async`` call each. Users are
+built from the JWT claims, as ClaimsJWTAuthentication does for the DRF views.
+"""
+import json
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from authentication.tokens import ClaimsJWTAuthentication
+from . import archive, autosave, live, schedule, versions, views
+from .idempotency import aidempotent
+from .models import Quiz, QuizArchive, QuizAssignment, QuizAttempt, StudentPerformance
+
+logger = logging.getLogger(__name__)
+
+
+def _response(data, status=status.HTTP_200_OK):
+    response = JsonResponse(data, encoder=JSONEncoder, safe=False, status=status)
+    # Same attribute as a DRF Response, read by aidempotent
+    response.data = data
+    return response
+
+
+def _parse_body(request):
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    return request.POST
+
+
+def authenticated(*methods):
+    """
+    Authenticate a coroutine view with the request's JWT and restrict it to
+    ``methods``, answering errors the way the DRF views do. Sets
+    ``request.user`` and, for requests with a body, ``request.data``.
+    """
+    authentication = ClaimsJWTAuthentication()
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            if request.method not in methods:
+                return _response({"detail": f'Method "{request.method}" not allowed.'},
+                                 status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                user = await authentication.aauthenticate(request)
+            except AuthenticationFailed as e:
+                detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+                response = _response(detail, status=status.HTTP_401_UNAUTHORIZED)
+                response['WWW-Authenticate'] = authentication.authenticate_header(request)
+                return response
+            if user is None:
+                response = _response({"detail": "Authentication credentials were not provided."},
+                                     status=status.HTTP_401_UNAUTHORIZED)
+                response['WWW-Authenticate'] = authentication.authenticate_header(request)
+                return response
+
+            try:
+                request.data = _parse_body(request) if request.method == 'POST' else {}
+            except ValueError:
+                return _response({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return csrf_exempt(wrapped)
+    return decorator
+
+
+async def _conditional(request, etag_func, *args):
+    """Returns (etag, 304 response or None) for views.py's ETag functions"""
+    etag = await sync_to_async(etag_func)(request, *args)
+    if etag is not None and versions.is_not_modified(request, etag):
+        return etag, versions.add_validators(
+            HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag)
+    return etag, None
+
+
+@authenticated('GET')
+async def get_student_quizzes(request):
+    """Get all quizzes assigned to the student"""
+    try:
+        if not request.user.is_student:
+            return _response({"error": "Only students can access this endpoint"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        etag, not_modified = await _conditional(request, views._student_quizzes_etag)
+        if not_modified:
+            return not_modified
+
+        assignments = [
+            assignment async for assignment in
+            QuizAssignment.objects.filter(
+                student_id=request.user.id, quiz__deleted_at__isnull=True).select_related('quiz')
+        ]
+        archives = [
+            record async for record in
+            QuizArchive.objects.filter(
+                student_id=request.user.id, quiz__deleted_at__isnull=True).select_related('quiz')
+        ]
+        index = await sync_to_async(schedule.get_index)()
+        return versions.add_validators(
+            _response(views._student_quiz_list(assignments, index, archives)), etag)
+
+    except Exception as e:
+        logger.error(f"Error fetching student quizzes: {str(e)}")
+        return _response({"error": "Failed to fetch quizzes. Please try again."},
+                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@authenticated('GET')
+async def get_quiz_questions(request, quiz_id):
+    """Get questions for a specific quiz"""
+    try:
+        if not request.user.is_student:
+            return _response({"error": "Only students can access this endpoint"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        etag, not_modified = await _conditional(request, views._quiz_questions_etag, quiz_id)
+        if not_modified:
+            return not_modified
+
+        assignments = [
+            assignment async for assignment in QuizAssignment.objects.filter(
+                quiz_id=quiz_id, quiz__deleted_at__isnull=True,
+                student_id=request.user.id).select_related('question')
+        ]
+        if not assignments:
+            return _response({"error": "Quiz not found or not assigned to you"},
+                             status=status.HTTP_404_NOT_FOUND)
+        index = await sync_to_async(schedule.get_index)()
+        if not index.has_started(quiz_id):
+            return _response({"error": "Quiz has not started yet"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        drafts = await sync_to_async(autosave.get_drafts)(
+            [assignment.id for assignment in assignments if not assignment.completed],
+            request.user.id
+        )
+        return versions.add_validators(
+            _response(views._question_list(request, assignments, drafts)), etag)
+
+    except Exception as e:
+        logger.error(f"Error fetching quiz questions: {str(e)}")
+        return _response({"error": "Failed to fetch questions. Please try again."},
+                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@authenticated('GET')
+async def get_student_performance(request, quiz_id=None):
+    """Get student's performance across all quizzes or for a specific quiz"""
+    try:
+        if not request.user.is_student:
+            return _response({"error": "Only students can access this endpoint"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        if not quiz_id:
+            return _response([
+                {'quiz_id': perf.quiz_id, **views._performance_data(perf)}
+                async for perf in StudentPerformance.objects.filter(
+                    student_id=request.user.id, quiz__deleted_at__isnull=True)
+            ])
+
+        etag, not_modified = await _conditional(request, views._student_performance_etag, quiz_id)
+        if not_modified:
+            return not_modified
+
+        performance = await StudentPerformance.objects.filter(
+            student_id=request.user.id, quiz_id=quiz_id).afirst()
+        if performance is None:
+            try:
+                quiz = await Quiz.objects.aget(id=quiz_id)
+            except Quiz.DoesNotExist:
+                return _response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+            if not await sync_to_async(archive.is_assigned)(quiz, request.user):
+                return _response({"error": "Quiz not assigned to you"},
+                                 status=status.HTTP_404_NOT_FOUND)
+            performance, created = await StudentPerformance.objects.aget_or_create(
+                student_id=request.user.id,
+                quiz_id=quiz_id,
+                defaults={'total_score': 0, 'max_possible_score': quiz.total_score or 0}
+            )
+
+        if performance.is_stale:
+            await sync_to_async(performance.update_performance)()
+        return versions.add_validators(_response(views._performance_data(performance)), etag)
+
+    except Exception as e:
+        logger.error(f"Error processing performance data for quiz {quiz_id}: {str(e)}")
+        return _response({"error": "Failed to fetch performance data. Please try again."},
+                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@authenticated('POST')
+@aidempotent(_response)
+async def submit_answer(request, assignment_id):
+    """Submit an answer for a quiz assignment"""
+    try:
+        if not request.user.is_student:
+            return _response({"error": "Only students can submit answers"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            assignment = await QuizAssignment.objects.select_related('question', 'quiz').aget(
+                id=assignment_id, student_id=request.user.id)
+        except QuizAssignment.DoesNotExist:
+            return _response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Submissions are only accepted while the quiz and the student's session are open
+        if not await sync_to_async(schedule.is_open)(assignment.quiz_id):
+            return _response({"error": "Quiz is not available right now"},
+                             status=status.HTTP_403_FORBIDDEN)
+        attempt = await sync_to_async(QuizAttempt.start)(assignment.quiz, request.user)
+        if not attempt.is_open():
+            return _response({"error": "Time limit for this quiz has expired"},
+                             status=status.HTTP_403_FORBIDDEN)
+
+        # Without an explicit answer the latest autosaved draft is submitted
+        answer = request.data.get('answer')
+        if answer is None:
+            drafts = await sync_to_async(autosave.get_drafts)([assignment.id], request.user.id)
+            answer = drafts.get(assignment.id, assignment.student_answer)
+
+        await sync_to_async(views._complete_submission)(assignment, attempt, answer)
+        return _response({"message": "Answer submitted successfully"})
+
+    except Exception as e:
+        logger.error(f"Error submitting answer: {str(e)}")
+        return _response({"error": "Failed to submit answer. Please try again."},
+                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def quiz_live_stream(request, quiz_id):
+    """
+    Server-Sent Events with a quiz's completion counts, score histogram and
+    ranks: a snapshot, then deltas. Opened with a ticket from
+    quiz_live_ticket, and only under the ASGI entry point.
+    """
+    if request.method != 'GET':
+        return _response({"detail": f'Method "{request.method}" not allowed.'},
+                         status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not live.streaming_supported(request):
+        return _response({"error": "Live updates need the ASGI server; poll the rankings instead"},
+                         status=status.HTTP_501_NOT_IMPLEMENTED)
+    try:
+        if await live.aredeem_ticket(request.GET.get('ticket'), quiz_id) is None:
+            return _response({"error": "Invalid or expired stream ticket"},
+                             status=status.HTTP_401_UNAUTHORIZED)
+        if not await Quiz.objects.filter(id=quiz_id).aexists():
+            return _response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        subscription = await live.publisher.subscribe(quiz_id)
+    except Exception as e:
+        logger.error(f"Error opening live stream for quiz {quiz_id}: {str(e)}")
+        return _response({"error": "Failed to open live updates. Please try again."},
+                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    response = StreamingHttpResponse(subscription, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
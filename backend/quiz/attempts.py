@@ -0,0 +1,153 @@
+"""
+Deadline expiry for timed quiz attempts.
+
+Open attempts are kept in a min-heap ordered by deadline, so the expiry
+worker only ever looks at the earliest deadline instead of scanning every
+session on each pass. New attempts are picked up incrementally by id, and
+every few passes all open attempts are reloaded, since an attempt can commit
+after one with a higher id has already been seen. Due attempts are finalised
+in batches: their unsubmitted answers (including any buffered autosave
+drafts) are graded and written with one bulk update, and the affected
+performance rows are queued for recomputation.
+"""
+import heapq
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import autosave, versions
+from .models import ATTEMPT_GRACE, QuizAssignment, QuizAttempt, StudentPerformance
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = timedelta(seconds=30)
+
+# Refreshes between full reloads of the open attempts
+RESCAN_EVERY = 12
+
+
+class DeadlineScheduler:
+    """Min-heap of (deadline, attempt id) for attempts that are still open"""
+
+    def __init__(self):
+        self._heap = []
+        self._queued = set()
+        self._last_seen_id = 0
+        self._refreshes = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def refresh(self):
+        """
+        Load attempts started since the last refresh, or every RESCAN_EVERY
+        refreshes all open attempts. Returns how many were added.
+        """
+        self._refreshes += 1
+        open_attempts = QuizAttempt.objects.filter(finalized_at__isnull=True, deadline__isnull=False)
+        if self._refreshes % RESCAN_EVERY:
+            # A transaction holding a lower id may still commit; the rescan catches it
+            open_attempts = open_attempts.filter(id__gt=self._last_seen_id)
+        added = 0
+        for attempt_id, deadline in open_attempts.order_by('id').values_list('id', 'deadline'):
+            self._last_seen_id = max(self._last_seen_id, attempt_id)
+            if attempt_id in self._queued:
+                continue
+            heapq.heappush(self._heap, (deadline + ATTEMPT_GRACE, attempt_id))
+            self._queued.add(attempt_id)
+            added += 1
+        return added
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None, limit=500):
+        """Remove and return up to ``limit`` attempt ids whose deadline has passed"""
+        now = now or timezone.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            due.append(heapq.heappop(self._heap)[1])
+        self._queued.difference_update(due)
+        return due
+
+    def retry_later(self, attempt_ids, now=None):
+        """Put attempts back on the heap after a failed finalisation"""
+        when = (now or timezone.now()) + RETRY_DELAY
+        for attempt_id in attempt_ids:
+            heapq.heappush(self._heap, (when, attempt_id))
+        self._queued.update(attempt_ids)
+
+
+def finalize(attempt_ids, now=None):
+    """
+    Close the given attempts and grade whatever they left unsubmitted.
+    Attempts already finalised (e.g. by a final submit) are skipped.
+    Returns the number of attempts finalised.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        attempts = list(
+            QuizAttempt.objects.select_for_update()
+            .filter(id__in=attempt_ids, finalized_at__isnull=True)
+        )
+        if not attempts:
+            return 0
+
+        pairs = Q()
+        for attempt in attempts:
+            pairs |= Q(quiz_id=attempt.quiz_id, student_id=attempt.student_id)
+        deadlines = {(a.quiz_id, a.student_id): a.deadline or now for a in attempts}
+
+        pending = list(
+            QuizAssignment.objects.select_for_update(of=('self',))
+            .select_related('question')
+            .filter(pairs, completed=False)
+        )
+        drafts = autosave.pop_drafts(pending)
+        for assignment in pending:
+            if assignment.id in drafts:
+                assignment.student_answer = drafts[assignment.id]
+            if assignment.student_answer and not assignment.is_graded:
+                assignment.score = assignment.question.calculate_score(assignment.student_answer)
+                assignment.is_graded = True
+            assignment.completed = True
+            assignment.submitted_at = deadlines[(assignment.quiz_id, assignment.student_id)]
+        QuizAssignment.objects.bulk_update(
+            pending, ['student_answer', 'score', 'is_graded', 'completed', 'submitted_at'],
+            batch_size=500
+        )
+
+        # Totals are recomputed from the assignments by the performance queue
+        StudentPerformance.objects.bulk_create(
+            [StudentPerformance(quiz_id=a.quiz_id, student_id=a.student_id) for a in attempts],
+            ignore_conflicts=True
+        )
+        StudentPerformance.objects.filter(pairs).update(is_stale=True, updated_at=now)
+
+        QuizAttempt.objects.filter(id__in=[a.id for a in attempts]).update(finalized_at=now)
+
+    keys = set()
+    for attempt in attempts:
+        keys.add(versions.quiz_key(attempt.quiz_id))
+        keys.add(versions.student_key(attempt.student_id))
+    versions.bump(*keys)
+    return len(attempts)
+
+
+def expire_due(scheduler, batch_size=500):
+    """Refresh the scheduler and finalise everything due. Returns attempts finalised."""
+    scheduler.refresh()
+    finalized = 0
+    while True:
+        due = scheduler.pop_due(limit=batch_size)
+        if not due:
+            return finalized
+        try:
+            finalized += finalize(due)
+        except Exception as e:
+            logger.error(f"Error finalising expired attempts {due}: {str(e)}")
+            scheduler.retry_later(due)
+            return finalized
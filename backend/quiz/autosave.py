@@ -0,0 +1,128 @@
+"""
+Write-behind buffer for draft answers.
+
+Autosaves only touch the cache: the latest draft per assignment and student
+plus an append-only log of drafts that need flushing. ``flush()`` drains the
+log periodically and writes every buffered draft with one UPDATE per batch.
+Drafts are keyed by student as well as assignment, so a student posting to
+someone else's assignment only ever writes a draft of their own, which the
+flush drops. Drafts never grade anything; only submit_answer does.
+
+The buffer is read by the ``flush_autosaves`` and ``expire_attempts``
+workers, so the cache must be shared between processes (see backend/cache_checks.py).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, Q, TextField, Value, When
+
+from .models import QuizAssignment
+
+logger = logging.getLogger(__name__)
+
+DRAFT_TTL = getattr(settings, 'AUTOSAVE_DRAFT_TTL', 6 * 60 * 60)
+
+MAX_DRAFT_LENGTH = 10000
+
+# Positions tried before a draft is left for its next autosave to log
+LOG_ATTEMPTS = 3
+
+SEQUENCE_KEY = 'lms:autosave:sequence'
+FLUSHED_KEY = 'lms:autosave:flushed'
+
+
+def _draft_key(assignment_id, student_id):
+    return f'lms:autosave:draft:{assignment_id}:{student_id}'
+
+
+def _queued_key(assignment_id, student_id):
+    return f'lms:autosave:queued:{assignment_id}:{student_id}'
+
+
+def _log_key(position):
+    return f'lms:autosave:log:{position}'
+
+
+def _log(entry):
+    """Append ``entry`` to the log at a position no other writer holds. Returns whether it was logged."""
+    cache.add(SEQUENCE_KEY, 0, None)
+    for _ in range(LOG_ATTEMPTS):
+        position = cache.incr(SEQUENCE_KEY)
+        # add() rather than set(): a position handed out twice keeps the
+        # first entry, and the second writer takes the next position
+        if cache.add(_log_key(position), entry, DRAFT_TTL):
+            return True
+    return False
+
+
+def save_draft(assignment_id, student_id, answer):
+    """Buffer the student's latest draft; it is logged once per flush cycle"""
+    cache.set(_draft_key(assignment_id, student_id), answer, DRAFT_TTL)
+    queued_key = _queued_key(assignment_id, student_id)
+    if cache.add(queued_key, True, DRAFT_TTL) and not _log((int(assignment_id), str(student_id))):
+        # Without a log entry the marker would keep the draft from ever being flushed
+        cache.delete(queued_key)
+        logger.warning(f"Could not log autosave of assignment {assignment_id}; it is retried on the next one")
+
+
+def get_drafts(assignment_ids, student_id):
+    """The student's buffered drafts of the given assignments"""
+    keys = {_draft_key(assignment_id, student_id): assignment_id for assignment_id in assignment_ids}
+    return {keys[key]: answer for key, answer in cache.get_many(list(keys)).items()}
+
+
+def discard_draft(assignment_id, student_id):
+    cache.delete(_draft_key(assignment_id, student_id))
+
+
+def pop_drafts(assignments):
+    """Remove and return the owners' buffered drafts of the given assignments as {assignment_id: answer}"""
+    keys = {_draft_key(assignment.id, assignment.student_id): assignment.id for assignment in assignments}
+    found = cache.get_many(list(keys))
+    cache.delete_many(list(found))
+    return {keys[key]: answer for key, answer in found.items()}
+
+
+def pending_count():
+    """Number of logged autosaves not flushed yet"""
+    return (cache.get(SEQUENCE_KEY) or 0) - (cache.get(FLUSHED_KEY) or 0)
+
+
+def flush(batch_size=500):
+    """Write buffered drafts to QuizAssignment.student_answer. Returns rows written."""
+    flushed = cache.get(FLUSHED_KEY) or 0
+    head = cache.get(SEQUENCE_KEY) or 0
+    written = 0
+
+    while flushed < head:
+        upto = min(head, flushed + batch_size)
+        log_keys = [_log_key(position) for position in range(flushed + 1, upto + 1)]
+        entries = set(cache.get_many(log_keys).values())
+
+        # Clear the queued markers first so autosaves from now on log again
+        cache.delete_many([_queued_key(*entry) for entry in entries])
+        drafts = cache.get_many([_draft_key(*entry) for entry in entries])
+
+        whens = []
+        owned = Q()
+        for assignment_id, student_id in entries:
+            answer = drafts.get(_draft_key(assignment_id, student_id))
+            if answer is None:
+                continue
+            owned |= Q(id=assignment_id, student_id=student_id)
+            whens.append(When(id=assignment_id, student_id=student_id, then=Value(answer)))
+
+        if whens:
+            # Only the owner's drafts are written, and never over a submitted answer
+            written += QuizAssignment.objects.filter(owned, completed=False).update(
+                student_answer=Case(*whens, default=F('student_answer'), output_field=TextField())
+            )
+
+        cache.delete_many(log_keys)
+        flushed = upto
+        cache.set(FLUSHED_KEY, flushed, None)
+
+    if written:
+        logger.info(f"Flushed {written} autosaved answers")
+    return written
@@ -0,0 +1,31 @@
+"""
+System checks for the quiz app.
+
+The quiz app keeps version counters, autosaved drafts, idempotency keys and
+its worker queues in the default cache; backend/cache_checks.py explains what
+that requires of the backend.
+"""
+from django.core.checks import Error, Warning, register
+
+from backend.cache_checks import cache_backend, cache_is_atomic, cache_is_shared
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_atomic():
+        return []
+    if not cache_is_shared():
+        return [Warning(
+            f"The default cache ({cache_backend()}) is private to each process.",
+            hint="Use the Redis or memcached cache backend so web processes and workers "
+                 "share version counters, drafts and queues, or set CACHE_SINGLE_PROCESS "
+                 "if nothing runs beside this process.",
+            id='quiz.W001',
+        )]
+    return [Error(
+        f"The default cache ({cache_backend()}) cannot add or increment keys atomically.",
+        hint="Use the Redis or memcached cache backend so concurrent processes cannot lose "
+             "version bumps or claim the same idempotency key, or set CACHE_SINGLE_PROCESS "
+             "if nothing runs beside this process.",
+        id='quiz.E001',
+    )]
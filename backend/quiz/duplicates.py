@@ -0,0 +1,272 @@
+"""
+Near-duplicate detection for bank questions with MinHash and LSH.
+
+Each bank question's text and options are normalised and cut into
+character shingles. A MinHash signature of ``NUM_BINS`` values is computed
+with one-permutation hashing: every shingle is hashed once and only the
+minimum per bin is kept, and empty bins borrow from the next filled one.
+The share of equal values between two signatures estimates the Jaccard
+similarity of their shingle sets.
+
+Signatures are cut into ``BANDS`` bands whose hashes are stored in
+QuestionBand. Questions sharing any (band, bucket) are candidates, found
+through the (band, bucket) index, so only colliding questions are compared
+rather than every pair. A candidate at least ``SIMILARITY`` alike flags
+the later question as a duplicate of the earlier one. Import dry runs
+count the same flags with ``count_duplicates``, which writes nothing.
+"""
+import hashlib
+import heapq
+import re
+from array import array
+from collections import defaultdict
+from operator import eq
+
+from django.conf import settings
+from django.db import transaction
+
+NUM_BINS = 64
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+SHINGLE_SIZE = 5
+# Earliest questions taken from any one bucket as candidates
+MAX_BUCKET_CANDIDATES = 10
+SIMILARITY = getattr(settings, 'QUESTION_DUPLICATE_SIMILARITY', 0.8)
+
+_BIN_BITS = 6  # NUM_BINS == 1 << _BIN_BITS
+_NOISE = re.compile(r'[^\w ]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalise(question):
+    parts = [question.text or ''] + sorted(str(option) for option in (question.options or []))
+    text = _NOISE.sub(' ', ' '.join(parts).lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def shingles(text):
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+
+
+def signature(text):
+    """MinHash signature of ``text`` as an array of NUM_BINS ints, or None for empty text"""
+    minimums = [None] * NUM_BINS
+    for shingle in shingles(text):
+        value = _hash(shingle.encode())
+        slot, rest = value & (NUM_BINS - 1), value >> _BIN_BITS
+        if minimums[slot] is None or rest < minimums[slot]:
+            minimums[slot] = rest
+    if all(value is None for value in minimums):
+        return None
+
+    # Densify: an empty bin takes the next filled bin's value, tagged with
+    # the distance so borrowed values only match the same borrowing
+    result = array('Q')
+    for slot in range(NUM_BINS):
+        distance = 0
+        while minimums[(slot + distance) % NUM_BINS] is None:
+            distance += 1
+        result.append((minimums[(slot + distance) % NUM_BINS] << _BIN_BITS) | distance)
+    return result
+
+
+def bands(sig):
+    """One signed 64-bit bucket per band"""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+                       'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    return sum(map(eq, first, second)) / NUM_BINS
+
+
+def _load(payload):
+    sig = array('Q')
+    sig.frombytes(bytes(payload))
+    return sig
+
+
+def _bucket_members(buckets):
+    """
+    {(band, bucket): oldest stored question ids in it} for every bucket
+    listed in ``buckets``, one query per band
+    """
+    from .models import QuestionBand
+
+    members = {}
+    for band in range(BANDS):
+        wanted = {question_buckets[band] for question_buckets in buckets}
+        found = defaultdict(list)
+        for bucket, other_id in QuestionBand.objects.filter(
+                band=band, bucket__in=list(wanted)).values_list('bucket', 'question_id'):
+            found[bucket].append(other_id)
+        for bucket, others in found.items():
+            # A crowded bucket is a cluster of copies; its oldest members
+            # are enough to flag against and keep the work linear
+            members[band, bucket] = heapq.nsmallest(MAX_BUCKET_CANDIDATES + 1, others)
+    return members
+
+
+def _stored_signatures(question_ids):
+    from .models import QuestionSignature
+
+    return {
+        question_id: _load(payload)
+        for question_id, payload in QuestionSignature.objects.filter(
+            question_id__in=question_ids).values_list('question_id', 'minhash')
+    }
+
+
+def _best(sig, candidates, stored):
+    """(id, similarity) of the most similar candidate at least SIMILARITY alike, or None"""
+    best = None
+    for other_id in sorted(candidates):
+        score = similarity(sig, stored[other_id])
+        if score >= SIMILARITY and (best is None or score > best[1]):
+            best = (other_id, score)
+    return best
+
+
+def index_questions(questions, recheck=True):
+    """
+    Store signatures and bands for the given bank questions and flag each
+    one that nearly duplicates an earlier question. Questions in a quiz, or
+    without text, keep no rows. With ``recheck``, questions flagged against
+    one of these are checked again, since its text may have changed or it may
+    have left the bank. Returns {question id: (duplicate of id, similarity)}
+    for the given questions flagged.
+    """
+    from .models import Question, QuestionBand, QuestionSignature
+
+    signatures = {}
+    for question in questions:
+        if question.quiz_id is None:
+            sig = signature(normalise(question))
+            if sig is not None:
+                signatures[question.id] = sig
+    question_ids = [question.id for question in questions]
+    buckets = {question_id: bands(sig) for question_id, sig in signatures.items()}
+
+    flagged = {}
+    with transaction.atomic():
+        QuestionBand.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.filter(question_id__in=question_ids).delete()
+        if signatures:
+            QuestionBand.objects.bulk_create(
+                QuestionBand(question_id=question_id, band=band, bucket=bucket)
+                for question_id, question_buckets in buckets.items()
+                for band, bucket in enumerate(question_buckets)
+            )
+
+            # Earlier questions sharing a bucket with one of ours
+            members = _bucket_members(buckets.values())
+            candidates = defaultdict(set)
+            for question_id, question_buckets in buckets.items():
+                for band, bucket in enumerate(question_buckets):
+                    candidates[question_id].update(
+                        other_id for other_id in members.get((band, bucket), ()) if other_id < question_id)
+
+            stored = _stored_signatures({other for others in candidates.values() for other in others})
+            stored.update(signatures)
+
+            rows = []
+            for question_id, sig in signatures.items():
+                best = _best(sig, candidates.get(question_id, ()), stored)
+                if best is not None:
+                    flagged[question_id] = best
+                rows.append(QuestionSignature(
+                    question_id=question_id,
+                    minhash=sig.tobytes(),
+                    duplicate_of_id=best[0] if best else None,
+                    similarity=best[1] if best else None,
+                ))
+            QuestionSignature.objects.bulk_create(rows)
+
+        if recheck:
+            dependents = QuestionSignature.objects.filter(
+                duplicate_of_id__in=question_ids).exclude(question_id__in=question_ids)
+            later = list(Question.objects.filter(id__in=dependents.values('question_id')).only(
+                'id', 'quiz', 'text', 'options'))
+            if later:
+                index_questions(later, recheck=False)
+    return flagged
+
+
+class Preview:
+    """
+    Questions already checked by ``count_duplicates`` in one run, kept in
+    memory in place of the QuestionBand and QuestionSignature rows a real
+    import would have written
+    """
+
+    def __init__(self):
+        self.signatures = []
+        self.members = defaultdict(list)
+
+
+def count_duplicates(questions, preview):
+    """
+    How many of the unsaved ``questions`` ``index_questions`` would flag if
+    they were imported now, writing nothing. They are compared with the bank
+    and with the questions passed earlier with the same ``preview``.
+    """
+    signatures = []
+    for question in questions:
+        if question.quiz_id is None:
+            sig = signature(normalise(question))
+            if sig is not None:
+                signatures.append((sig, bands(sig)))
+    if not signatures:
+        return 0
+
+    members = _bucket_members(question_buckets for _, question_buckets in signatures)
+    stored = _stored_signatures({other for others in members.values() for other in others})
+    flagged = 0
+    for sig, question_buckets in signatures:
+        candidates = set()
+        earlier = set()
+        for band, bucket in enumerate(question_buckets):
+            candidates.update(members.get((band, bucket), ()))
+            earlier.update(preview.members[band, bucket])
+        if _best(sig, candidates, stored) is not None or any(
+                similarity(sig, preview.signatures[index]) >= SIMILARITY for index in earlier):
+            flagged += 1
+
+        index = len(preview.signatures)
+        preview.signatures.append(sig)
+        for band, bucket in enumerate(question_buckets):
+            if len(preview.members[band, bucket]) <= MAX_BUCKET_CANDIDATES:
+                preview.members[band, bucket].append(index)
+    return flagged
+
+
+def scan(batch_size=1000, progress=None):
+    """
+    Index the whole bank in id order, flagging duplicates of earlier
+    questions. ``progress`` is called with (questions done, flagged so far)
+    after each batch. Returns (questions indexed, questions flagged).
+    """
+    from .models import Question
+
+    done = flagged = 0
+    last_id = 0
+    while True:
+        batch = list(Question.objects.filter(quiz__isnull=True, id__gt=last_id).order_by('id').only(
+            'id', 'quiz', 'text', 'options')[:batch_size])
+        if not batch:
+            return done, flagged
+        # Later questions are reindexed by their own batch
+        flagged += len(index_questions(batch, recheck=False))
+        done += len(batch)
+        last_id = batch[-1].id
+        if progress:
+            progress(done, flagged)
@@ -0,0 +1,133 @@
+"""
+Idempotency-Key support for submission endpoints.
+
+Clients may send an ``Idempotency-Key`` header with any submission. The first
+request with a key runs normally and its response is kept in the cache; a
+retry with the same key gets the stored response back without the view
+running again. Keys are claimed with cache.add(), which only the atomic
+backends required by the quiz.E001 system check make safe between processes.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+# How long a key stays locked while its first request is still running
+IN_PROGRESS_TTL = 60
+
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+
+
+def _digest(*parts):
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _claim(request, view_name, kwargs):
+    """
+    Reserve the request's Idempotency-Key. Returns ``(claim, result)``: when
+    ``result`` is set the view must not run and ``result`` is the
+    ``(data, status, replayed)`` to answer with; otherwise ``claim`` is passed
+    to ``_release()`` once the view has run, or is None if no key was sent.
+    """
+    key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+    if not key:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH:
+        return None, ({"error": "Idempotency-Key is too long"}, status.HTTP_400_BAD_REQUEST, False)
+
+    cache_key = 'lms:idempotency:' + _digest(str(request.user.id), view_name, key)
+    fingerprint = _digest(kwargs, request.data)[:16]
+
+    while not cache.add(cache_key, (IN_PROGRESS, fingerprint), IN_PROGRESS_TTL):
+        stored = cache.get(cache_key)
+        if stored is not None:
+            if stored[1] != fingerprint:
+                return None, (
+                    {"error": "Idempotency-Key was already used for a different request"},
+                    status.HTTP_422_UNPROCESSABLE_ENTITY, False)
+            if stored[0] == IN_PROGRESS:
+                return None, (
+                    {"error": "A request with this Idempotency-Key is still being processed"},
+                    status.HTTP_409_CONFLICT, False)
+            return None, (stored[3], stored[2], True)
+        # The stored entry expired between add() and get(); claim it again,
+        # since a concurrent retry may be taking it over too
+    return (cache_key, fingerprint), None
+
+
+def _release(claim, response):
+    cache_key, fingerprint = claim
+    if response is None or response.status_code >= 500:
+        # Let the client retry failures for real
+        cache.delete(cache_key)
+    else:
+        cache.set(cache_key, (DONE, fingerprint, response.status_code, response.data),
+                  IDEMPOTENCY_KEY_TTL)
+
+
+def _answer(result, response_class):
+    data, status_code, replayed = result
+    response = response_class(data, status=status_code)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Replay stored responses for repeated ``Idempotency-Key`` values. Must sit
+    below ``@api_view`` so the key is scoped to the authenticated user.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        claim, result = _claim(request, view.__name__, kwargs)
+        if result is not None:
+            return _answer(result, Response)
+        if claim is None:
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            _release(claim, None)
+            raise
+        _release(claim, response)
+        return response
+    return wrapped
+
+
+def aidempotent(response_class):
+    """
+    ``idempotent`` for coroutine views. Keys are shared with the sync view of
+    the same name; stored responses are rebuilt with ``response_class(data,
+    status=...)`` and the view's responses must expose ``.data``.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            claim, result = await sync_to_async(_claim)(request, view.__name__, kwargs)
+            if result is not None:
+                return _answer(result, response_class)
+            if claim is None:
+                return await view(request, *args, **kwargs)
+
+            try:
+                response = await view(request, *args, **kwargs)
+            except Exception:
+                await sync_to_async(_release)(claim, None)
+                raise
+            await sync_to_async(_release)(claim, response)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,270 @@
+"""
+Bulk import of questions from CSV, JSON Lines or Moodle XML.
+
+Files are read as streams: one CSV row, JSON line or ``<question>`` element
+at a time, so memory stays flat however large the file is. Each question is
+checked with the same rules as QuestionSerializer and created with
+``bulk_create`` in batches. Images named by a question come from an
+optional zip archive; Moodle XML may also embed them as base64 ``<file>``
+elements. Bad rows are reported by line and skipped. A dry run validates
+and checks for duplicates the same way but creates nothing.
+
+CSV and JSON Lines use the Question field names: text, type, topic,
+difficulty, options, correct_answer, max_score and image (a path inside
+the zip). In CSV, options and correct_answer are JSON lists or values
+separated by ``|``.
+"""
+import base64
+import csv
+import html
+import io
+import json
+import logging
+import os
+import re
+import zipfile
+from decimal import Decimal, InvalidOperation
+from xml.etree import ElementTree
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from rest_framework import serializers
+
+from . import duplicates, versions
+from .models import Question
+from .serializers import validate_answers
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+FORMATS = ('csv', 'jsonl', 'xml')
+
+TYPES = {choice for choice, _ in Question.QUESTION_TYPE_CHOICES}
+DIFFICULTIES = {choice for choice, _ in Question.DIFFICULTY_CHOICES}
+MOODLE_TYPES = {'multichoice': 'mcq', 'truefalse': 'true_false', 'shortanswer': 'short_answer'}
+
+_TAG = re.compile(r'<[^>]+>')
+
+
+class ImportReport:
+    def __init__(self):
+        self.validated = 0
+        self.created = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {'validated': self.validated, 'created': self.created, 'failed': self.failed,
+                'duplicates': self.duplicates, 'errors': self.errors}
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return {'json': 'jsonl', 'ndjson': 'jsonl'}.get(extension, extension)
+
+
+def _list(value):
+    """A list from a JSON list, a ``|`` separated string or a scalar"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, list):
+                return parsed
+        except ValueError:
+            pass
+        return [part.strip() for part in value.split('|')]
+    return [value]
+
+
+def read_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {'error': f"Invalid JSON: {e}"}
+        yield line_number, row if isinstance(row, dict) else {'error': "Expected a JSON object."}
+
+
+def _text(element, path):
+    found = element.find(path)
+    if found is None or found.text is None:
+        return ''
+    return html.unescape(_TAG.sub(' ', found.text)).strip()
+
+
+def _moodle_question(element, topic):
+    row = {
+        'type': MOODLE_TYPES.get(element.get('type'), element.get('type')),
+        'topic': topic,
+        'text': _text(element, 'questiontext/text'),
+        'max_score': _text(element, 'defaultgrade') or None,
+    }
+    tags = {_text(tag, 'text').lower() for tag in element.findall('tags/tag')}
+    row['difficulty'] = next((tag for tag in tags if tag in DIFFICULTIES), None)
+
+    answers = [(_text(answer, 'text'), float(answer.get('fraction', 0)))
+               for answer in element.findall('answer')]
+    correct = [text for text, fraction in answers if fraction > 0]
+    if row['type'] == 'mcq':
+        row['options'] = [text for text, _ in answers]
+    elif row['type'] == 'true_false':
+        correct = [text.capitalize() for text in correct]
+    row['correct_answer'] = correct
+
+    embedded = element.find('questiontext/file')
+    if embedded is not None and embedded.text:
+        row['image_file'] = ContentFile(base64.b64decode(embedded.text), name=embedded.get('name'))
+    return row
+
+
+def read_moodle_xml(stream):
+    """Questions of a Moodle XML export; categories become topics"""
+    topic = None
+    number = 0
+    events = ElementTree.iterparse(stream, events=('start', 'end'))
+    _, root = next(events)
+    for event, element in events:
+        if event != 'end' or element.tag != 'question':
+            continue
+        number += 1
+        if element.get('type') == 'category':
+            topic = _text(element, 'category/text').rstrip('/').rsplit('/', 1)[-1] or None
+        else:
+            try:
+                yield number, _moodle_question(element, topic)
+            except ValueError as e:
+                yield number, {'error': f"Invalid question: {e}"}
+        # Drop parsed questions so memory does not grow with the file
+        root.clear()
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'xml': read_moodle_xml}
+
+
+def build_question(row, defaults, images):
+    """An unsaved Question from one parsed row, or ValidationError"""
+    if row.get('error'):
+        raise serializers.ValidationError(row['error'])
+    data = {
+        'text': (row.get('text') or '').strip(),
+        'type': row.get('type') or 'short_answer',
+        'topic': row.get('topic') or defaults.get('topic'),
+        'difficulty': row.get('difficulty') or defaults.get('difficulty') or 'medium',
+        'options': _list(row.get('options')),
+        'correct_answer': _list(row.get('correct_answer')),
+    }
+    if not data['text']:
+        raise serializers.ValidationError("Question text is required.")
+    if not data['topic']:
+        raise serializers.ValidationError("Topic is required.")
+    if data['type'] not in TYPES:
+        raise serializers.ValidationError(f"Unknown question type '{data['type']}'.")
+    if data['difficulty'] not in DIFFICULTIES:
+        raise serializers.ValidationError(f"Unknown difficulty '{data['difficulty']}'.")
+    if data['type'] == 'mcq' and data['options'] is None:
+        data['options'] = []
+    try:
+        max_score = Decimal(str(row.get('max_score') or '1.0'))
+        if not max_score.is_finite():
+            raise InvalidOperation
+        max_score = max_score.quantize(Decimal('0.01'))
+    except ArithmeticError:
+        raise serializers.ValidationError(f"Invalid max_score '{row.get('max_score')}'.")
+    if not Decimal('0') <= max_score < Decimal('1000'):
+        raise serializers.ValidationError("max_score must be between 0 and 999.99.")
+    validate_answers(data)
+
+    question = Question(max_score=max_score, **data)
+    image = row.get('image_file')
+    if row.get('image'):
+        if images is None:
+            raise serializers.ValidationError(f"Image '{row['image']}' given but no image archive uploaded.")
+        try:
+            image = ContentFile(images.read(row['image']), name=os.path.basename(row['image']))
+        except KeyError:
+            raise serializers.ValidationError(f"Image '{row['image']}' not found in the archive.")
+        except zipfile.BadZipFile as e:
+            raise serializers.ValidationError(f"Image '{row['image']}' could not be read from the archive: {e}")
+    if image is not None:
+        # Written to storage by bulk_create, like a regular save
+        question.image = image
+    return question
+
+
+def import_questions(stream, file_format, user, quiz=None, images=None,
+                     batch_size=BATCH_SIZE, dry_run=False, defaults=None):
+    """
+    Import every question in ``stream`` for ``user``, into the bank or
+    ``quiz``. ``images`` is an optional zip file object. Returns an
+    ImportReport; nothing is written with ``dry_run``. Raises ValueError for
+    an unknown format and zipfile.BadZipFile for an unreadable archive.
+    """
+    if file_format not in READERS:
+        raise ValueError(f"Unsupported format '{file_format}', expected one of {', '.join(FORMATS)}")
+    defaults = dict(defaults or {})
+    if quiz is not None:
+        defaults.setdefault('topic', quiz.topic)
+        defaults.setdefault('difficulty', quiz.difficulty)
+    archive = zipfile.ZipFile(images) if images is not None else None
+    report = ImportReport()
+    preview = duplicates.Preview() if dry_run else None
+    batch = []
+
+    def flush():
+        if dry_run:
+            report.duplicates += duplicates.count_duplicates(batch, preview)
+        else:
+            with transaction.atomic():
+                Question.objects.bulk_create(batch)
+                report.duplicates += len(duplicates.index_questions(batch))
+            report.created += len(batch)
+        report.validated += len(batch)
+        batch.clear()
+
+    try:
+        for line, row in READERS[file_format](stream):
+            try:
+                question = build_question(row, defaults, archive)
+            except serializers.ValidationError as e:
+                report.error(line, ' '.join(str(detail) for detail in e.detail))
+                continue
+            question.created_by = user
+            question.quiz = quiz
+            batch.append(question)
+            if len(batch) >= batch_size:
+                flush()
+    except (csv.Error, ValueError, ElementTree.ParseError) as e:
+        # A broken file stops the import; batches already written are kept
+        report.error(None, f"Could not read the file: {e}")
+    if batch:
+        flush()
+    if archive is not None:
+        archive.close()
+
+    if report.created:
+        # bulk_create skips Question.save(), so apply its side effects once
+        versions.bump(versions.questions_key(), versions.bank_key())
+        if quiz is not None:
+            quiz.calculate_total_score()
+    logger.info(f"Imported {report.created} of {report.validated} valid questions "
+                f"({report.failed} rejected) for user {user.id}")
+    return report
@@ -0,0 +1,272 @@
+"""
+Live progress of a quiz for faculty, pushed as Server-Sent Events.
+
+Streams in this process share one ``Publisher``. For each quiz being watched
+it runs a single task that checks the quiz's version counter (one cache read
+per tick) and, only when a submission or grade change bumped it, rebuilds the
+quiz snapshot with two queries and queues the difference to every stream.
+The cost of a live exam is therefore one feed per quiz, however many people
+are watching it.
+
+Streams only work under the ASGI entry point: the WSGI handler would drain
+the endless body into memory on a worker thread, so there the endpoints
+answer 501 and clients poll the ETag'd rankings instead. EventSource cannot
+send an Authorization header, so a stream is opened with a short-lived,
+single-use ticket rather than an access token in the URL.
+"""
+import asyncio
+import json
+import logging
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q, Sum
+
+from . import versions
+from .models import Quiz, QuizAssignment
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = getattr(settings, 'LIVE_POLL_INTERVAL', 1.0)
+KEEPALIVE_SECONDS = 15
+
+# Events a slow stream may fall behind by before it is sent a fresh snapshot
+MAX_PENDING_EVENTS = 100
+
+SCORE_BUCKETS = ('0-20', '21-40', '41-60', '61-80', '81-100')
+
+# How long a stream ticket can wait before being redeemed
+TICKET_SECONDS = 30
+
+
+def streaming_supported(request):
+    """Whether the request came through the ASGI handler, which can hold a stream open"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def _ticket_key(ticket):
+    return f'lms:live:ticket:{ticket}'
+
+
+def issue_ticket(user_id, quiz_id):
+    """A ticket letting the user open the quiz's stream once, within TICKET_SECONDS"""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_ticket_key(ticket), (str(user_id), quiz_id), TICKET_SECONDS)
+    return ticket
+
+
+async def aredeem_ticket(ticket, quiz_id):
+    """The id of the user a ticket was issued to, or None; a ticket works only once"""
+    if not ticket:
+        return None
+    key = _ticket_key(ticket)
+    issued = await cache.aget(key)
+    # Only the request whose delete succeeds gets to use the ticket
+    if issued is None or issued[1] != quiz_id or not await cache.adelete(key):
+        return None
+    return issued[0]
+
+
+def score_bucket(score_percent):
+    """The score distribution bucket a percentage falls in"""
+    for bucket, upper in zip(SCORE_BUCKETS, (20, 40, 60, 80)):
+        if score_percent <= upper:
+            return bucket
+    return SCORE_BUCKETS[-1]
+
+
+def build_snapshot(quiz_id):
+    """Completion counts, score histogram and ranks of a quiz from its assignments"""
+    max_score = Quiz.objects.filter(id=quiz_id).values_list('total_score', flat=True).first() or 0
+    rows = list(
+        QuizAssignment.objects.filter(quiz_id=quiz_id)
+        .values('student__roll_no')
+        .annotate(
+            assigned=Count('id'),
+            answered=Count('id', filter=Q(completed=True)),
+            score=Sum('score', filter=Q(completed=True, is_graded=True)),
+        )
+    )
+
+    completion = {'students': len(rows), 'started': 0, 'finished': 0, 'answers': 0}
+    histogram = dict.fromkeys(SCORE_BUCKETS, 0)
+    for row in rows:
+        row['score'] = row['score'] or 0
+        completion['answers'] += row['answered']
+        if row['answered']:
+            completion['started'] += 1
+        if row['answered'] == row['assigned']:
+            completion['finished'] += 1
+        if row['answered'] and max_score > 0:
+            histogram[score_bucket(float(row['score']) / float(max_score) * 100)] += 1
+
+    # Competition ranking: equal scores share a rank
+    ranks = {}
+    rows.sort(key=lambda row: row['score'], reverse=True)
+    for position, row in enumerate(rows):
+        rank = position + 1
+        if position and row['score'] == rows[position - 1]['score']:
+            rank = ranks[rows[position - 1]['student__roll_no']][0]
+        ranks[row['student__roll_no']] = [rank, f"{row['score']:.2f}"]
+
+    return {'quiz_id': quiz_id, 'completion': completion, 'histogram': histogram, 'ranks': ranks}
+
+
+def diff(old, new):
+    """The parts of ``new`` that differ from ``old``; empty if nothing changed"""
+    delta = {}
+    if new['completion'] != old['completion']:
+        delta['completion'] = new['completion']
+    histogram = {k: v for k, v in new['histogram'].items() if old['histogram'].get(k) != v}
+    if histogram:
+        delta['histogram'] = histogram
+    ranks = {k: v for k, v in new['ranks'].items() if old['ranks'].get(k) != v}
+    ranks.update({k: None for k in old['ranks'] if k not in new['ranks']})
+    if ranks:
+        delta['ranks'] = ranks
+    return delta
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _Feed:
+    def __init__(self, quiz_id):
+        self.quiz_id = quiz_id
+        self.subscribers = set()
+        self.snapshot = None
+        self.version = None
+        self.ready = asyncio.Event()
+        self.error = None
+        self.task = None
+
+    async def refresh(self):
+        """Rebuild the snapshot if the quiz changed. Returns the delta, or None."""
+        # Read the counter first so a change during the rebuild is seen next tick
+        version = (await sync_to_async(versions.get_versions)(versions.quiz_key(self.quiz_id)))[0]
+        if version == self.version:
+            return None
+        snapshot = await sync_to_async(build_snapshot)(self.quiz_id)
+        delta = diff(self.snapshot, snapshot) if self.snapshot is not None else None
+        self.snapshot, self.version = snapshot, version
+        return delta
+
+    def publish(self, event, data):
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Replace the backlog with the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(('snapshot', self.snapshot))
+
+
+class Subscription:
+    """
+    One stream's view of a feed: iterating it yields SSE-formatted events,
+    starting with the full snapshot. Used as the body of a
+    StreamingHttpResponse, it is closed along with the response.
+    """
+
+    def __init__(self, publisher, quiz_id, queue, snapshot):
+        self.publisher = publisher
+        self.quiz_id = quiz_id
+        self.queue = queue
+        self.snapshot = snapshot
+        self.loop = asyncio.get_running_loop()
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        try:
+            yield format_event('snapshot', self.snapshot)
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(self.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.close()
+
+    def close(self):
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self.publisher.unsubscribe(self.quiz_id, self.queue)
+            return
+        # Django closes responses from a worker thread
+        try:
+            self.loop.call_soon_threadsafe(self.publisher.unsubscribe, self.quiz_id, self.queue)
+        except RuntimeError:
+            pass  # The loop has already shut down
+
+
+class Publisher:
+    """Fans quiz changes out to every stream watching the quiz in this process"""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._feeds = {}
+
+    async def subscribe(self, quiz_id):
+        """Start following a quiz; returns a Subscription"""
+        feed = self._feeds.get(quiz_id)
+        if feed is None:
+            feed = self._feeds[quiz_id] = _Feed(quiz_id)
+            try:
+                await feed.refresh()
+            except Exception as e:
+                # Streams already waiting on this feed must not wait forever
+                del self._feeds[quiz_id]
+                feed.error = e
+                feed.ready.set()
+                raise
+            feed.task = asyncio.create_task(self._watch(feed))
+            feed.ready.set()
+        await feed.ready.wait()
+        if feed.error is not None:
+            raise RuntimeError(f"Live feed for quiz {quiz_id} could not start") from feed.error
+
+        queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        feed.subscribers.add(queue)
+        return Subscription(self, quiz_id, queue, feed.snapshot)
+
+    def unsubscribe(self, quiz_id, queue):
+        feed = self._feeds.get(quiz_id)
+        if feed is None or queue not in feed.subscribers:
+            return
+        feed.subscribers.discard(queue)
+        if not feed.subscribers:
+            # The last stream closed; stop checking the quiz
+            feed.task.cancel()
+            del self._feeds[quiz_id]
+
+    def subscriber_count(self, quiz_id=None):
+        if quiz_id is not None:
+            feed = self._feeds.get(quiz_id)
+            return len(feed.subscribers) if feed else 0
+        return sum(len(feed.subscribers) for feed in self._feeds.values())
+
+    async def _watch(self, feed):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                delta = await feed.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing live feed for quiz {feed.quiz_id}: {str(e)}")
+                continue
+            if delta:
+                feed.publish('update', delta)
+
+
+publisher = Publisher()
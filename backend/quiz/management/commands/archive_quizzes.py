@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend import cache_checks
+from quiz import archive
+
+
+class Command(BaseCommand):
+    help = 'Compact the assignments of closed quizzes into one archive record per student'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=7,
+                            help='Only archive quizzes that ended at least this many days ago')
+        parser.add_argument('--limit', type=int, default=50,
+                            help='Maximum number of quizzes archived per run')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the quizzes that would be archived')
+
+    def handle(self, *args, **options):
+        cache_checks.require_shared_cache('archive_quizzes')
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        quizzes = archive.archivable_quizzes(before)[:options['limit']]
+        for quiz in quizzes:
+            if options['dry_run']:
+                self.stdout.write(f"Would archive quiz {quiz.id} ({quiz.title}), ended {quiz.scheduled_end_time}")
+                continue
+            students = archive.archive_quiz(quiz)
+            self.stdout.write(f"Archived quiz {quiz.id} ({quiz.title}) for {students} students")
@@ -0,0 +1,143 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from authentication.tokens import LMSRefreshToken
+
+ENDPOINTS = {
+    'quizzes': ('quiz:student_quizzes', 'quiz:async_student_quizzes'),
+    'questions': ('quiz:quiz_questions', 'quiz:async_quiz_questions'),
+    'performance': ('quiz:student_performance', 'quiz:async_student_performance'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare how many concurrent requests one process serves through the WSGI '
+            'views (a fixed pool of worker threads) and the async views (one event loop)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--roll-no', required=True,
+                            help='Existing active student to send the requests as')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='quizzes')
+        parser.add_argument('--quiz-id', type=int,
+                            help='Quiz to read questions for, with --endpoint questions')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests to send on each path')
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Requests kept in flight at once')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Worker threads of the WSGI process being modelled')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header to send; must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        student = get_user_model().objects.filter(roll_no=options['roll_no'], is_student=True).first()
+        if student is None:
+            raise CommandError(f"No student with roll number {options['roll_no']}")
+        if options['endpoint'] == 'questions' and not options['quiz_id']:
+            raise CommandError('--quiz-id is required with --endpoint questions')
+
+        args = [options['quiz_id']] if options['endpoint'] == 'questions' else []
+        sync_name, async_name = ENDPOINTS[options['endpoint']]
+        headers = {'Authorization': f'Bearer {LMSRefreshToken.for_user(student).access_token}'}
+
+        wsgi = self._run_wsgi(reverse(sync_name, args=args), headers, options)
+        self._report(f"WSGI, {options['threads']} threads", *wsgi, min(options['threads'], options['concurrency']))
+        asgi = asyncio.run(self._run_asgi(reverse(async_name, args=args), headers, options))
+        self._report('ASGI, 1 event loop', *asgi)
+
+    def _run_wsgi(self, url, headers, options):
+        from backend.wsgi import application
+
+        environ = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+        environ['PATH_INFO'] = url
+        environ['HTTP_HOST'] = options['host']
+        setup_testing_defaults(environ)
+
+        def request():
+            started = time.perf_counter()
+            statuses = []
+            body = b''.join(application(dict(environ, **{'wsgi.input': BytesIO()}),
+                                        lambda status, headers, *exc: statuses.append(status)))
+            self._check(int(statuses[0].split()[0]), body)
+            return time.perf_counter() - started
+
+        def worker(count):
+            try:
+                return [request() for _ in range(count)]
+            finally:
+                connections.close_all()
+
+        # A WSGI process only ever has as many requests in flight as it has threads
+        threads = min(options['threads'], options['concurrency'])
+        counts = [options['requests'] // threads + (i < options['requests'] % threads)
+                  for i in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = [t for batch in pool.map(worker, counts) for t in batch]
+        return latencies, time.perf_counter() - started
+
+    async def _run_asgi(self, url, headers, options):
+        from backend.asgi import application
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+            'query_string': b'', 'root_path': '', 'client': ('127.0.0.1', 0),
+            'server': (options['host'], 80),
+            'headers': [(b'host', options['host'].encode())] + [
+                (name.lower().encode(), value.encode()) for name, value in headers.items()],
+        }
+        slots = asyncio.Semaphore(options['concurrency'])
+        in_flight = peak = 0
+
+        async def request():
+            nonlocal in_flight, peak
+            messages = []
+            body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                if body:
+                    return body.pop()
+                # The client never disconnects; Django cancels this wait when the response is sent
+                await asyncio.Future()
+
+            async def send(message):
+                messages.append(message)
+
+            async with slots:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                started = time.perf_counter()
+                try:
+                    await application(dict(scope), receive, send)
+                finally:
+                    in_flight -= 1
+                self._check(messages[0]['status'],
+                            b''.join(m.get('body', b'') for m in messages[1:]))
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return latencies, time.perf_counter() - started, peak
+
+    def _check(self, status_code, body):
+        if status_code != 200:
+            raise CommandError(f"Request failed with {status_code}: {body[:200]!r}")
+
+    def _report(self, label, latencies, elapsed, peak):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+        self.stdout.write(
+            f"{label}: {len(latencies)} requests in {elapsed:.2f}s "
+            f"({len(latencies) / elapsed:.1f}/s), {peak} in flight at peak, "
+            f"p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms"
+        )
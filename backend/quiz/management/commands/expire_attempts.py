@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend import cache_checks
+from quiz import attempts
+
+
+class Command(BaseCommand):
+    help = 'Finalise timed quiz attempts as their deadlines pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Finalise what is already due and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Maximum seconds to sleep before looking for new attempts')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Maximum number of attempts finalised per transaction')
+
+    def handle(self, *args, **options):
+        # Expired attempts are graded on their autosaved drafts, which only a
+        # shared cache lets this process see
+        cache_checks.require_shared_cache('expire_attempts')
+        scheduler = attempts.DeadlineScheduler()
+        while True:
+            finalized = attempts.expire_due(scheduler, batch_size=options['batch_size'])
+            if finalized:
+                self.stdout.write(
+                    f"Finalised {finalized} expired attempts ({len(scheduler)} still open)"
+                )
+            if options['once']:
+                return
+
+            # Sleep until the next deadline, but wake up regularly for new attempts
+            sleep_for = options['interval']
+            next_due = scheduler.next_due()
+            if next_due is not None:
+                sleep_for = min(sleep_for, max(0, (next_due - timezone.now()).total_seconds()))
+            time.sleep(sleep_for)
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quiz import duplicates
+
+
+class Command(BaseCommand):
+    help = 'Index every bank question for near-duplicate detection and flag the duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of questions indexed per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        done, flagged = duplicates.scan(batch_size=options['batch_size'], progress=self.report)
+        self.stdout.write(
+            f"Indexed {done} bank questions, flagged {flagged} as near-duplicates, "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def report(self, done, flagged):
+        self.stdout.write(f"  {done} indexed, {flagged} flagged")
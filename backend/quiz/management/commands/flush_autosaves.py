@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import cache_checks
+from quiz import autosave
+
+
+class Command(BaseCommand):
+    help = 'Write buffered draft answers back to QuizAssignment in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Flush what is buffered and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds between flushes')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Maximum number of drafts written per UPDATE')
+
+    def handle(self, *args, **options):
+        cache_checks.require_shared_cache('flush_autosaves')
+        while True:
+            written = autosave.flush(batch_size=options['batch_size'])
+            if written:
+                self.stdout.write(f"Flushed {written} draft answers")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+import time
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import User
+from backend import cache_checks
+from quiz import importers
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Bulk import questions from a CSV, JSON Lines or Moodle XML file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=importers.FORMATS,
+                            help='File format; taken from the extension by default')
+        parser.add_argument('--images', help='Zip archive holding the images the questions name')
+        parser.add_argument('--roll-no', required=True, help='Faculty member the questions are created by')
+        parser.add_argument('--quiz-id', type=int, help='Add the questions to this quiz instead of the bank')
+        parser.add_argument('--topic', help='Topic for rows that do not give one')
+        parser.add_argument('--difficulty', help='Difficulty for rows that do not give one')
+        parser.add_argument('--batch-size', type=int, default=importers.BATCH_SIZE,
+                            help='Questions inserted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Validate without writing anything')
+
+    def handle(self, *args, **options):
+        cache_checks.require_shared_cache('import_questions')
+        try:
+            user = User.objects.get(roll_no=options['roll_no'], is_faculty=True)
+        except User.DoesNotExist:
+            raise CommandError(f"No faculty member with roll number {options['roll_no']}")
+        quiz = None
+        if options['quiz_id']:
+            quiz = Quiz.objects.filter(id=options['quiz_id']).first()
+            if quiz is None:
+                raise CommandError(f"Quiz {options['quiz_id']} not found")
+        file_format = options['format'] or importers.detect_format(options['path'])
+        if file_format not in importers.FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}; pass --format")
+
+        defaults = {key: options[key] for key in ('topic', 'difficulty') if options[key]}
+        started = time.perf_counter()
+        images = open(options['images'], 'rb') if options['images'] else None
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importers.import_questions(
+                    stream, file_format, user, quiz=quiz, images=images,
+                    batch_size=options['batch_size'], dry_run=options['dry_run'], defaults=defaults)
+        except zipfile.BadZipFile:
+            raise CommandError(f"{options['images']} is not a zip archive")
+        finally:
+            if images is not None:
+                images.close()
+
+        for error in report.errors:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            f"{verb} {report.validated} questions, rejected {report.failed}, "
+            f"flagged {report.duplicates} as near-duplicates, "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max
+from django.utils import timezone
+
+from quiz import partitions
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Create, list and archive the per-quiz table partitions (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['create', 'list', 'archive'])
+        parser.add_argument('--ahead', type=int, default=2,
+                            help='Partitions to create beyond the newest quiz')
+        parser.add_argument('--older-than-days', type=int, default=365,
+                            help='Archive ranges whose quizzes all ended this many days ago and were compacted by archive_quizzes')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop archivable partitions instead of moving them to the archive schema')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only show which partitions would be archived')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if not partitions.is_supported(connection):
+            raise CommandError(f'Partitioning is not supported on {connection.vendor}')
+
+        if options['action'] == 'create':
+            last = Quiz.all_objects.using(using).aggregate(last=Max('id'))['last'] or 0
+            created = partitions.ensure_partitions(last, ahead=options['ahead'], using=using)
+            self.stdout.write(f"Created {len(created)} partitions" + ''.join(f"\n  {name}" for name in created))
+
+        elif options['action'] == 'list':
+            for model in partitions.partitioned_models():
+                table = model._meta.db_table
+                self.stdout.write(table)
+                for name, start, end in partitions.list_partitions(connection, table):
+                    self.stdout.write(f"  {name}: quizzes {start} to {end - 1}")
+
+        else:
+            before = timezone.now() - timedelta(days=options['older_than_days'])
+            starts = partitions.archivable_ranges(before, using=using)
+            if options['dry_run']:
+                for start in starts:
+                    self.stdout.write(f"Would archive quizzes {start} to {start + partitions.PARTITION_SIZE - 1}")
+                return
+            handled = partitions.archive_partitions(starts, drop=options['drop'], using=using)
+            verb = 'Dropped' if options['drop'] else f'Moved to schema {partitions.ARCHIVE_SCHEMA}'
+            self.stdout.write(f"{verb}: {len(handled)} partitions" + ''.join(f"\n  {name}" for name in handled))
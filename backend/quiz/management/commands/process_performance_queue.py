@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import cache_checks
+from quiz import performance
+
+
+class Command(BaseCommand):
+    help = 'Recompute stale StudentPerformance rows in coalesced, per-quiz batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Drain what is pending and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Maximum number of quizzes recomputed per pass')
+        parser.add_argument('--debounce', type=float, default=None,
+                            help='Seconds a row must be quiet before it is recomputed')
+
+    def handle(self, *args, **options):
+        cache_checks.require_shared_cache('process_performance_queue')
+        while True:
+            quizzes, rows = performance.drain(
+                batch_size=options['batch_size'],
+                debounce=options['debounce']
+            )
+            if quizzes:
+                self.stdout.write(
+                    f"Recomputed {rows} performance rows across {quizzes} quizzes "
+                    f"({performance.pending_count()} still pending)"
+                )
+            if options['once']:
+                if quizzes < options['batch_size']:
+                    return
+                continue
+            if quizzes < options['batch_size']:
+                time.sleep(options['interval'])
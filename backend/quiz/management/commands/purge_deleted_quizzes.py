@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import cache_checks
+from quiz import purge
+
+
+class Command(BaseCommand):
+    help = 'Remove deleted quizzes and their rows in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Purge what is already deleted and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds to sleep when nothing is waiting')
+        parser.add_argument('--batch-size', type=int, default=purge.BATCH_SIZE,
+                            help='Maximum number of rows deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        cache_checks.require_shared_cache('purge_deleted_quizzes')
+        while True:
+            quizzes = list(purge.pending())
+            for quiz in quizzes:
+                self.stdout.write(f"Purging quiz {quiz.id} ({quiz.title}), deleted {quiz.deleted_at}")
+                deleted = purge.purge_quiz(
+                    quiz,
+                    batch_size=options['batch_size'],
+                    pause=options['pause'],
+                    progress=self.report
+                )
+                self.stdout.write(f"Purged quiz {quiz.id}: {sum(deleted.values())} rows")
+            if options['once']:
+                return
+            if not quizzes:
+                time.sleep(options['interval'])
+
+    def report(self, model, deleted):
+        self.stdout.write(f"  {model.__name__}: {deleted} rows deleted")
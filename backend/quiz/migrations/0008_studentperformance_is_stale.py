@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0007_add_scheduling_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentperformance",
+            name="is_stale",
+            field=models.BooleanField(
+                default=True,
+                help_text="Score, rank or percentile must be recomputed before being served",
+            ),
+        ),
+    ]
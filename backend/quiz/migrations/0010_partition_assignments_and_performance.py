@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import Max
+
+from quiz import partitions
+
+PARTITIONED = ("QuizAssignment", "StudentPerformance")
+
+
+def last_quiz_id(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    alias = schema_editor.connection.alias
+    return Quiz.objects.using(alias).aggregate(last=Max("id"))["last"] or 0
+
+
+def partition(apps, schema_editor):
+    if not partitions.is_supported(schema_editor.connection):
+        return
+    last = last_quiz_id(apps, schema_editor)
+    for name in PARTITIONED:
+        partitions.rebuild_table(
+            schema_editor, apps.get_model("quiz", name), partitioned=True, last_quiz_id=last
+        )
+
+
+def unpartition(apps, schema_editor):
+    if not partitions.is_supported(schema_editor.connection):
+        return
+    for name in PARTITIONED:
+        partitions.rebuild_table(schema_editor, apps.get_model("quiz", name), partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0009_quizattempt"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0010_partition_assignments_and_performance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quiz",
+            name="archived_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the assignments were compacted into QuizArchive records",
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="QuizArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("question_count", models.PositiveIntegerField()),
+                ("completed_count", models.PositiveIntegerField()),
+                ("answers", models.BinaryField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "quiz",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archives",
+                        to="quiz.quiz",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["student", "quiz"],
+                        name="quiz_quizar_student_fa9606_idx",
+                    )
+                ],
+                "unique_together": {("quiz", "student")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0011_quizarchive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quiz",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the quiz was deleted; its rows are purged in the background",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+INDEX_NAME = "quiz_question_search_idx"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Same expression as quiz.search.DOCUMENT, so searches can use the index
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON quiz_question USING gin "
+        "((to_tsvector('english', coalesce(text, '') || ' ' || coalesce(topic, ''))))"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0013_quizquota"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,11 +1,22 @@
-from django.db import models
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connections, models, router
 from django.utils import timezone
 from authentication.models import User
-from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.db.models.functions import Rank, PercentRank
+from . import duplicates, partitions, versions
+
+logger = logging.getLogger(__name__)
 
 # Create your models here.
 
+# Slack allowed after an attempt's deadline for answers already in flight
+ATTEMPT_GRACE = timedelta(seconds=getattr(settings, 'QUIZ_ATTEMPT_GRACE_SECONDS', 10))
+
 class Question(models.Model):
     DIFFICULTY_CHOICES = [
         ('easy', 'Easy'),
@@ -44,14 +55,10 @@ class Question(models.Model):
     def calculate_score(self, student_answer):
         """Calculate score for a given student answer"""
         if not student_answer:
-            print(f"Empty student answer for question {self.id}")
+            logger.debug(f"Empty student answer for question {self.id}")
             return 0
 
         try:
-            print(f"\nDebug - Question {self.id} ({self.type}):")
-            print(f"Student answer: {student_answer} (type: {type(student_answer)})")
-            print(f"Correct answer: {self.correct_answer} (type: {type(self.correct_answer)})")
-
             if self.type == 'mcq':
                 # For MCQ, compare the selected option
                 if isinstance(student_answer, str):
@@ -60,14 +67,10 @@ class Question(models.Model):
                     correct_answer = [self.correct_answer]
                 else:
                     correct_answer = self.correct_answer or []
-                
-                print(f"Processed student answer: {student_answer}")
-                print(f"Processed correct answer: {correct_answer}")
-                
+
                 # Check if all correct answers are in student's answers
                 is_correct = all(ans in student_answer for ans in correct_answer)
-                print(f"Is correct: {is_correct}")
-                
+
                 if is_correct:
                     return self.max_score
                 return 0
@@ -81,9 +84,7 @@ class Question(models.Model):
                     correct_ans = str(self.correct_answer[0]).lower() if self.correct_answer else ""
                 else:
                     correct_ans = str(self.correct_answer).lower()
-                
-                print(f"Comparing True/False: {student_ans} == {correct_ans}")
-                
+
                 if student_ans == correct_ans:
                     return self.max_score
                 return 0
@@ -97,21 +98,49 @@ class Question(models.Model):
                     correct_ans = str(self.correct_answer[0]).lower().strip() if self.correct_answer else ""
                 else:
                     correct_ans = str(self.correct_answer).lower().strip()
-                
-                print(f"Comparing Short Answer: {student_ans} == {correct_ans}")
-                
+
                 if student_ans == correct_ans:
                     return self.max_score
                 return 0
 
         except Exception as e:
-            print(f"Error calculating score: {e}")
+            logger.error(f"Error calculating score for question {self.id}: {str(e)}")
             return 0
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember whether the row has duplicate-detection rows to clean up
+        if 'quiz_id' in instance.__dict__:
+            instance._loaded_in_bank = instance.quiz_id is None
+        return instance
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        versions.bump(versions.questions_key())
         if self.quiz:
             self.quiz.calculate_total_score()
+            if getattr(self, '_loaded_in_bank', False):
+                # Moved out of the bank: drop its signature and bands
+                versions.bump(versions.bank_key())
+                duplicates.index_questions([self])
+        else:
+            versions.bump(versions.bank_key())
+            duplicates.index_questions([self])
+        self._loaded_in_bank = self.quiz_id is None
+
+    def delete(self, *args, **kwargs):
+        in_bank = self.quiz_id is None
+        result = super().delete(*args, **kwargs)
+        versions.bump(versions.questions_key())
+        if in_bank:
+            versions.bump(versions.bank_key())
+        return result
+
+class LiveQuizManager(models.Manager):
+    """Quizzes that have not been deleted"""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 class Quiz(models.Model):
     DIFFICULTY_CHOICES = [
@@ -152,6 +181,20 @@ class Quiz(models.Model):
         default=False,
         help_text='Whether this quiz is scheduled or available immediately'
     )
+    archived_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the assignments were compacted into QuizArchive records'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the quiz was deleted; its rows are purged in the background'
+    )
+
+    # Deleted quizzes are hidden everywhere until purge_deleted_quizzes removes them
+    objects = LiveQuizManager()
+    all_objects = models.Manager()
 
     class Meta:
         app_label = 'quiz'
@@ -164,10 +207,43 @@ class Quiz(models.Model):
     def __str__(self):
         return f"{self.title} - {self.course_id}"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # Normally created ahead by manage_partitions; this covers a lapse
+            partitions.ensure_partition_for(self.id, using=self._state.db)
+        versions.bump(
+            versions.quiz_key(self.id),
+            versions.faculty_key(self.created_by_id),
+            versions.catalog_key(),
+        )
+
+    def delete(self, *args, **kwargs):
+        quiz_id, created_by_id = self.id, self.created_by_id
+        result = super().delete(*args, **kwargs)
+        versions.bump(
+            versions.quiz_key(quiz_id),
+            versions.faculty_key(created_by_id),
+            versions.catalog_key(),
+        )
+        return result
+
+    def mark_deleted(self):
+        """Hide the quiz now; purge_deleted_quizzes removes it and its rows later"""
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
     def calculate_total_score(self):
         """Calculate total possible score for this quiz"""
-        total = self.questions.aggregate(total=Sum('max_score'))['total']
-        self.total_score = total or 0
+        total = self.questions.aggregate(total=Sum('max_score'))['total'] or 0
+        # Each bank quota adds its count at the stratum's average question score
+        for quota in self.quotas.all():
+            average = Question.objects.filter(
+                quiz__isnull=True, topic=quota.topic, difficulty=quota.difficulty
+            ).aggregate(average=Avg('max_score'))['average'] or 0
+            total += quota.count * Decimal(average)
+        self.total_score = Decimal(total).quantize(Decimal('0.01'))
         self.save(update_fields=['total_score'])
         return self.total_score
 
@@ -189,21 +265,97 @@ class Quiz(models.Model):
             return 0  # Quiz has ended
         return (self.scheduled_end_time - now).total_seconds() / 60
 
-    def can_be_attempted(self, student):
+    def can_be_attempted(self, student, attempt=None):
         """Check if a student can attempt this quiz"""
         if not self.is_available():
             return False
         
-        # Check if student has already completed the quiz
-        assignments = QuizAssignment.objects.filter(
-            quiz=self,
-            student=student
+        # An existing session decides on its own; pass it in to skip the lookup
+        if attempt is None:
+            attempt = self.attempts.filter(student=student).first()
+        if attempt is not None:
+            return attempt.is_open()
+        
+        return QuizAssignment.objects.filter(quiz=self, student=student).exists()
+
+class QuizQuota(models.Model):
+    """Questions each student draws from the question bank for one (topic, difficulty) stratum"""
+    quiz = models.ForeignKey(Quiz, related_name='quotas', on_delete=models.CASCADE)
+    topic = models.CharField(max_length=100)
+    difficulty = models.CharField(max_length=10, choices=Question.DIFFICULTY_CHOICES)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        app_label = 'quiz'
+        unique_together = ('quiz', 'topic', 'difficulty')
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.count} {self.difficulty} from {self.topic}"
+
+class QuizAttempt(models.Model):
+    """A student's timed session on a quiz, started on first access"""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    started_at = models.DateTimeField(default=timezone.now)
+    deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When unsubmitted answers are finalised; empty for untimed quizzes'
+    )
+    finalized_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'quiz'
+        unique_together = ('quiz', 'student')
+        indexes = [
+            models.Index(fields=['finalized_at', 'deadline']),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.student.roll_no} - started {self.started_at}"
+
+    @classmethod
+    def start(cls, quiz, student):
+        """Return the student's session for the quiz, starting the clock if needed"""
+        now = timezone.now()
+        deadline = None
+        if quiz.time_limit_minutes:
+            deadline = now + timedelta(minutes=quiz.time_limit_minutes)
+        if quiz.is_scheduled and quiz.scheduled_end_time:
+            deadline = min(deadline, quiz.scheduled_end_time) if deadline else quiz.scheduled_end_time
+        attempt, _ = cls.objects.get_or_create(
+            quiz=quiz,
+            student=student,
+            defaults={'started_at': now, 'deadline': deadline}
         )
-        if not assignments.exists():
+        return attempt
+
+    def is_open(self, now=None):
+        """Whether answers are still accepted for this session"""
+        if self.finalized_at is not None:
             return False
-            
-        # Check if all questions are completed
-        return not assignments.filter(completed=False).exists()
+        if self.deadline is None:
+            return True
+        return (now or timezone.now()) <= self.deadline + ATTEMPT_GRACE
+
+    def time_remaining_seconds(self):
+        if self.finalized_at is not None:
+            return 0
+        if self.deadline is None:
+            return None
+        return max(0, (self.deadline - timezone.now()).total_seconds())
+
+    def time_taken_minutes(self):
+        end = self.finalized_at or timezone.now()
+        if self.deadline is not None:
+            end = min(end, self.deadline)
+        return max(0, (end - self.started_at).total_seconds() / 60)
+
+    def finish(self):
+        """Close the session once every answer is in"""
+        if self.finalized_at is None:
+            self.finalized_at = timezone.now()
+            self.save(update_fields=['finalized_at'])
 
 class QuizAssignment(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
@@ -226,35 +378,45 @@ class QuizAssignment(models.Model):
     def __str__(self):
         return f"{self.quiz.title} - {self.student.roll_no} - Q{self.question.id}"
 
-    def save(self, *args, **kwargs):
-        print(f"\nDebug - Saving QuizAssignment:")
-        print(f"Question ID: {self.question.id}")
-        print(f"Student Answer: {self.student_answer}")
-        print(f"Current Score: {self.score}")
-        print(f"Is Graded: {self.is_graded}")
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row already contributes to the student's total
+        loaded = instance.__dict__
+        if all(name in loaded for name in ('completed', 'is_graded', 'score')):
+            instance._loaded_contribution = instance.score_contribution()
+        return instance
+
+    def score_contribution(self):
+        """Score this assignment adds to the student's performance total"""
+        if not (self.completed and self.is_graded) or self.score is None:
+            return Decimal('0')
+        return Decimal(str(self.score))
 
+    def save(self, *args, **kwargs):
         # Calculate score if not already graded
         if self.student_answer and not self.is_graded:
-            print("Calculating score...")
             self.score = self.question.calculate_score(self.student_answer)
-            print(f"Calculated Score: {self.score}")
             self.is_graded = True
+            logger.debug(f"Graded assignment {self.pk} (question {self.question_id}): {self.score}")
 
         super().save(*args, **kwargs)
-        
-        # Create or update StudentPerformance record
-        performance, created = StudentPerformance.objects.get_or_create(
-            student=self.student,
-            quiz=self.quiz,
-            defaults={
-                'total_score': 0,
-                'max_possible_score': self.quiz.total_score or 0
-            }
+        versions.bump(
+            versions.quiz_key(self.quiz_id),
+            versions.student_key(self.student_id),
+            versions.faculty_key(self.quiz.created_by_id),
         )
         
-        if self.is_graded:
-            print("Updating performance...")
-            performance.update_performance()
+        # Apply the score change in one upsert and queue the rank recomputation;
+        # repeated saves for the same student collapse into one pass
+        contribution = self.score_contribution()
+        StudentPerformance.record_submission(
+            self.student_id,
+            self.quiz_id,
+            score_delta=contribution - getattr(self, '_loaded_contribution', Decimal('0')),
+            max_possible_score=self.quiz.total_score or 0
+        )
+        self._loaded_contribution = contribution
 
 class StudentPerformance(models.Model):
     """Tracks overall student performance across all quizzes"""
@@ -264,6 +426,10 @@ class StudentPerformance(models.Model):
     max_possible_score = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     percentile = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     rank = models.IntegerField(null=True, blank=True)
+    is_stale = models.BooleanField(
+        default=True,
+        help_text='Score, rank or percentile must be recomputed before being served'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -279,9 +445,93 @@ class StudentPerformance(models.Model):
     def __str__(self):
         return f"{self.quiz.title} - {self.student.roll_no} - Score: {self.total_score}/{self.max_possible_score}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        versions.bump(versions.quiz_key(self.quiz_id), versions.student_key(self.student_id))
+
+    @classmethod
+    def record_submission(cls, student_id, quiz_id, score_delta=0, max_possible_score=0):
+        """
+        Add ``score_delta`` to the (student, quiz) row and flag it for the
+        recomputation queue, creating the row if needed, in one statement.
+
+        Equivalent to ``update(total_score=F('total_score') + score_delta)``
+        with an insert fallback, but done as ``INSERT ... ON CONFLICT DO
+        UPDATE`` so concurrent submissions cannot race on the unique
+        constraint or lose an update. bulk_create(update_conflicts=True) can
+        only copy the excluded values, hence the hand-written statement.
+        """
+        opts = cls._meta
+        connection = connections[router.db_for_write(cls)]
+        ops = connection.ops
+        qn = ops.quote_name
+
+        def column(name):
+            return qn(opts.get_field(name).column)
+
+        total_field = opts.get_field('total_score')
+        now = ops.adapt_datetimefield_value(timezone.now())
+
+        sql = (
+            f"INSERT INTO {qn(opts.db_table)} "
+            f"({column('student')}, {column('quiz')}, {column('total_score')}, "
+            f"{column('max_possible_score')}, {column('is_stale')}, "
+            f"{column('created_at')}, {column('updated_at')}) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({column('student')}, {column('quiz')}) DO UPDATE SET "
+            f"{column('total_score')} = {qn(opts.db_table)}.{column('total_score')} "
+            f"+ EXCLUDED.{column('total_score')}, "
+            f"{column('is_stale')} = EXCLUDED.{column('is_stale')}, "
+            f"{column('updated_at')} = EXCLUDED.{column('updated_at')}"
+        )
+        params = [
+            opts.get_field('student').get_db_prep_value(student_id, connection),
+            quiz_id,
+            ops.adapt_decimalfield_value(
+                Decimal(str(score_delta)), total_field.max_digits, total_field.decimal_places),
+            ops.adapt_decimalfield_value(
+                Decimal(str(max_possible_score)), total_field.max_digits, total_field.decimal_places),
+            True,
+            now,
+            now,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        if score_delta:
+            # Other students' rank and percentile depend on this score
+            cls.mark_stale(quiz_id, exclude_student_id=student_id)
+        versions.bump(versions.quiz_key(quiz_id), versions.student_key(student_id))
+
+    @classmethod
+    def mark_stale(cls, quiz_id, exclude_student_id=None):
+        """Flag the quiz's performance rows whose rank or percentile may have moved"""
+        stale = cls.objects.filter(quiz_id=quiz_id, is_stale=False)
+        if exclude_student_id is not None:
+            stale = stale.exclude(student_id=exclude_student_id)
+        stale.update(is_stale=True)
+
+    @classmethod
+    def standings_for_student(cls, student):
+        """
+        All of a student's performance rows, annotated with live rank and
+        percentile computed in the same query
+        """
+        def peer_count(**filters):
+            peers = cls.objects.filter(quiz=OuterRef('quiz'), **filters)
+            counted = peers.values('quiz').annotate(count=Count('pk')).values('count')
+            return Coalesce(Subquery(counted), 0)
+
+        return cls.objects.filter(student=student).annotate(
+            scores_above=peer_count(total_score__gt=OuterRef('total_score')),
+            scores_below=peer_count(total_score__lt=OuterRef('total_score')),
+            total_students=peer_count(),
+        )
+
     def update_performance(self):
         """Update performance metrics based on quiz assignments"""
         try:
+            previous_score, previously_ranked = self.total_score, self.rank is not None
+
             # Get all completed assignments for this student and quiz
             assignments = QuizAssignment.objects.filter(
                 student=self.student,
@@ -289,9 +539,13 @@ class StudentPerformance(models.Model):
                 completed=True
             )
             
-            # Calculate total score from graded assignments
-            total_score = assignments.filter(is_graded=True).aggregate(
-                total=Sum('score'))['total'] or 0
+            # Calculate total score from graded assignments; an archived
+            # quiz has none left and keeps the total it was archived with
+            if self.quiz.archived_at is None:
+                total_score = assignments.filter(is_graded=True).aggregate(
+                    total=Sum('score'))['total'] or 0
+            else:
+                total_score = self.total_score
             
             # Always use quiz's total score
             max_score = self.quiz.total_score if self.quiz.total_score is not None else 0
@@ -318,10 +572,17 @@ class StudentPerformance(models.Model):
                 self.percentile = 100
                 self.rank = 1
             
+            self.is_stale = False
             self.save()
+
+            # Other students' rank and percentile depend on this score and
+            # on the row existing; a ranked row recomputed to the same total
+            # leaves them alone, so reads settle instead of re-flagging
+            if previous_score != self.total_score or not previously_ranked:
+                StudentPerformance.mark_stale(self.quiz_id, exclude_student_id=self.student_id)
             return True
         except Exception as e:
-            print(f"Error updating performance: {str(e)}")
+            logger.error(f"Error updating performance: {str(e)}")
             return False
 
 class QuizResults(models.Model):
@@ -353,8 +614,11 @@ class QuizResults(models.Model):
         """Generate final results for all students who attempted the quiz"""
         if quiz.is_available():
             return  # Don't generate results if quiz is still active
+        if quiz.archived_at:
+            return  # Results were frozen when the quiz was archived
             
-        # Get all performances
+        # Get all performances, from the primary: the ranks written below must
+        # not come from a lagging replica
         performances = StudentPerformance.objects.filter(quiz=quiz)
         
         # Calculate ranks and percentiles
@@ -362,8 +626,20 @@ class QuizResults(models.Model):
         if total_students == 0:
             return
             
+        # Sessions and last submissions for every student, fetched once
+        attempts = {
+            attempt.student_id: attempt
+            for attempt in QuizAttempt.objects.filter(quiz=quiz)
+        }
+        last_submissions = dict(
+            QuizAssignment.objects.filter(quiz=quiz, completed=True)
+            .values('student')
+            .annotate(last=Max('submitted_at'))
+            .values_list('student', 'last')
+        )
+        
         # Order by score and update ranks
-        performances = performances.order_by('-total_score')
+        performances = list(performances.order_by('-total_score'))
         for i, perf in enumerate(performances):
             # Calculate scores below (number of students with lower scores)
             scores_below = total_students - (i + 1)
@@ -371,27 +647,81 @@ class QuizResults(models.Model):
             # Calculate percentile
             percentile = (scores_below / (total_students - 1)) * 100 if total_students > 1 else 100.0
             
-            # Get time taken
-            last_assignment = QuizAssignment.objects.filter(
-                quiz=quiz,
-                student=perf.student,
-                completed=True
-            ).order_by('-submitted_at').first()
+            # Time taken comes from the student's session when there is one
+            attempt = attempts.get(perf.student_id)
+            submitted_at = last_submissions.get(perf.student_id)
             
             time_taken = None
-            if last_assignment:
-                time_taken = (last_assignment.submitted_at - quiz.scheduled_start_time).total_seconds() / 60
+            if attempt:
+                time_taken = attempt.time_taken_minutes()
+            elif submitted_at and quiz.scheduled_start_time:
+                time_taken = (submitted_at - quiz.scheduled_start_time).total_seconds() / 60
             
             # Create or update result
             cls.objects.update_or_create(
                 quiz=quiz,
-                student=perf.student,
+                student_id=perf.student_id,
                 defaults={
                     'total_score': perf.total_score,
                     'max_possible_score': perf.max_possible_score,
                     'percentile': percentile,
                     'rank': i + 1,
                     'time_taken_minutes': time_taken or 0,
-                    'submitted_at': last_assignment.submitted_at if last_assignment else quiz.scheduled_end_time
+                    'submitted_at': submitted_at or quiz.scheduled_end_time
                 }
             )
+
+class QuizArchive(models.Model):
+    """
+    A closed quiz's assignments for one student, compacted into one row.
+
+    ``answers`` is zlib-compressed JSON with one entry per question; see
+    quiz/archive.py for the layout and for reading it back.
+    """
+    quiz = models.ForeignKey(Quiz, related_name='archives', on_delete=models.CASCADE)
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    question_count = models.PositiveIntegerField()
+    completed_count = models.PositiveIntegerField()
+    answers = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'quiz'
+        unique_together = ('quiz', 'student')
+        indexes = [
+            models.Index(fields=['student', 'quiz']),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.student.roll_no} - {self.completed_count}/{self.question_count} archived"
+
+class QuestionSignature(models.Model):
+    """
+    MinHash signature of a bank question, and the earlier question it nearly
+    duplicates if any; see quiz/duplicates.py.
+    """
+    question = models.OneToOneField(Question, primary_key=True, related_name='signature', on_delete=models.CASCADE)
+    minhash = models.BinaryField()
+    duplicate_of = models.ForeignKey(Question, null=True, blank=True, related_name='+', on_delete=models.SET_NULL)
+    similarity = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'quiz'
+
+    def __str__(self):
+        return f"Question {self.question_id} duplicates {self.duplicate_of_id} ({self.similarity})"
+
+class QuestionBand(models.Model):
+    """One LSH band of a question's signature; questions sharing a (band, bucket) are duplicate candidates"""
+    question = models.ForeignKey(Question, related_name='bands', on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        app_label = 'quiz'
+        indexes = [
+            models.Index(fields=['band', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"Question {self.question_id} band {self.band}"
@@ -0,0 +1,240 @@
+"""
+Range partitioning of the per-quiz tables on PostgreSQL.
+
+QuizAssignment and StudentPerformance are partitioned by ``quiz_id`` in
+ranges of ``QUIZ_PARTITION_SIZE`` quizzes, so the rows, indexes and vacuum
+work of the quizzes being taken now live in the newest partitions and stay
+small. Quiz ids only grow, so old ranges stop changing once their quizzes
+have ended. Their QuizAssignment partitions can then be detached into the
+``archive`` schema, once every quiz in them has been compacted into
+QuizArchive rows. StudentPerformance partitions stay attached: the archive
+keeps only the answers, and totals and ranks are still served from them.
+
+Partitions are created ahead of time by ``manage.py manage_partitions
+create``; ``Quiz.save()`` also creates a missing one as a safety net. There
+is no default partition, which keeps detaching cheap. On other databases
+every function here is a no-op.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Exists, Max, OuterRef, Q
+
+PARTITION_SIZE = getattr(settings, 'QUIZ_PARTITION_SIZE', 200)
+ARCHIVE_SCHEMA = 'archive'
+PARTITION_KEY = 'quiz_id'
+
+# Upper bound of the quiz ids known to have a partition, per database alias
+_covered = {}
+
+
+def partitioned_models():
+    from .models import QuizAssignment, StudentPerformance
+    return [QuizAssignment, StudentPerformance]
+
+
+def archived_models():
+    """The partitioned models whose old ranges are detached by archive_partitions"""
+    from .models import QuizAssignment
+    return [QuizAssignment]
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def range_start(quiz_id):
+    return quiz_id // PARTITION_SIZE * PARTITION_SIZE
+
+
+def partition_name(table, start):
+    return f'{table}_q{start}'
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind = 'p' FROM pg_class c "
+            "WHERE c.oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def list_partitions(connection, table):
+    """(name, start, end) of the attached partitions of ``table``, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)", [table])
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        # FOR VALUES FROM ('0') TO ('200')
+        start, end = [part.split(')')[0].strip("' ") for part in bound.split('(')[1:3]]
+        partitions.append((name, int(start), int(end)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(connection, table, start):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {qn(partition_name(table, start))} "
+            f"PARTITION OF {qn(table)} FOR VALUES FROM ({int(start)}) TO ({int(start + PARTITION_SIZE)})"
+        )
+
+
+def ensure_partitions(up_to_quiz_id, ahead=0, using=None):
+    """
+    Create every missing partition up to the range of ``up_to_quiz_id`` plus
+    ``ahead`` more ranges. Returns the names of the partitions created.
+    """
+    using = using or router.db_for_write(partitioned_models()[0])
+    connection = connections[using]
+    if not is_supported(connection):
+        return []
+
+    last = range_start(up_to_quiz_id) + ahead * PARTITION_SIZE
+    created = []
+    for model in partitioned_models():
+        table = model._meta.db_table
+        if not is_partitioned(connection, table):
+            continue
+        existing = [start for _, start, _ in list_partitions(connection, table)]
+        # Quiz ids only grow: extend past the newest partition, never
+        # recreating ranges that were archived
+        first = existing[-1] + PARTITION_SIZE if existing else range_start(up_to_quiz_id)
+        for start in range(first, last + 1, PARTITION_SIZE):
+            create_partition(connection, table, start)
+            created.append(partition_name(table, start))
+    _covered[using] = max(_covered.get(using, 0), last + PARTITION_SIZE)
+    return created
+
+
+def ensure_partition_for(quiz_id, using=DEFAULT_DB_ALIAS):
+    """Make sure a new quiz's rows have a partition; free once it is known to exist"""
+    if quiz_id < _covered.get(using, 0) or not is_supported(connections[using]):
+        return
+    ensure_partitions(quiz_id, using=using)
+
+
+def uncompacted_ranges(using=DEFAULT_DB_ALIAS):
+    """
+    Starts of the ranges holding assignment rows of quizzes that were never
+    compacted into QuizArchive rows. Detaching one would take those answers
+    out of every results page.
+    """
+    from .models import Quiz, QuizAssignment
+
+    assigned = QuizAssignment.objects.using(using).filter(quiz=OuterRef('pk'))
+    quiz_ids = Quiz.all_objects.using(using).filter(
+        Exists(assigned), archived_at__isnull=True).values_list('id', flat=True)
+    return {range_start(quiz_id) for quiz_id in quiz_ids}
+
+
+def archivable_ranges(before, using=DEFAULT_DB_ALIAS):
+    """
+    Starts of the partition ranges whose quizzes were all created, have all
+    closed, before ``before`` and have all been compacted by
+    ``archive_quizzes``. The range new quizzes go into is never returned.
+    """
+    from .models import Quiz
+
+    connection = connections[using]
+    table = partitioned_models()[0]._meta.db_table
+    if not is_supported(connection) or not is_partitioned(connection, table):
+        return []
+
+    # Deleted quizzes keep their rows until purged, so they count too
+    newest = range_start(Quiz.all_objects.using(using).aggregate(last=Max('id'))['last'] or 0)
+    recent = Quiz.all_objects.using(using).filter(
+        Q(created_at__gte=before) | Q(scheduled_end_time__gte=before)
+        | Q(is_scheduled=True, scheduled_end_time__isnull=True)
+    ).values_list('id', flat=True)
+    keep = {range_start(quiz_id) for quiz_id in recent} | {newest} | uncompacted_ranges(using)
+    return [start for _, start, _ in list_partitions(connection, table)
+            if start < newest and start not in keep]
+
+
+def archive_partitions(starts, drop=False, using=DEFAULT_DB_ALIAS):
+    """
+    Detach the partitions for the given range starts from the tables of
+    ``archived_models`` and move them into the archive schema, or drop them
+    with ``drop``.
+    Returns the names handled. Must run outside a transaction: detaching is
+    done CONCURRENTLY so open quizzes are never blocked.
+    """
+    connection = connections[using]
+    if not is_supported(connection) or not starts:
+        return []
+    qn = connection.ops.quote_name
+    handled = []
+    for model in archived_models():
+        table = model._meta.db_table
+        attached = {start: name for name, start, _ in list_partitions(connection, table)}
+        for start in starts:
+            name = attached.get(start)
+            if name is None:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)} CONCURRENTLY")
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                if drop:
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+                else:
+                    # Archived rows must not block deleting their quiz or student
+                    cursor.execute(
+                        "SELECT conname FROM pg_constraint "
+                        "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [name])
+                    for (constraint,) in cursor.fetchall():
+                        cursor.execute(f"ALTER TABLE {qn(name)} DROP CONSTRAINT {qn(constraint)}")
+                    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {qn(ARCHIVE_SCHEMA)}")
+                    cursor.execute(f"ALTER TABLE {qn(name)} SET SCHEMA {qn(ARCHIVE_SCHEMA)}")
+            handled.append(name)
+    return handled
+
+
+def rebuild_table(schema_editor, model, partitioned, last_quiz_id=0, ahead=2):
+    """
+    Recreate ``model``'s table, with its rows, either partitioned by quiz or
+    as a plain table. Used by the migration that introduces partitioning.
+    """
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    staging = f'{table}_rebuild'
+    execute = schema_editor.execute
+
+    partition_by = f" PARTITION BY RANGE ({qn(PARTITION_KEY)})" if partitioned else ""
+    execute(
+        f"CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING DEFAULTS "
+        f"INCLUDING CONSTRAINTS INCLUDING STORAGE){partition_by}"
+    )
+    execute(f"ALTER TABLE {qn(staging)} ALTER COLUMN id DROP DEFAULT")
+    if partitioned:
+        for start in range(0, range_start(last_quiz_id) + (ahead + 1) * PARTITION_SIZE, PARTITION_SIZE):
+            create_partition(connection, staging, start)
+            execute(f"ALTER TABLE {qn(partition_name(staging, start))} "
+                    f"RENAME TO {qn(partition_name(table, start))}")
+    execute(f"INSERT INTO {qn(staging)} SELECT * FROM {qn(table)}")
+    execute(f"DROP TABLE {qn(table)} CASCADE")
+    execute(f"ALTER TABLE {qn(staging)} RENAME TO {qn(table)}")
+
+    # Partitioned tables cannot have identity columns before PostgreSQL 17,
+    # so ids come from a sequence owned by the column, as with serial
+    sequence = f'{table}_id_seq'
+    execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id")
+    execute(f"SELECT setval('{sequence}', coalesce(max(id), 0) + 1, false) FROM {qn(table)}")
+    execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+
+    # A primary key on a partitioned table must include the partition key;
+    # ids still come from one sequence, so they stay unique
+    key = f"id, {qn(PARTITION_KEY)}" if partitioned else "id"
+    execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_pkey')} PRIMARY KEY ({key})")
+    for field in model._meta.local_concrete_fields:
+        if field.remote_field and field.db_constraint:
+            execute(schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+    schema_editor.alter_unique_together(model, [], model._meta.unique_together)
+    for sql in schema_editor._model_indexes_sql(model):
+        execute(sql)
+    _covered.clear()
@@ -0,0 +1,107 @@
+"""
+Background recomputation of StudentPerformance rows.
+
+Submissions only flag the (student, quiz) row as stale. The consumer below
+picks up flagged rows once they have been quiet for the debounce window and
+recomputes each quiz in two set-based statements: one for the dirty students'
+totals and one for the whole quiz's ranks and percentiles.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, FloatField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from . import versions
+from .models import Quiz, QuizAssignment, StudentPerformance
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = getattr(settings, 'PERFORMANCE_RECALC_DEBOUNCE_SECONDS', 2)
+
+
+def pending_count():
+    """Number of performance rows waiting to be recomputed"""
+    return StudentPerformance.objects.filter(is_stale=True).count()
+
+
+def _peer_count(quiz_id, **filters):
+    peers = StudentPerformance.objects.filter(quiz_id=quiz_id, **filters)
+    counted = peers.values('quiz').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counted), 0)
+
+
+def recompute_quiz(quiz_id, cutoff):
+    """Recompute every dirty row of one quiz, then re-rank the quiz. Returns rows refreshed."""
+    decimal = DecimalField(max_digits=8, decimal_places=2)
+    graded_total = QuizAssignment.objects.filter(
+        quiz_id=quiz_id,
+        student_id=OuterRef('student_id'),
+        completed=True,
+        is_graded=True
+    ).values('student_id').annotate(total=Sum('score')).values('total')
+    quiz_total = Quiz.objects.filter(pk=quiz_id).values('total_score')
+    # Archived quizzes have no assignments left; their totals are final
+    archived = Quiz.objects.filter(pk=quiz_id, archived_at__isnull=False)
+    graded_total = Case(
+        When(Exists(archived), then=F('total_score')),
+        default=Coalesce(Subquery(graded_total), Value(0), output_field=decimal),
+        output_field=decimal,
+    )
+
+    with transaction.atomic():
+        # Rows flagged again after the cutoff stay dirty for the next pass
+        refreshed = StudentPerformance.objects.filter(
+            quiz_id=quiz_id,
+            is_stale=True,
+            updated_at__lte=cutoff
+        ).update(
+            total_score=graded_total,
+            max_possible_score=Coalesce(Subquery(quiz_total), Value(0), output_field=decimal),
+            is_stale=False,
+        )
+        if not refreshed:
+            return 0
+
+        performances = StudentPerformance.objects.filter(quiz_id=quiz_id)
+        total_students = performances.count()
+        performances.update(
+            rank=_peer_count(quiz_id, total_score__gt=OuterRef('total_score')) + 1,
+            percentile=Cast(
+                _peer_count(quiz_id, total_score__lt=OuterRef('total_score')),
+                FloatField()
+            ) * 100.0 / total_students,
+        )
+
+    versions.bump(versions.quiz_key(quiz_id))
+    return refreshed
+
+
+def drain(batch_size=100, debounce=None):
+    """
+    Process up to ``batch_size`` quizzes with dirty rows that have been quiet
+    for ``debounce`` seconds. Returns (quizzes processed, rows refreshed).
+    """
+    if debounce is None:
+        debounce = DEBOUNCE_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=debounce)
+
+    quiz_ids = list(
+        StudentPerformance.objects.filter(is_stale=True, updated_at__lte=cutoff)
+        .order_by('quiz_id')
+        .values_list('quiz_id', flat=True)
+        .distinct()[:batch_size]
+    )
+
+    refreshed = 0
+    for quiz_id in quiz_ids:
+        try:
+            refreshed += recompute_quiz(quiz_id, cutoff)
+        except Exception as e:
+            logger.error(f"Error recomputing performance for quiz {quiz_id}: {str(e)}")
+    return len(quiz_ids), refreshed
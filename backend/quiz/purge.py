@@ -0,0 +1,75 @@
+"""
+Background removal of deleted quizzes.
+
+``delete_quiz`` only sets ``Quiz.deleted_at``, which hides the quiz at once.
+``purge_quiz`` then deletes its dependent rows table by table with plain
+``DELETE ... WHERE id IN (SELECT ... LIMIT n)`` statements, each committed
+on its own, so no lock is held for long and no rows are loaded into Python.
+The quiz row itself goes last, once nothing references it.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections, router
+
+from . import versions
+from .models import (
+    Question, Quiz, QuizArchive, QuizAssignment, QuizAttempt, QuizQuota, QuizResults, StudentPerformance
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'QUIZ_PURGE_BATCH_SIZE', 1000)
+
+# Children before parents: assignments reference questions
+DEPENDENTS = [QuizResults, StudentPerformance, QuizArchive, QuizAttempt, QuizAssignment, QuizQuota, Question]
+
+
+def pending():
+    """Deleted quizzes still waiting to be purged, oldest first"""
+    return Quiz.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at')
+
+
+def delete_batch(model, quiz_id, batch_size=BATCH_SIZE):
+    """Delete up to ``batch_size`` of the quiz's rows from ``model``'s table. Returns rows deleted."""
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+    quiz_column = qn(model._meta.get_field('quiz').column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {quiz_column} = %s AND {pk} IN ("
+            f"SELECT {pk} FROM {table} WHERE {quiz_column} = %s LIMIT %s)",
+            [quiz_id, quiz_id, batch_size]
+        )
+        return cursor.rowcount
+
+
+def purge_quiz(quiz, batch_size=BATCH_SIZE, pause=0, progress=None):
+    """
+    Delete a deleted quiz's rows in batches, then the quiz. ``pause`` seconds
+    are slept between batches to leave room for other traffic; ``progress``
+    is called with (model, rows deleted so far) after each batch. Returns
+    the total rows deleted per model name.
+    """
+    deleted = {}
+    for model in DEPENDENTS:
+        name = model.__name__
+        deleted[name] = 0
+        while True:
+            count = delete_batch(model, quiz.id, batch_size)
+            if not count:
+                break
+            deleted[name] += count
+            if progress:
+                progress(model, deleted[name])
+            if pause:
+                time.sleep(pause)
+
+    # Nothing references the quiz any more, so the collector has nothing to load
+    Quiz.all_objects.filter(pk=quiz.pk).delete()
+    versions.bump(versions.quiz_key(quiz.id), versions.faculty_key(quiz.created_by_id))
+    logger.info(f"Purged quiz {quiz.id}: {deleted}")
+    return deleted
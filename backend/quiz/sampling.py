@@ -0,0 +1,94 @@
+"""
+Stratified sampling of question papers from the question bank.
+
+Bank questions are the ones not attached to a quiz. The index below holds,
+per (topic, difficulty) stratum, a compact array of their ids, built from
+one ``values_list`` query and kept per process until the bank version
+changes. A paper is drawn by sampling positions in those arrays, so no
+``ORDER BY random()`` runs and no question rows are loaded; a few thousand
+papers take a few milliseconds.
+"""
+import random
+import threading
+from array import array
+from collections import defaultdict
+
+from . import versions
+from .models import Question
+
+# Redraws allowed when a paper repeats one another student already has
+MAX_REDRAWS = 5
+
+_lock = threading.Lock()
+_index = None
+
+
+class QuotaError(ValueError):
+    """A quota asks for more questions than its stratum holds"""
+
+
+class BankIndex:
+    """Question ids of the bank grouped by (topic, difficulty)"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        strata = defaultdict(lambda: array('q'))
+        for topic, difficulty, question_id in rows:
+            strata[(topic, difficulty)].append(question_id)
+        self.strata = dict(strata)
+
+    def size(self, topic, difficulty):
+        return len(self.strata.get((topic, difficulty), ()))
+
+    def check(self, quotas):
+        """Raise QuotaError for any (topic, difficulty, count) the bank cannot fill"""
+        for topic, difficulty, count in quotas:
+            available = self.size(topic, difficulty)
+            if count > available:
+                raise QuotaError(
+                    f"Only {available} {difficulty} questions on '{topic}' in the bank, {count} requested")
+
+    def draw(self, quotas, rng=random):
+        """One paper: a tuple of question ids, ``count`` from each stratum"""
+        paper = []
+        for topic, difficulty, count in quotas:
+            paper.extend(rng.sample(self.strata[(topic, difficulty)], count))
+        return tuple(paper)
+
+    def draw_papers(self, quotas, students, rng=random):
+        """
+        ``students`` papers, redrawing a paper identical to one already
+        handed out a few times so papers are unique where the bank allows.
+        """
+        quotas = [tuple(quota) for quota in quotas]
+        self.check(quotas)
+        seen = set()
+        papers = []
+        for _ in range(students):
+            for _ in range(MAX_REDRAWS + 1):
+                paper = self.draw(quotas, rng)
+                key = frozenset(paper)
+                if key not in seen:
+                    break
+            seen.add(key)
+            papers.append(paper)
+        return papers
+
+
+def get_index():
+    """The current bank index, rebuilt if any bank question changed since it was built"""
+    global _index
+    version = versions.get_versions(versions.bank_key())[0]
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                rows = Question.objects.filter(quiz__isnull=True).order_by('id').values_list(
+                    'topic', 'difficulty', 'id')
+                _index = BankIndex(rows.iterator(chunk_size=5000), version)
+            index = _index
+    return index
+
+
+def quota_triples(quotas):
+    return [(quota.topic, quota.difficulty, quota.count) for quota in quotas]
@@ -0,0 +1,105 @@
+"""
+In-memory index of quiz availability windows.
+
+The index is built from one query over all quizzes and kept per process. It
+is rebuilt only when the catalog version changes (every Quiz save or delete
+bumps it), so availability checks cost a cache read plus a bisect instead of
+loading and filtering quizzes on every request.
+"""
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import versions
+from .models import Quiz
+
+# Windows include their end time, so a quiz closes just after it
+_END_EPSILON = timedelta(microseconds=1)
+
+_lock = threading.Lock()
+_index = None
+
+
+class ScheduleIndex:
+    """
+    Open quizzes at any instant, answered from sorted window boundaries.
+    Matches Quiz.is_available(): unscheduled quizzes are always open and
+    scheduled ones are open from start to end inclusive.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.windows = {}
+        always_open = set()
+        opens = defaultdict(set)
+        closes = defaultdict(set)
+
+        for quiz_id, is_scheduled, start, end in rows:
+            if not is_scheduled:
+                always_open.add(quiz_id)
+            elif start is not None and end is not None and start <= end:
+                self.windows[quiz_id] = (start, end)
+                opens[start].add(quiz_id)
+                closes[end + _END_EPSILON].add(quiz_id)
+
+        self.always_open = frozenset(always_open)
+        self.boundaries = sorted(set(opens) | set(closes))
+
+        # segments[i] holds the quizzes open between boundaries i - 1 and i
+        current = set()
+        self.segments = [frozenset()]
+        for boundary in self.boundaries:
+            current |= opens.get(boundary, set())
+            current -= closes.get(boundary, set())
+            self.segments.append(frozenset(current))
+
+    def segment(self, now=None):
+        """Position of ``now`` among the boundaries; changes whenever a window opens or closes"""
+        return bisect_right(self.boundaries, now or timezone.now())
+
+    def open_quiz_ids(self, now=None):
+        return self.always_open | self.segments[self.segment(now)]
+
+    def is_open(self, quiz_id, now=None):
+        if quiz_id in self.always_open:
+            return True
+        window = self.windows.get(quiz_id)
+        if window is None:
+            return False
+        return window[0] <= (now or timezone.now()) <= window[1]
+
+    def has_started(self, quiz_id, now=None):
+        if quiz_id in self.always_open:
+            return True
+        window = self.windows.get(quiz_id)
+        return window is not None and window[0] <= (now or timezone.now())
+
+    def closes_at(self, quiz_id):
+        window = self.windows.get(quiz_id)
+        return window[1] if window else None
+
+
+def get_index():
+    """The current index, rebuilt if any quiz changed since it was built"""
+    global _index
+    version = versions.get_versions(versions.catalog_key())[0]
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                rows = Quiz.objects.values_list(
+                    'id', 'is_scheduled', 'scheduled_start_time', 'scheduled_end_time')
+                _index = ScheduleIndex(rows, version)
+            index = _index
+    return index
+
+
+def is_open(quiz_id, now=None):
+    return get_index().is_open(quiz_id, now)
+
+
+def open_quiz_ids(now=None):
+    return get_index().open_quiz_ids(now)
@@ -0,0 +1,120 @@
+"""
+Full-text search over questions for faculty browsing the bank.
+
+On PostgreSQL the match and the rank are computed by the database against
+the GIN index created in migration 0014 over ``DOCUMENT``; the query must use
+the same expression for the index to apply. Elsewhere (SQLite in
+development) a per-process inverted index over question text and topic
+answers the match, rebuilt when any question changes, and the database only
+applies the filters.
+
+Both treat the query as words that must all appear and rank by how often,
+and how rarely elsewhere, they occur.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from . import versions
+from .models import Question
+
+MAX_PAGE_SIZE = 100
+
+# Keep in sync with the index in migration 0014
+DOCUMENT = "to_tsvector('english', coalesce({table}.text, '') || ' ' || coalesce({table}.topic, ''))"
+TSQUERY = "websearch_to_tsquery('english', %s)"
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from how in is it of on or the this to was what which with'.split())
+_WORD = re.compile(r'\w+')
+
+_lock = threading.Lock()
+_index = None
+
+
+def tokenize(text):
+    return [word for word in _WORD.findall((text or '').lower()) if word not in STOP_WORDS]
+
+
+class InvertedIndex:
+    """Term -> {question id: occurrences} over question text and topic"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for question_id, text, topic in rows:
+            self.size += 1
+            for term, count in Counter(tokenize(f'{text} {topic}')).items():
+                self.postings[term][question_id] = count
+
+    def search(self, query):
+        """{question id: score} of the questions containing every query term"""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+        postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+        matches = set(postings[0]).intersection(*postings[1:])
+        scores = {}
+        for question_id in matches:
+            scores[question_id] = sum(
+                (1 + math.log(posting[question_id])) * math.log(1 + self.size / len(posting))
+                for posting in postings
+            )
+        return scores
+
+
+def get_index():
+    """The current inverted index, rebuilt if any question changed since it was built"""
+    global _index
+    version = versions.get_versions(versions.questions_key())[0]
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                rows = Question.objects.values_list('id', 'text', 'topic')
+                _index = InvertedIndex(rows.iterator(chunk_size=5000), version)
+            index = _index
+    return index
+
+
+def visible_questions(user):
+    """Bank questions plus those in the faculty member's own live quizzes"""
+    return Question.objects.filter(
+        Q(quiz__isnull=True) | Q(quiz__created_by=user, quiz__deleted_at__isnull=True))
+
+
+def search(user, query, page=1, page_size=20, **filters):
+    """
+    One page of matching questions, best first, each with a ``rank``
+    attribute. ``filters`` are exact field filters (topic, difficulty,
+    type). Returns (total matches, questions).
+    """
+    questions = visible_questions(user).filter(**filters)
+    offset = (page - 1) * page_size
+
+    if connection.vendor == 'postgresql':
+        document = DOCUMENT.format(table=connection.ops.quote_name(Question._meta.db_table))
+        matches = questions.filter(
+            RawSQL(f"{document} @@ {TSQUERY}", [query], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f"ts_rank({document}, {TSQUERY})", [query], output_field=FloatField())
+        ).order_by('-rank', 'id')
+        return matches.count(), list(matches[offset:offset + page_size])
+
+    scores = get_index().search(query)
+    matching = questions.filter(id__in=list(scores)).values_list('id', flat=True)
+    ranked = sorted(matching, key=lambda question_id: (-scores[question_id], question_id))
+    page_ids = ranked[offset:offset + page_size]
+    found = Question.objects.in_bulk(page_ids)
+    results = []
+    for question_id in page_ids:
+        question = found[question_id]
+        question.rank = scores[question_id]
+        results.append(question)
+    return len(ranked), results
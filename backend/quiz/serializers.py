@@ -1,31 +1,44 @@
 from rest_framework import serializers
-from .models import Question, Quiz, QuizAssignment, StudentPerformance
+from .models import Question, Quiz, QuizAssignment, QuizQuota, StudentPerformance
+from . import sampling
 import json
 
+def validate_answers(data):
+    """Answer rules shared by QuestionSerializer and the bulk importers"""
+    if data.get('type') == 'mcq':
+        options = data.get('options', [])
+        correct = data.get('correct_answer', [])
+        if not isinstance(correct, list):
+            raise serializers.ValidationError("Correct answer must be a list for MCQ.")
+        for ans in correct:
+            if ans not in options:
+                raise serializers.ValidationError(f"Correct answer '{ans}' must be one of the options.")
+    if data.get('type') == 'true_false':
+        correct = data.get('correct_answer', [])
+        if not isinstance(correct, list) or len(correct) != 1:
+            raise serializers.ValidationError("Correct answer must be a list with one value for True/False.")
+        if correct[0] not in ["True", "False", True, False]:
+            raise serializers.ValidationError("Correct answer for True/False must be either 'True' or 'False'.")
+
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = '__all__'
 
     def validate(self, data):
-        if data.get('type') == 'mcq':
-            options = data.get('options', [])
-            correct = data.get('correct_answer', [])
-            if not isinstance(correct, list):
-                raise serializers.ValidationError("Correct answer must be a list for MCQ.")
-            for ans in correct:
-                if ans not in options:
-                    raise serializers.ValidationError(f"Correct answer '{ans}' must be one of the options.")
-        if data.get('type') == 'true_false':
-            correct = data.get('correct_answer', [])
-            if not isinstance(correct, list) or len(correct) != 1:
-                raise serializers.ValidationError("Correct answer must be a list with one value for True/False.")
-            if correct[0] not in ["True", "False", True, False]:
-                raise serializers.ValidationError("Correct answer for True/False must be either 'True' or 'False'.")
+        validate_answers(data)
         return data
 
+class QuizQuotaSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = QuizQuota
+        fields = ['topic', 'difficulty', 'count']
+
 class QuizSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, required=False)
+    quotas = QuizQuotaSerializer(many=True, required=False)
 
     class Meta:
         model = Quiz
@@ -36,6 +49,17 @@ class QuizSerializer(serializers.ModelSerializer):
         super().__init__(*args, **kwargs)
 
     def validate(self, attrs):
+        quotas = attrs.get('quotas')
+        if quotas and self.instance is None:
+            if attrs.get('questions'):
+                raise serializers.ValidationError("Use either inline questions or bank quotas, not both.")
+            try:
+                sampling.get_index().check(sampling.quota_triples(
+                    QuizQuota(**quota) for quota in quotas))
+            except sampling.QuotaError as e:
+                raise serializers.ValidationError({'quotas': str(e)})
+            # Every student answers the full quota
+            attrs['questions_per_student'] = sum(quota['count'] for quota in quotas)
         return super().validate(attrs)
 
     def to_internal_value(self, data):
@@ -47,6 +71,12 @@ class QuizSerializer(serializers.ModelSerializer):
             except Exception as e:
                 questions = []
         data['questions'] = questions
+        quotas = data.get('quotas')
+        if isinstance(quotas, str):
+            try:
+                data['quotas'] = json.loads(quotas)
+            except Exception as e:
+                data['quotas'] = []
         ret = super().to_internal_value(data)
         ret['questions'] = questions
         return ret
@@ -56,6 +86,7 @@ class QuizSerializer(serializers.ModelSerializer):
         Create a quiz along with nested questions, attaching uploaded images.
         """
         questions_data = validated_data.pop('questions', [])
+        quotas_data = validated_data.pop('quotas', [])
         user = self.context['request'].user
         # Create the quiz instance
         quiz = Quiz.objects.create(created_by=user, **validated_data)
@@ -81,6 +112,11 @@ class QuizSerializer(serializers.ModelSerializer):
         # Add questions to the quiz instance
         quiz.questions.set(questions)
         quiz.save()
+
+        # Bank quotas; papers are drawn from them when students are assigned
+        if quotas_data:
+            QuizQuota.objects.bulk_create(QuizQuota(quiz=quiz, **quota) for quota in quotas_data)
+            quiz.calculate_total_score()
         
         # Return the quiz with questions
         return quiz
@@ -90,6 +126,8 @@ class QuizSerializer(serializers.ModelSerializer):
         Update a quiz and its questions.
         """
         questions_data = validated_data.pop('questions', [])
+        # Papers were drawn from the quotas at creation, so they stay as they are
+        validated_data.pop('quotas', None)
         user = self.context['request'].user
 
         # Update quiz fields
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from quiz import archive
+from quiz.models import QuizArchive, QuizAssignment, QuizResults
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class QuizArchiveTests(SubmissionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.submit(self.assignments[0], 'L0')
+        self.submit(self.assignments[1], 'wrong')
+
+    def close_quiz(self):
+        now = timezone.now()
+        self.quiz.is_scheduled = True
+        self.quiz.scheduled_start_time = now - timedelta(hours=2)
+        self.quiz.scheduled_end_time = now - timedelta(hours=1)
+        self.quiz.save()
+
+    def test_open_quizzes_are_not_archived(self):
+        self.assertEqual(archive.archive_quiz(self.quiz), 0)
+        self.assertEqual(QuizAssignment.objects.filter(quiz=self.quiz).count(), 2)
+
+    def test_archive_replaces_assignments(self):
+        self.close_quiz()
+        self.assertEqual(archive.archive_quiz(self.quiz), 1)
+
+        self.assertFalse(QuizAssignment.objects.filter(quiz=self.quiz).exists())
+        self.assertTrue(QuizResults.objects.filter(quiz=self.quiz).exists())
+        record = QuizArchive.objects.get(quiz=self.quiz)
+        self.assertEqual((record.question_count, record.completed_count), (2, 2))
+        entries = archive.unpack(record.answers)
+        self.assertEqual([entry['student_answer'] for entry in entries], ['L0', 'wrong'])
+        self.assertEqual([str(entry['score']) for entry in entries], ['1.00', '0.00'])
+
+        # A second run finds nothing left to do
+        self.quiz.refresh_from_db()
+        self.assertEqual(archive.archive_quiz(self.quiz), 0)
+
+    def test_reads_fall_back_to_the_archive(self):
+        self.close_quiz()
+        archive.archive_quiz(self.quiz)
+
+        response = self.client.get(reverse('quiz:quiz_results', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['question_text'], row['answer'], str(row['score'])) for row in response.data],
+                         [('Layer 0?', 'L0', '1.00'), ('Layer 1?', 'wrong', '0.00')])
+
+        response = self.client.get(reverse('quiz:student_performance'))
+        self.assertEqual(response.data[0]['total_score'], '1.00')
+
+        response = self.client.get(reverse('quiz:student_quizzes'))
+        self.assertEqual((response.data[0]['id'], response.data[0]['completed_questions']), (self.quiz.id, 2))
+        self.assertTrue(response.data[0]['is_completed'])
+
+        response = self.client.get(reverse('quiz:student_dashboard'))
+        self.assertEqual(response.data['completed_quizzes'], 1)
@@ -0,0 +1,69 @@
+from django.urls import reverse
+from rest_framework import status
+from authentication.tokens import LMSRefreshToken
+from quiz.models import QuizAssignment
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class AsyncEndpointTests(SubmissionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student.is_active = True
+        self.student.save()
+        token = LMSRefreshToken.for_user(self.student).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    async def test_quizzes_match_the_sync_endpoint(self):
+        response = await self.async_client.get(
+            reverse('quiz:async_student_quizzes'), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.async_client.get(
+            reverse('quiz:student_quizzes'), headers=self.headers)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+
+        response = await self.async_client.get(
+            reverse('quiz:async_student_quizzes'),
+            headers={**self.headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_questions_and_submission(self):
+        response = await self.async_client.get(
+            reverse('quiz:async_quiz_questions', args=[self.quiz.id]), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+        url = reverse('quiz:async_submit_answer', args=[self.assignments[0].id])
+        response = await self.async_client.post(
+            url, {'answer': 'L0'}, content_type='application/json',
+            headers={**self.headers, 'Idempotency-Key': 'async-1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assignment = await QuizAssignment.objects.aget(id=self.assignments[0].id)
+        self.assertTrue(assignment.completed)
+
+        # Keys are shared with the sync endpoint
+        response = await self.async_client.post(
+            reverse('quiz:submit_answer', args=[self.assignments[0].id]),
+            {'answer': 'L0'}, content_type='application/json',
+            headers={**self.headers, 'Idempotency-Key': 'async-1'})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+
+        response = await self.async_client.get(
+            reverse('quiz:async_student_quiz_performance', args=[self.quiz.id]),
+            headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(float(response.json()['total_score']), 1.0)
+
+    async def test_requires_a_current_token(self):
+        url = reverse('quiz:async_student_quizzes')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.post(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        await self.student.arefresh_from_db()
+        self.student.is_student = False
+        await self.student.asave()
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
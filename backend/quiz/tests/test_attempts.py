@@ -0,0 +1,106 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from quiz import attempts, autosave
+from quiz.models import QuizAssignment, QuizAttempt, QuizResults, StudentPerformance
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class AttemptSessionTests(SubmissionTestCase):
+    def expire(self, attempt):
+        """Move an attempt's clock back past its deadline"""
+        started = timezone.now() - timedelta(minutes=self.quiz.time_limit_minutes + 5)
+        QuizAttempt.objects.filter(pk=attempt.pk).update(
+            started_at=started,
+            deadline=started + timedelta(minutes=self.quiz.time_limit_minutes)
+        )
+
+    def test_start_records_session_with_deadline(self):
+        """Starting is idempotent and the deadline follows the time limit"""
+        response = self.client.post(reverse('quiz:start_quiz_attempt', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        attempt = QuizAttempt.objects.get(quiz=self.quiz, student=self.student)
+        self.assertEqual(attempt.deadline - attempt.started_at, timedelta(minutes=30))
+
+        again = self.client.post(reverse('quiz:start_quiz_attempt', args=[self.quiz.id]))
+        self.assertEqual(again.data['started_at'], response.data['started_at'])
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_submit_after_deadline_is_rejected(self):
+        attempt = QuizAttempt.start(self.quiz, self.student)
+        self.expire(attempt)
+        response = self.submit(self.assignments[0], 'L0')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(QuizAssignment.objects.get(pk=self.assignments[0].pk).completed)
+
+    def test_final_submit_closes_session(self):
+        self.submit(self.assignments[0], 'L0')
+        attempt = QuizAttempt.objects.get(quiz=self.quiz, student=self.student)
+        self.assertIsNone(attempt.finalized_at)
+
+        self.submit(self.assignments[1], 'L1')
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.finalized_at)
+        self.assertFalse(self.quiz.can_be_attempted(self.student, attempt=attempt))
+
+    def test_scheduler_finalises_expired_attempts_in_batch(self):
+        """Expired attempts are graded in one pass, drafts included"""
+        self.submit(self.assignments[0], 'L0')
+        autosave.save_draft(self.assignments[1].id, self.student.id, 'L1')
+        attempt = QuizAttempt.objects.get(quiz=self.quiz, student=self.student)
+        self.expire(attempt)
+
+        scheduler = attempts.DeadlineScheduler()
+        self.assertEqual(attempts.expire_due(scheduler), 1)
+        self.assertEqual(len(scheduler), 0)
+
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.finalized_at)
+        late = QuizAssignment.objects.get(pk=self.assignments[1].pk)
+        self.assertTrue(late.completed and late.is_graded)
+        self.assertEqual(late.student_answer, 'L1')
+        self.assertEqual(late.submitted_at, attempt.deadline)
+        self.assertTrue(
+            StudentPerformance.objects.get(quiz=self.quiz, student=self.student).is_stale)
+
+        # Nothing is due any more, and a finalised attempt is never picked up again
+        self.assertEqual(attempts.expire_due(scheduler), 0)
+        self.assertEqual(attempts.finalize([attempt.id]), 0)
+
+    def test_open_attempts_wait_on_the_heap(self):
+        QuizAttempt.start(self.quiz, self.student)
+        scheduler = attempts.DeadlineScheduler()
+        self.assertEqual(attempts.expire_due(scheduler), 0)
+        self.assertEqual(len(scheduler), 1)
+        self.assertEqual(scheduler.refresh(), 0)
+
+    def test_attempt_committed_out_of_order_is_rescanned(self):
+        """An attempt committing after a higher id was seen still gets its deadline"""
+        attempt = QuizAttempt.start(self.quiz, self.student)
+        scheduler = attempts.DeadlineScheduler()
+        # A later attempt was loaded before this one committed
+        scheduler._last_seen_id = attempt.id + 1
+
+        added = [scheduler.refresh() for _ in range(attempts.RESCAN_EVERY)]
+        self.assertEqual(added, [0] * (attempts.RESCAN_EVERY - 1) + [1])
+        self.assertEqual(len(scheduler), 1)
+
+        # Rescans never queue an attempt twice
+        for _ in range(attempts.RESCAN_EVERY):
+            scheduler.refresh()
+        self.assertEqual(len(scheduler), 1)
+
+    def test_results_use_session_time(self):
+        attempt = QuizAttempt.start(self.quiz, self.student)
+        self.expire(attempt)
+        attempts.finalize([attempt.id])
+
+        # Results are only generated once the quiz window has closed
+        self.quiz.is_scheduled = True
+        self.quiz.scheduled_start_time = timezone.now() - timedelta(hours=2)
+        self.quiz.scheduled_end_time = timezone.now() - timedelta(minutes=1)
+        self.quiz.save()
+        QuizResults.generate_results(self.quiz)
+        result = QuizResults.objects.get(quiz=self.quiz, student=self.student)
+        self.assertEqual(result.time_taken_minutes, 30)
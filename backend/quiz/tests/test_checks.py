@@ -0,0 +1,38 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from backend import cache_checks
+from quiz import checks
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FILE_BASED = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                          'LOCATION': '/tmp/lms-check-cache'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                     'LOCATION': 'redis://127.0.0.1:6379/1'}}
+
+
+@override_settings(CACHE_SINGLE_PROCESS=False)
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=REDIS)
+    def test_redis_passes(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+
+    @override_settings(CACHES=LOCMEM)
+    def test_per_process_cache_is_flagged_and_workers_refuse_it(self):
+        self.assertEqual([message.id for message in checks.check_shared_cache(None)], ['quiz.W001'])
+        with self.assertRaisesMessage(CommandError, 'process_performance_queue'):
+            call_command('process_performance_queue', '--once')
+        for command in ('expire_attempts', 'flush_autosaves'):
+            with self.assertRaisesMessage(CommandError, command):
+                call_command(command, '--once')
+
+    @override_settings(CACHES=FILE_BASED)
+    def test_non_atomic_cache_is_an_error_and_workers_refuse_it(self):
+        self.assertEqual([message.id for message in checks.check_shared_cache(None)], ['quiz.E001'])
+        with self.assertRaisesMessage(CommandError, 'flush_autosaves'):
+            call_command('flush_autosaves', '--once')
+
+    @override_settings(CACHES=FILE_BASED, CACHE_SINGLE_PROCESS=True)
+    def test_single_process_accepts_any_cache(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+        self.assertTrue(cache_checks.cache_is_atomic())
@@ -0,0 +1,98 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.models import Question, Quiz, QuizAssignment
+from authentication.models import User
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='etag_faculty',
+            roll_no='100001',
+            email='etag_faculty@test.com',
+            password='password123',
+            is_faculty=True,
+            is_student=False
+        )
+        self.student = User.objects.create_user(
+            username='etag_student',
+            roll_no='100002',
+            email='etag_student@test.com',
+            password='password123',
+            is_faculty=False,
+            is_student=True
+        )
+        self.quiz = Quiz.objects.create(
+            title='ETag Quiz',
+            course_id='CS101',
+            topic='Caching',
+            difficulty='easy',
+            questions_per_student=1,
+            created_by=self.faculty
+        )
+        self.question = Question.objects.create(
+            text='Is HTTP stateless?',
+            topic='Caching',
+            difficulty='easy',
+            type='true_false',
+            correct_answer=['True'],
+            max_score=1.0,
+            created_by=self.faculty,
+            quiz=self.quiz
+        )
+        self.assignment = QuizAssignment.objects.create(
+            quiz=self.quiz,
+            student=self.student,
+            question=self.question
+        )
+        self.client = APIClient()
+
+    def test_student_quizzes_not_modified(self):
+        """A matching If-None-Match returns 304 without a body"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('quiz:student_quizzes')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_submission_invalidates_etag(self):
+        """Submitting an answer changes the student's validators"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('quiz:quiz_questions', args=[self.quiz.id])
+        etag = self.client.get(url)['ETag']
+
+        self.client.post(
+            reverse('quiz:submit_answer', args=[self.assignment.id]),
+            {'answer': 'True'},
+            format='json'
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response.data[0]['is_completed'])
+
+    def test_faculty_quizzes_etag_changes_on_edit(self):
+        """Editing a quiz invalidates the faculty quiz list"""
+        self.client.force_authenticate(user=self.faculty)
+        url = reverse('quiz:faculty_quizzes')
+        etag = self.client.get(url)['ETag']
+
+        self.quiz.title = 'Renamed Quiz'
+        self.quiz.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['title'], 'Renamed Quiz')
+
+    def test_wrong_role_gets_no_etag(self):
+        """Forbidden responses are never turned into 304s"""
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.get(reverse('quiz:student_quizzes'), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
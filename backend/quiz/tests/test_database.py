@@ -0,0 +1,37 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from authentication.models import User
+from backend.db_metrics import pool_stats
+
+
+class FakePool:
+    def get_stats(self):
+        return {
+            'pool_min': 2, 'pool_max': 4, 'pool_size': 4, 'pool_available': 0,
+            'requests_waiting': 3, 'requests_num': 10, 'requests_wait_ms': 250,
+            'connections_num': 4, 'connections_ms': 80,
+        }
+
+
+class DatabaseStatusTests(APITestCase):
+    def test_pool_saturation_figures(self):
+        stats = pool_stats(FakePool())
+        self.assertEqual((stats['in_use'], stats['idle'], stats['waiting']), (4, 0, 3))
+        self.assertEqual(stats['mean_wait_ms'], 25.0)
+        self.assertEqual(stats['mean_connect_ms'], 20.0)
+
+    def test_endpoint_is_admin_only(self):
+        user = User.objects.create_user(
+            username='db_admin', roll_no='910001', email='db_admin@test.com',
+            password='password123', is_active=True)
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get(reverse('db_stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse('db_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('default', response.data)
+        self.assertGreaterEqual(response.data['default']['opened_by_process'], 1)
+        self.assertIsNone(response.data['default']['pool'])
@@ -0,0 +1,102 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from authentication.models import User
+from quiz import duplicates
+from quiz.models import Question, QuestionBand, QuestionSignature, Quiz
+
+TEXT = 'Which traversal of a binary search tree visits the keys in ascending sorted order?'
+OPTIONS = ['Preorder', 'Inorder', 'Postorder', 'Level order']
+
+
+class SignatureTests(APITestCase):
+    def test_similarity_tracks_how_much_text_is_shared(self):
+        original = duplicates.signature(TEXT.lower())
+        edited = duplicates.signature(TEXT.lower().replace('ascending', 'increasing'))
+        unrelated = duplicates.signature('define the time complexity of heapsort in the worst case')
+
+        self.assertEqual(len(original), duplicates.NUM_BINS)
+        self.assertEqual(duplicates.similarity(original, original), 1.0)
+        self.assertGreater(duplicates.similarity(original, edited), 0.6)
+        self.assertLess(duplicates.similarity(original, unrelated), 0.2)
+        self.assertIsNone(duplicates.signature(''))
+
+
+class DuplicateDetectionTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='dup_faculty', roll_no='950001', email='dup_faculty@test.com',
+            password='password123', is_faculty=True, is_student=False, is_active=True)
+        self.client.force_authenticate(user=self.faculty)
+
+    def add(self, text, options=OPTIONS, answer='Inorder'):
+        return self.client.post(reverse('quiz:question_bank'), {
+            'text': text, 'topic': 'Trees', 'difficulty': 'easy', 'type': 'mcq',
+            'options': options, 'correct_answer': [answer], 'max_score': 1.0,
+        }, format='json')
+
+    def test_trivial_edit_is_flagged_on_save(self):
+        first = self.add(TEXT).data
+        self.assertIsNone(first['duplicate_of'])
+        edited = self.add(TEXT.replace('?', ' ?').replace('Which', 'which'), OPTIONS[::-1]).data
+        self.assertEqual(edited['duplicate_of'], first['id'])
+        unrelated = self.add('Which data structure backs a priority queue?', ['Heap', 'Stack', 'Queue', 'List'], 'Heap').data
+        self.assertIsNone(unrelated['duplicate_of'])
+
+        self.assertEqual(QuestionBand.objects.filter(question_id=first['id']).count(), duplicates.BANDS)
+        response = self.client.get(reverse('quiz:question_duplicates'))
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['question']['id'], edited['id'])
+        self.assertEqual(response.data['results'][0]['duplicate_of']['id'], first['id'])
+
+    def test_questions_leaving_the_bank_or_edited_are_rechecked(self):
+        first = Question.objects.get(pk=self.add(TEXT).data['id'])
+        copy = Question.objects.get(pk=self.add(TEXT + ' ').data['id'])
+        other = Question.objects.get(pk=self.add(TEXT + '  ').data['id'])
+        self.assertEqual(QuestionSignature.objects.get(pk=other.pk).duplicate_of_id, first.id)
+
+        # Editing the original clears the flags raised against its old text
+        first.text = 'Which data structure backs a priority queue?'
+        first.options = ['Heap', 'Stack', 'Queue', 'List']
+        first.correct_answer = ['Heap']
+        first.save()
+        self.assertEqual(QuestionSignature.objects.get(pk=other.pk).duplicate_of_id, copy.id)
+
+        # A question moved into a quiz keeps no rows and is never listed
+        quiz = Quiz.objects.create(title='Trees', course_id='CS201', topic='Trees', difficulty='easy',
+                                   questions_per_student=1, created_by=self.faculty)
+        copy = Question.objects.get(pk=copy.pk)
+        copy.quiz = quiz
+        copy.save()
+        self.assertFalse(QuestionSignature.objects.filter(pk=copy.pk).exists())
+        self.assertFalse(QuestionBand.objects.filter(question_id=copy.pk).exists())
+        self.assertIsNone(QuestionSignature.objects.get(pk=other.pk).duplicate_of_id)
+        response = self.client.get(reverse('quiz:question_duplicates'))
+        self.assertEqual(response.data['count'], 0)
+
+    def test_scan_flags_existing_bank(self):
+        questions = Question.objects.bulk_create([
+            Question(text=TEXT, type='mcq', topic='Trees', difficulty='easy', options=OPTIONS,
+                     correct_answer=['Inorder'], created_by=self.faculty),
+            Question(text='Name the tree traversal that gives sorted order of keys.', type='short_answer',
+                     topic='Trees', difficulty='easy', correct_answer=['Inorder'], created_by=self.faculty),
+            Question(text=TEXT + '  ', type='mcq', topic='Trees', difficulty='easy', options=OPTIONS,
+                     correct_answer=['Inorder'], created_by=self.faculty),
+        ])
+        self.assertFalse(QuestionSignature.objects.exists())
+
+        out = io.StringIO()
+        call_command('find_duplicate_questions', batch_size=2, stdout=out)
+
+        self.assertIn('Indexed 3 bank questions, flagged 1', out.getvalue())
+        flagged = QuestionSignature.objects.get(duplicate_of__isnull=False)
+        self.assertEqual((flagged.question_id, flagged.duplicate_of_id), (questions[2].id, questions[0].id))
+        self.assertEqual(flagged.similarity, 1.0)
+
+        # Rescanning rebuilds the same index
+        call_command('find_duplicate_questions', stdout=io.StringIO())
+        self.assertEqual(QuestionSignature.objects.filter(duplicate_of__isnull=False).count(), 1)
+        self.assertEqual(QuestionBand.objects.count(), 3 * duplicates.BANDS)
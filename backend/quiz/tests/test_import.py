@@ -0,0 +1,137 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from authentication.models import User
+from quiz import importers
+from quiz.models import Question
+
+MOODLE_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<quiz>
+  <question type="category"><category><text>$course$/Networks/Routing</text></category></question>
+  <question type="multichoice">
+    <questiontext format="html"><text><![CDATA[<p>Which protocol is link-state?</p>]]></text></questiontext>
+    <defaultgrade>2.0000000</defaultgrade>
+    <answer fraction="100"><text>OSPF</text></answer>
+    <answer fraction="0"><text>RIP</text></answer>
+    <tags><tag><text>hard</text></tag></tags>
+  </question>
+  <question type="truefalse">
+    <questiontext format="html"><text>BGP is an interior gateway protocol.</text></questiontext>
+    <answer fraction="0"><text>true</text></answer>
+    <answer fraction="100"><text>false</text></answer>
+  </question>
+</quiz>
+"""
+
+
+class QuestionImportTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='import_faculty', roll_no='940001', email='import_faculty@test.com',
+            password='password123', is_faculty=True, is_student=False, is_active=True)
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+
+    def test_csv_rows_are_validated_like_the_serializer(self):
+        data = (
+            "text,type,topic,difficulty,options,correct_answer,max_score\n"
+            "2 + 2?,mcq,Maths,easy,3|4|5,4,1\n"
+            "The sky is blue,true_false,Maths,easy,,True,1\n"
+            "Pick one,mcq,Maths,easy,a|b,c,1\n"
+            ",short_answer,Maths,easy,,x,1\n"
+        ).encode()
+        report = importers.import_questions(io.BytesIO(data), 'csv', self.faculty, batch_size=1)
+
+        self.assertEqual((report.created, report.failed), (2, 2))
+        self.assertEqual([error['line'] for error in report.errors], [4, 5])
+        self.assertIn("must be one of the options", report.errors[0]['error'])
+        self.assertEqual(Question.objects.get(text='2 + 2?').options, ['3', '4', '5'])
+
+    def test_rows_that_break_the_checks_are_rejected(self):
+        data = (
+            "text,type,topic,options,correct_answer,max_score\n"
+            "Pick one,mcq,Maths,,4,1\n"
+            "Not a number,short_answer,Maths,,x,NaN\n"
+            "Too big,short_answer,Maths,,x,Infinity\n"
+            "Fine,short_answer,Maths,,x,1\n"
+        ).encode()
+        report = importers.import_questions(io.BytesIO(data), 'csv', self.faculty)
+
+        self.assertEqual((report.created, report.failed), (1, 3))
+        self.assertIn("must be one of the options", report.errors[0]['error'])
+        self.assertEqual([error['error'] for error in report.errors[1:]],
+                         ["Invalid max_score 'NaN'.", "Invalid max_score 'Infinity'."])
+
+    def test_moodle_xml(self):
+        report = importers.import_questions(io.BytesIO(MOODLE_XML), 'xml', self.faculty)
+
+        self.assertEqual(report.created, 2)
+        mcq = Question.objects.get(type='mcq')
+        self.assertEqual((mcq.text, mcq.topic, mcq.difficulty, str(mcq.max_score)),
+                         ('Which protocol is link-state?', 'Routing', 'hard', '2.00'))
+        self.assertEqual(mcq.correct_answer, ['OSPF'])
+        self.assertEqual(Question.objects.get(type='true_false').correct_answer, ['False'])
+
+    def test_upload_with_image_archive(self):
+        images = io.BytesIO()
+        with zipfile.ZipFile(images, 'w') as archive:
+            archive.writestr('img/graph.png', b'png bytes')
+        lines = [
+            {'text': 'Name this graph', 'topic': 'Graphs', 'correct_answer': ['K4'], 'image': 'img/graph.png'},
+            {'text': 'Missing image', 'topic': 'Graphs', 'image': 'img/none.png'},
+        ]
+        upload = SimpleUploadedFile('bank.jsonl', '\n'.join(json.dumps(line) for line in lines).encode())
+
+        self.client.force_authenticate(user=self.faculty)
+        with override_settings(MEDIA_ROOT=self.media):
+            response = self.client.post(reverse('quiz:import_questions'), {
+                'file': upload, 'images': SimpleUploadedFile('images.zip', images.getvalue()),
+            }, format='multipart')
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+            question = Question.objects.get(text='Name this graph')
+            self.assertIsNone(question.quiz)
+            self.assertEqual(question.image.read(), b'png bytes')
+
+    def test_dry_run_creates_nothing_but_counts_duplicates(self):
+        row = "Which layer of the OSI model routes packets between networks?,short_answer,Networks,easy,,Network,1\n"
+        header = "text,type,topic,difficulty,options,correct_answer,max_score\n"
+        importers.import_questions(io.BytesIO((header + row).encode()), 'csv', self.faculty)
+        other = "Which protocol resolves IP addresses to MAC addresses?,short_answer,Networks,easy,,ARP,1\n"
+        upload = SimpleUploadedFile('bank.csv', (header + row + other + other).encode())
+
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.post(reverse('quiz:import_questions'), {
+            'file': upload, 'dry_run': 'true',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['validated'], response.data['created']), (3, 0))
+        # One copy of the bank question, and the second of two rows in the file
+        self.assertEqual(response.data['duplicates'], 2)
+        self.assertEqual(Question.objects.count(), 1)
+
+    def test_bad_quiz_id_and_archive_are_rejected(self):
+        data = b"text,topic,correct_answer\nName a prime,Maths,2\n"
+        self.client.force_authenticate(user=self.faculty)
+
+        response = self.client.post(reverse('quiz:import_questions'), {
+            'file': SimpleUploadedFile('bank.csv', data), 'quiz_id': 'abc',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('quiz:import_questions'), {
+            'file': SimpleUploadedFile('bank.csv', data),
+            'images': SimpleUploadedFile('images.zip', b'not a zip'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Question.objects.exists())
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from rest_framework import status
+from authentication.tokens import LMSRefreshToken
+from quiz import live
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+def parse_event(chunk):
+    lines = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+
+class LiveFeedTests(SubmissionTestCase):
+    def setUp(self):
+        super().setUp()
+        for user in (self.faculty, self.student):
+            user.is_active = True
+            user.save()
+        token = LMSRefreshToken.for_user(self.faculty).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.student_token = LMSRefreshToken.for_user(self.student).access_token
+
+    def test_snapshot_counts_and_ranks(self):
+        self.submit(self.assignments[0], 'L0')
+        snapshot = live.build_snapshot(self.quiz.id)
+        self.assertEqual(snapshot['completion'],
+                         {'students': 1, 'started': 1, 'finished': 0, 'answers': 1})
+        self.assertEqual(snapshot['histogram']['41-60'], 1)
+        self.assertEqual(snapshot['ranks'], {'400002': [1, '1.00']})
+
+        changed = dict(snapshot, completion=dict(snapshot['completion'], finished=1))
+        self.assertEqual(live.diff(snapshot, changed), {'completion': changed['completion']})
+        self.assertEqual(live.diff(snapshot, snapshot), {})
+
+    async def test_subscribers_share_one_feed(self):
+        publisher = live.Publisher(interval=3600)
+        subscriptions = [await publisher.subscribe(self.quiz.id) for _ in range(3)]
+        self.assertEqual(len(publisher._feeds), 1)
+        self.assertEqual(publisher.subscriber_count(self.quiz.id), 3)
+
+        await sync_to_async(self.submit)(self.assignments[0], 'L0')
+        feed = publisher._feeds[self.quiz.id]
+        feed.publish('update', await feed.refresh())
+        self.assertIsNone(await feed.refresh())
+
+        updates = [subscription.queue.get_nowait() for subscription in subscriptions]
+        self.assertTrue(all(update == updates[0] for update in updates))
+        self.assertEqual(updates[0][1]['completion']['answers'], 1)
+
+        for subscription in subscriptions:
+            subscription.close()
+        self.assertEqual(publisher._feeds, {})
+
+    async def test_failed_start_wakes_waiting_streams(self):
+        publisher = live.Publisher(interval=3600)
+        with mock.patch.object(live, 'build_snapshot', side_effect=RuntimeError('database down')):
+            results = await asyncio.wait_for(asyncio.gather(
+                *(publisher.subscribe(self.quiz.id) for _ in range(3)), return_exceptions=True), 5)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+        self.assertEqual(publisher._feeds, {})
+
+        # The next stream starts a fresh feed
+        subscription = await publisher.subscribe(self.quiz.id)
+        self.assertEqual(subscription.snapshot['completion']['answers'], 0)
+        subscription.close()
+
+    async def ticket(self, headers):
+        return await self.async_client.post(
+            reverse('quiz:quiz_live_ticket', args=[self.quiz.id]), headers=headers)
+
+    async def test_stream_pushes_updates(self):
+        live.publisher.interval = 0.01
+        try:
+            response = await self.ticket(self.headers)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            url = reverse('quiz:quiz_live_stream', args=[self.quiz.id])
+            response = await self.async_client.get(url, {'ticket': response.json()['ticket']})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+            stream = aiter(response.streaming_content)
+            event, data = parse_event(await anext(stream))
+            self.assertEqual((event, data['completion']['answers']), ('snapshot', 0))
+
+            await sync_to_async(self.submit)(self.assignments[0], 'L0')
+            event, data = parse_event(await anext(stream))
+            self.assertEqual((event, data['completion']['answers']), ('update', 1))
+            self.assertEqual(data['ranks'], {'400002': [1, '1.00']})
+
+            # A client disconnect cancels the pending read
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            pending.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await pending
+            self.assertEqual(live.publisher.subscriber_count(), 0)
+        finally:
+            live.publisher.interval = live.POLL_INTERVAL
+
+    async def test_tickets_are_single_use_and_never_tokens(self):
+        url = reverse('quiz:quiz_live_stream', args=[self.quiz.id])
+        response = await self.async_client.get(url, {'access_token': self.headers['Authorization'].split()[1]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        ticket = (await self.ticket(self.headers)).json()['ticket']
+        other_quiz = reverse('quiz:quiz_live_stream', args=[self.quiz.id + 1])
+        self.assertEqual((await self.async_client.get(other_quiz, {'ticket': ticket})).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(url, {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await response.streaming_content.aclose()
+        self.assertEqual((await self.async_client.get(url, {'ticket': ticket})).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_is_faculty_only(self):
+        response = await self.ticket({'Authorization': f'Bearer {self.student_token}'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_wsgi_falls_back_to_polling(self):
+        """The WSGI server cannot hold a stream open, so it never starts one"""
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.post(reverse('quiz:quiz_live_ticket', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        response = self.client.get(reverse('quiz:quiz_live_stream', args=[self.quiz.id]), {'ticket': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+        # The rankings it polls instead revalidate with an ETag
+        response = self.client.get(reverse('quiz:student_rankings', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('quiz:student_rankings', args=[self.quiz.id]),
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from quiz import archive, partitions
+from quiz.models import QuizAssignment, StudentPerformance
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class PartitionRangeTests(TestCase):
+    def test_ranges(self):
+        size = partitions.PARTITION_SIZE
+        self.assertEqual(partitions.range_start(0), 0)
+        self.assertEqual(partitions.range_start(size - 1), 0)
+        self.assertEqual(partitions.range_start(size + 1), size)
+        self.assertEqual(partitions.partition_name('quiz_quizassignment', size),
+                         f'quiz_quizassignment_q{size}')
+
+    def test_performance_partitions_are_never_archived(self):
+        self.assertEqual(partitions.archived_models(), [QuizAssignment])
+        self.assertIn(StudentPerformance, partitions.partitioned_models())
+
+    @skipUnless(connection.vendor != 'postgresql', 'partitioning is active')
+    def test_other_databases_are_left_alone(self):
+        self.assertEqual(partitions.ensure_partitions(10_000, ahead=2), [])
+        with self.assertRaises(CommandError):
+            call_command('manage_partitions', 'list')
+
+
+class UncompactedRangeTests(SubmissionTestCase):
+    def test_ranges_wait_for_their_quizzes_to_be_compacted(self):
+        start = partitions.range_start(self.quiz.id)
+        self.assertEqual(partitions.uncompacted_ranges(), {start})
+
+        now = timezone.now()
+        self.quiz.is_scheduled = True
+        self.quiz.scheduled_start_time = now - timedelta(hours=2)
+        self.quiz.scheduled_end_time = now - timedelta(hours=1)
+        self.quiz.save()
+        archive.archive_quiz(self.quiz)
+        self.assertEqual(partitions.uncompacted_ranges(), set())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'partitioning needs PostgreSQL')
+class PostgresPartitionTests(SubmissionTestCase):
+    def test_rows_land_in_the_quiz_partition(self):
+        table = QuizAssignment._meta.db_table
+        self.assertTrue(partitions.is_partitioned(connection, table))
+        expected = partitions.partition_name(table, partitions.range_start(self.quiz.id))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT DISTINCT tableoid::regclass::text FROM {table} WHERE quiz_id = %s',
+                           [self.quiz.id])
+            self.assertEqual(cursor.fetchall(), [(expected,)])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'partitioning needs PostgreSQL')
+class PostgresArchiveTests(TransactionTestCase):
+    # Detaching runs CONCURRENTLY, which cannot happen inside a test transaction
+    setUp = SubmissionTestCase.setUp
+    submit = SubmissionTestCase.submit
+
+    def test_performance_is_served_after_archiving(self):
+        self.submit(self.assignments[0], 'L0')
+        self.submit(self.assignments[1], 'L1')
+        now = timezone.now()
+        self.quiz.is_scheduled = True
+        self.quiz.scheduled_start_time = now - timedelta(hours=2)
+        self.quiz.scheduled_end_time = now - timedelta(hours=1)
+        self.quiz.save()
+        archive.archive_quiz(self.quiz)
+
+        start = partitions.range_start(self.quiz.id)
+        table = QuizAssignment._meta.db_table
+        self.addCleanup(partitions.create_partition, connection, table, start)
+        self.assertEqual(partitions.archive_partitions([start]), [partitions.partition_name(table, start)])
+
+        response = self.client.get(reverse('quiz:student_performance') + f'{self.quiz.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(float(response.data['total_score']), 2.0)
+        self.assertTrue(StudentPerformance.objects.filter(quiz=self.quiz).exists())
+
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.get(reverse('quiz:student_rankings', args=[self.quiz.id]))
+        self.assertEqual(len(response.data), 1)
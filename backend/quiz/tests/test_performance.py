@@ -0,0 +1,250 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz import performance
+from quiz.models import Question, Quiz, QuizAssignment, StudentPerformance
+from authentication.models import User
+
+
+class StoredPerformanceTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='perf_faculty',
+            roll_no='200001',
+            email='perf_faculty@test.com',
+            password='password123',
+            is_faculty=True,
+            is_student=False
+        )
+        self.students = []
+        for i in range(2):
+            self.students.append(User.objects.create_user(
+                username=f'perf_student{i}',
+                roll_no=f'20010{i}',
+                email=f'perf_student{i}@test.com',
+                password='password123',
+                is_faculty=False,
+                is_student=True
+            ))
+        self.quiz = Quiz.objects.create(
+            title='Performance Quiz',
+            course_id='CS101',
+            topic='Ranking',
+            difficulty='easy',
+            questions_per_student=1,
+            created_by=self.faculty
+        )
+        self.question = Question.objects.create(
+            text='2 + 2 = ?',
+            topic='Ranking',
+            difficulty='easy',
+            type='short_answer',
+            correct_answer=['4'],
+            max_score=2.0,
+            created_by=self.faculty,
+            quiz=self.quiz
+        )
+        self.assignments = [
+            QuizAssignment.objects.create(quiz=self.quiz, student=student, question=self.question)
+            for student in self.students
+        ]
+        self.client = APIClient()
+
+    def performance_url(self):
+        return reverse('quiz:student_performance') + f'{self.quiz.id}/'
+
+    def submit(self, index, answer):
+        self.client.force_authenticate(user=self.students[index])
+        response = self.client.post(
+            reverse('quiz:submit_answer', args=[self.assignments[index].id]),
+            {'answer': answer},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_fresh_row_is_served_without_writes(self):
+        """A clean performance row is returned as stored"""
+        self.submit(0, '4')
+        self.client.get(self.performance_url())
+        performance = StudentPerformance.objects.get(student=self.students[0], quiz=self.quiz)
+        self.assertFalse(performance.is_stale)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.performance_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rank'], 1)
+
+        performance.refresh_from_db()
+        self.assertFalse(performance.is_stale)
+
+    def test_peer_score_change_marks_row_stale(self):
+        """Another student's score change is picked up on the next read"""
+        self.submit(0, 'wrong')
+        self.submit(1, 'wrong')
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.performance_url()).data['rank'], 1)
+
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.post(
+            reverse('quiz:update_question_score', args=[self.assignments[1].id]),
+            {'score': '2.0'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        performance = StudentPerformance.objects.get(student=self.students[0], quiz=self.quiz)
+        self.assertTrue(performance.is_stale)
+
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.get(self.performance_url())
+        self.assertEqual(response.data['rank'], 2)
+
+    def test_repeated_reads_settle(self):
+        """Recomputing a row whose total did not move leaves its peers fresh"""
+        third = User.objects.create_user(
+            username='perf_student2', roll_no='200102', email='perf_student2@test.com',
+            password='password123', is_faculty=False, is_student=True)
+        self.students.append(third)
+        self.assignments.append(
+            QuizAssignment.objects.create(quiz=self.quiz, student=third, question=self.question))
+        self.submit(0, '4')
+        self.submit(1, 'wrong')
+        self.submit(2, '4')
+
+        def read_all():
+            with CaptureQueriesContext(connection) as queries:
+                for student in self.students:
+                    self.client.force_authenticate(user=student)
+                    self.assertEqual(self.client.get(self.performance_url()).status_code, status.HTTP_200_OK)
+            return sum(1 for query in queries if query['sql'].startswith('UPDATE'))
+
+        read_all()
+        read_all()
+        self.assertEqual(read_all(), 0)
+        self.assertFalse(StudentPerformance.objects.filter(quiz=self.quiz, is_stale=True).exists())
+        ranks = StudentPerformance.objects.filter(quiz=self.quiz).order_by('student__roll_no')
+        self.assertEqual([row.rank for row in ranks], [1, 3, 1])
+
+    def test_dashboard_returns_all_quizzes_in_fixed_queries(self):
+        """The dashboard reports progress and standing for every quiz at once"""
+        second_quiz = Quiz.objects.create(
+            title='Second Quiz',
+            course_id='CS102',
+            topic='Ranking',
+            difficulty='easy',
+            questions_per_student=1,
+            created_by=self.faculty
+        )
+        QuizAssignment.objects.create(quiz=second_quiz, student=self.students[0], question=self.question)
+        self.submit(0, 'wrong')
+        self.submit(1, '4')
+        performance.drain(debounce=0)
+
+        self.client.force_authenticate(user=self.students[0])
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('quiz:student_dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_quizzes'], 2)
+        self.assertEqual(response.data['completed_quizzes'], 1)
+
+        quizzes = {quiz['id']: quiz for quiz in response.data['quizzes']}
+        self.assertTrue(quizzes[self.quiz.id]['is_completed'])
+        self.assertEqual(quizzes[self.quiz.id]['performance']['rank'], 2)
+        self.assertEqual(quizzes[self.quiz.id]['performance']['percentile'], 0)
+        self.assertFalse(quizzes[second_quiz.id]['is_completed'])
+
+
+class PerformanceQueueTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='queue_faculty',
+            roll_no='300001',
+            email='queue_faculty@test.com',
+            password='password123',
+            is_faculty=True,
+            is_student=False
+        )
+        self.quiz = Quiz.objects.create(
+            title='Queue Quiz',
+            course_id='CS101',
+            topic='Queues',
+            difficulty='easy',
+            questions_per_student=3,
+            created_by=self.faculty
+        )
+        self.questions = [
+            Question.objects.create(
+                text=f'Queue question {i}',
+                topic='Queues',
+                difficulty='easy',
+                type='short_answer',
+                correct_answer=['fifo'],
+                max_score=1.0,
+                created_by=self.faculty,
+                quiz=self.quiz
+            )
+            for i in range(3)
+        ]
+        self.students = [
+            User.objects.create_user(
+                username=f'queue_student{i}',
+                roll_no=f'30010{i}',
+                email=f'queue_student{i}@test.com',
+                password='password123',
+                is_student=True
+            )
+            for i in range(3)
+        ]
+
+    def answer_all(self, student, correct):
+        for question in self.questions[:correct]:
+            QuizAssignment.objects.create(
+                quiz=self.quiz, student=student, question=question,
+                student_answer='fifo', completed=True
+            )
+
+    def test_submissions_upsert_score_delta(self):
+        """Each graded save adds its score to the row and marks it for re-ranking"""
+        self.answer_all(self.students[0], 3)
+        row = StudentPerformance.objects.get(student=self.students[0], quiz=self.quiz)
+        self.assertTrue(row.is_stale)
+        self.assertEqual(row.total_score, 3)
+        self.assertIsNone(row.rank)
+
+    def test_regrade_applies_only_the_difference(self):
+        """Changing a graded score adjusts the total without double counting"""
+        self.answer_all(self.students[0], 2)
+        assignment = QuizAssignment.objects.filter(student=self.students[0]).first()
+        assignment.score = 0.5
+        assignment.save()
+
+        row = StudentPerformance.objects.get(student=self.students[0], quiz=self.quiz)
+        self.assertEqual(row.total_score, 1.5)
+
+        # Saving again without a score change leaves the total alone
+        assignment = QuizAssignment.objects.get(pk=assignment.pk)
+        assignment.save()
+        row.refresh_from_db()
+        self.assertEqual(row.total_score, 1.5)
+
+    def test_drain_recomputes_quiz_in_one_pass(self):
+        """Many marks collapse into one recomputation per quiz"""
+        for i, student in enumerate(self.students):
+            self.answer_all(student, i + 1)
+
+        with self.assertNumQueries(6):
+            quizzes, rows = performance.drain(debounce=0)
+        self.assertEqual((quizzes, rows), (1, 3))
+        self.assertEqual(performance.pending_count(), 0)
+
+        rows = StudentPerformance.objects.filter(quiz=self.quiz).order_by('rank')
+        self.assertEqual([row.student_id for row in rows], [s.id for s in reversed(self.students)])
+        self.assertEqual([float(row.total_score) for row in rows], [3.0, 2.0, 1.0])
+        self.assertEqual([round(float(row.percentile), 2) for row in rows], [66.67, 33.33, 0.0])
+
+    def test_debounce_defers_recent_marks(self):
+        """Rows touched inside the debounce window wait for the next pass"""
+        self.answer_all(self.students[0], 1)
+        self.assertEqual(performance.drain(debounce=60), (0, 0))
+        self.assertEqual(performance.pending_count(), 1)
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from quiz import purge
+from quiz.models import Question, Quiz, QuizAssignment, StudentPerformance
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class SoftDeleteTests(SubmissionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.submit(self.assignments[0], 'L0')
+
+    def delete_quiz(self):
+        self.client.force_authenticate(user=self.faculty)
+        response = self.client.delete(reverse('quiz:delete_quiz', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.student)
+
+    def test_delete_hides_the_quiz_immediately(self):
+        self.delete_quiz()
+
+        self.assertFalse(Quiz.objects.filter(id=self.quiz.id).exists())
+        self.assertEqual(QuizAssignment.objects.filter(quiz_id=self.quiz.id).count(), 2)
+        self.assertEqual(self.client.get(reverse('quiz:student_quizzes')).data, [])
+        self.assertEqual(self.client.get(reverse('quiz:student_performance')).data, [])
+        response = self.client.get(reverse('quiz:quiz_questions', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.submit(self.assignments[1], 'L1')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_purge_removes_rows_in_batches(self):
+        self.delete_quiz()
+        self.assertEqual(list(purge.pending()), [Quiz.all_objects.get(id=self.quiz.id)])
+
+        progress = []
+        deleted = purge.purge_quiz(
+            Quiz.all_objects.get(id=self.quiz.id), batch_size=1,
+            progress=lambda model, count: progress.append((model.__name__, count)))
+
+        self.assertEqual((deleted['QuizAssignment'], deleted['Question']), (2, 2))
+        self.assertIn(('QuizAssignment', 1), progress)
+        self.assertFalse(Quiz.all_objects.filter(id=self.quiz.id).exists())
+        self.assertFalse(Question.objects.filter(quiz_id=self.quiz.id).exists())
+        self.assertFalse(StudentPerformance.objects.filter(quiz_id=self.quiz.id).exists())
+
+    def test_command_purges_pending_quizzes(self):
+        self.delete_quiz()
+        call_command('purge_deleted_quizzes', '--once', '--pause', '0', stdout=StringIO())
+        self.assertFalse(purge.pending().exists())
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from backend.db_router import (
+    ReplicaStickinessMiddleware, is_pinned, pin_to_primary, replica_reads
+)
+from authentication.models import User
+from quiz.models import StudentPerformance
+
+REPLICA_ALIAS = 'replica'
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reads_use_the_primary_by_default(self):
+        with override_settings(REPLICA_DATABASE=REPLICA_ALIAS):
+            self.assertEqual(router.db_for_read(StudentPerformance), DEFAULT_DB_ALIAS)
+        # Without a replica configured the annotation is a no-op
+        with replica_reads():
+            self.assertEqual(router.db_for_read(StudentPerformance), DEFAULT_DB_ALIAS)
+
+    @override_settings(REPLICA_DATABASE=REPLICA_ALIAS)
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(StudentPerformance), REPLICA_ALIAS)
+            self.assertEqual(router.db_for_write(StudentPerformance), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(StudentPerformance), DEFAULT_DB_ALIAS)
+
+    @override_settings(REPLICA_DATABASE=REPLICA_ALIAS)
+    def test_writers_are_pinned_to_the_primary(self):
+        user = User(pk=41)
+
+        def submit(request):
+            request.user = user
+            router.db_for_write(StudentPerformance)
+            return HttpResponse()
+
+        @replica_reads()
+        def report(request):
+            return router.db_for_read(StudentPerformance)
+
+        request = RequestFactory().get('/')
+        request.user = user
+        self.assertEqual(report(request), REPLICA_ALIAS)
+
+        ReplicaStickinessMiddleware(submit)(RequestFactory().post('/'))
+        self.assertTrue(is_pinned(user.pk))
+        self.assertEqual(report(request), DEFAULT_DB_ALIAS)
+
+        # Other users still read from the replica
+        request.user = User(pk=42)
+        self.assertEqual(report(request), REPLICA_ALIAS)
+
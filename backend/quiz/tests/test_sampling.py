@@ -0,0 +1,80 @@
+import random
+from collections import Counter
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from authentication.models import User
+from quiz import sampling
+from quiz.models import Question, Quiz, QuizAssignment
+
+
+class BankIndexTests(APITestCase):
+    def test_papers_follow_the_quotas_and_differ(self):
+        rows = [('Graphs', 'easy', i) for i in range(20)] + [('Graphs', 'hard', 100 + i) for i in range(5)]
+        index = sampling.BankIndex(rows)
+        papers = index.draw_papers([('Graphs', 'easy', 3), ('Graphs', 'hard', 2)], 50, random.Random(7))
+
+        self.assertEqual(len(papers), 50)
+        for paper in papers:
+            self.assertEqual(len(set(paper)), 5)
+            self.assertEqual(sum(question_id >= 100 for question_id in paper), 2)
+        self.assertEqual(len({frozenset(paper) for paper in papers}), 50)
+
+        with self.assertRaises(sampling.QuotaError):
+            index.check([('Graphs', 'hard', 6)])
+
+
+class QuotaQuizTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='bank_faculty', roll_no='920001', email='bank_faculty@test.com',
+            password='password123', is_faculty=True, is_student=False, is_active=True)
+        self.students = [
+            User.objects.create_user(
+                username=f'bank_student{i}', roll_no=f'92010{i}', email=f'bank_student{i}@test.com',
+                password='password123', is_student=True, is_active=True)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.faculty)
+        for difficulty, count in (('easy', 6), ('hard', 3)):
+            for i in range(count):
+                response = self.client.post(reverse('quiz:question_bank'), {
+                    'text': f'{difficulty} graph question {i}', 'topic': 'Graphs', 'difficulty': difficulty,
+                    'type': 'short_answer', 'correct_answer': ['yes'], 'max_score': 1.0,
+                }, format='json')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def create_quiz(self, quotas):
+        return self.client.post(reverse('quiz:create_quiz'), {
+            'title': 'Bank Quiz', 'course_id': 'CS201', 'topic': 'Graphs', 'difficulty': 'medium',
+            'questions_per_student': 1, 'quotas': quotas,
+        }, format='json')
+
+    def test_bank_lists_strata(self):
+        response = self.client.get(reverse('quiz:question_bank'))
+        self.assertEqual(response.data, [
+            {'topic': 'Graphs', 'difficulty': 'easy', 'count': 6},
+            {'topic': 'Graphs', 'difficulty': 'hard', 'count': 3},
+        ])
+
+    def test_each_student_draws_a_paper_from_the_quotas(self):
+        response = self.create_quiz([
+            {'topic': 'Graphs', 'difficulty': 'easy', 'count': 3},
+            {'topic': 'Graphs', 'difficulty': 'hard', 'count': 2},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        quiz = Quiz.objects.get(id=response.data['id'])
+        self.assertEqual((quiz.questions_per_student, str(quiz.total_score)), (5, '5.00'))
+
+        for student in self.students:
+            drawn = Counter(QuizAssignment.objects.filter(quiz=quiz, student=student)
+                            .values_list('question__difficulty', flat=True))
+            self.assertEqual(drawn, {'easy': 3, 'hard': 2})
+        # Bank questions stay in the bank
+        self.assertFalse(Question.objects.filter(quiz=quiz).exists())
+
+    def test_quota_larger_than_the_bank_is_rejected(self):
+        response = self.create_quiz([{'topic': 'Graphs', 'difficulty': 'hard', 'count': 4}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quotas', response.data)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from quiz import schedule
+from quiz.models import Quiz
+from quiz.tests.test_submission import SubmissionTestCase
+
+
+class ScheduleIndexTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        hour = timedelta(hours=1)
+        self.index = schedule.ScheduleIndex([
+            (1, False, None, None),
+            (2, True, self.now - hour, self.now + hour),
+            (3, True, self.now + hour, self.now + 2 * hour),
+            (4, True, self.now - 2 * hour, self.now - hour),
+            (5, True, None, None),
+        ])
+
+    def test_open_quizzes_now(self):
+        self.assertEqual(self.index.open_quiz_ids(self.now), {1, 2})
+        self.assertEqual(self.index.open_quiz_ids(self.now + timedelta(hours=1.5)), {1, 3})
+
+    def test_window_bounds_are_inclusive(self):
+        start, end = self.index.windows[3]
+        self.assertTrue(self.index.is_open(3, start))
+        self.assertTrue(self.index.is_open(3, end))
+        self.assertIn(3, self.index.open_quiz_ids(end))
+        self.assertNotIn(3, self.index.open_quiz_ids(end + timedelta(microseconds=1)))
+
+    def test_lookup_agrees_with_open_set(self):
+        for quiz_id in range(1, 5):
+            self.assertEqual(
+                self.index.is_open(quiz_id, self.now),
+                quiz_id in self.index.open_quiz_ids(self.now)
+            )
+        self.assertFalse(self.index.is_open(5, self.now))
+        self.assertFalse(self.index.has_started(3, self.now))
+
+
+class ScheduleEnforcementTests(SubmissionTestCase):
+    def schedule_quiz(self, start, end):
+        self.quiz.is_scheduled = True
+        self.quiz.scheduled_start_time = start
+        self.quiz.scheduled_end_time = end
+        self.quiz.save()
+
+    def test_lookups_skip_the_database_until_a_quiz_changes(self):
+        schedule.get_index()
+        with self.assertNumQueries(0):
+            self.assertTrue(schedule.is_open(self.quiz.id))
+
+        self.schedule_quiz(timezone.now() + timedelta(hours=1), timezone.now() + timedelta(hours=2))
+        self.assertFalse(schedule.is_open(self.quiz.id))
+
+    def test_closed_quiz_rejects_submissions(self):
+        self.schedule_quiz(timezone.now() - timedelta(hours=2), timezone.now() - timedelta(hours=1))
+        response = self.submit(self.assignments[0], 'L0')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_questions_hidden_before_start(self):
+        self.schedule_quiz(timezone.now() + timedelta(hours=1), timezone.now() + timedelta(hours=2))
+        response = self.client.get(reverse('quiz:quiz_questions', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(reverse('quiz:student_quizzes'))
+        self.assertFalse(response.data[0]['is_available'])
@@ -172,7 +172,20 @@ class AdvancedScoringTests(APITestCase):
         expected_percentiles = [80.0, 60.0, 40.0, 20.0, 0.0]
         for i, perf in enumerate(response.data):
             self.assertAlmostEqual(float(perf['percentile']), expected_percentiles[i], places=1)
-    
+
+    def test_student_rankings_do_not_write(self):
+        """Rankings are read-only, so they can be served from a replica"""
+        self.client.force_authenticate(user=self.faculty)
+        for student in self.students:
+            StudentPerformance.objects.get_or_create(student=student, quiz=self.quiz)
+        stored = list(StudentPerformance.objects.filter(quiz=self.quiz).values_list('rank', 'percentile'))
+
+        response = self.client.get(reverse('quiz:student_rankings', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([perf['rank'] for perf in response.data], [1, 2, 3, 4, 5])
+        self.assertEqual(
+            list(StudentPerformance.objects.filter(quiz=self.quiz).values_list('rank', 'percentile')), stored)
+
     def test_invalid_scores(self):
         """Test handling of invalid scores"""
         # Test with auth as faculty
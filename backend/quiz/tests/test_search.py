@@ -0,0 +1,61 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from authentication.models import User
+from quiz import search
+from quiz.models import Question, Quiz
+
+
+class InvertedIndexTests(APITestCase):
+    def test_all_terms_must_match(self):
+        index = search.InvertedIndex([
+            (1, 'Shortest path in a weighted graph', 'Graphs'),
+            (2, 'Is every tree a graph?', 'Graphs'),
+            (3, 'Dijkstra finds the shortest path', 'Graphs'),
+            (4, 'Sort an array', 'Sorting'),
+        ])
+        self.assertEqual(set(index.search('shortest path')), {1, 3})
+        self.assertEqual(set(index.search('weighted graph')), {1})
+        self.assertEqual(set(index.search('graph dijkstra')), set())
+        self.assertEqual(index.search('the'), {})
+
+
+class SearchEndpointTests(APITestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='search_faculty', roll_no='930001', email='search_faculty@test.com',
+            password='password123', is_faculty=True, is_student=False, is_active=True)
+        other = User.objects.create_user(
+            username='search_other', roll_no='930002', email='search_other@test.com',
+            password='password123', is_faculty=True, is_student=False, is_active=True)
+        other_quiz = Quiz.objects.create(
+            title='Private', course_id='CS1', topic='Graphs', difficulty='easy',
+            questions_per_student=1, created_by=other)
+        for i, (text, difficulty) in enumerate([
+            ('Explain breadth first search on a graph', 'easy'),
+            ('Graph colouring with graph theory', 'hard'),
+            ('Binary search on a sorted array', 'easy'),
+        ]):
+            Question.objects.create(text=text, topic='Algorithms', difficulty=difficulty,
+                                    type='short_answer', created_by=self.faculty)
+        Question.objects.create(text='A graph question in a private quiz', topic='Graphs',
+                                difficulty='easy', created_by=other, quiz=other_quiz)
+        self.client.force_authenticate(user=self.faculty)
+
+    def test_ranked_filtered_and_paginated(self):
+        url = reverse('quiz:search_questions')
+        response = self.client.get(url, {'q': 'graph'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([r['text'] for r in response.data['results']],
+                         ['Graph colouring with graph theory', 'Explain breadth first search on a graph'])
+
+        response = self.client.get(url, {'q': 'graph', 'difficulty': 'easy'})
+        self.assertEqual([r['difficulty'] for r in response.data['results']], ['easy'])
+
+        response = self.client.get(url, {'q': 'search', 'page': 2, 'page_size': 1})
+        self.assertEqual((response.data['count'], len(response.data['results'])), (2, 1))
+
+    def test_requires_a_query(self):
+        self.assertEqual(self.client.get(reverse('quiz:search_questions')).status_code,
+                         status.HTTP_400_BAD_REQUEST)
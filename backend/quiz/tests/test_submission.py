@@ -0,0 +1,219 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz import autosave, idempotency
+from quiz.models import Question, Quiz, QuizAssignment
+from authentication.models import User
+
+
+class SubmissionTestCase(APITestCase):
+    def setUp(self):
+        # Ids are reused once the test database rolls back; buffered state must not be
+        cache.clear()
+        self.faculty = User.objects.create_user(
+            username='submit_faculty',
+            roll_no='400001',
+            email='submit_faculty@test.com',
+            password='password123',
+            is_faculty=True,
+            is_student=False
+        )
+        self.student = User.objects.create_user(
+            username='submit_student',
+            roll_no='400002',
+            email='submit_student@test.com',
+            password='password123',
+            is_faculty=False,
+            is_student=True
+        )
+        self.quiz = Quiz.objects.create(
+            title='Submission Quiz',
+            course_id='CS101',
+            topic='Networks',
+            difficulty='easy',
+            questions_per_student=2,
+            created_by=self.faculty
+        )
+        self.questions = [
+            Question.objects.create(
+                text=f'Layer {i}?',
+                topic='Networks',
+                difficulty='easy',
+                type='short_answer',
+                correct_answer=[f'L{i}'],
+                max_score=1.0,
+                created_by=self.faculty,
+                quiz=self.quiz
+            )
+            for i in range(2)
+        ]
+        self.assignments = [
+            QuizAssignment.objects.create(quiz=self.quiz, student=self.student, question=question)
+            for question in self.questions
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def submit(self, assignment, answer, **extra):
+        return self.client.post(
+            reverse('quiz:submit_answer', args=[assignment.id]),
+            {'answer': answer},
+            format='json',
+            **extra
+        )
+
+
+class IdempotentSubmissionTests(SubmissionTestCase):
+    def test_retry_replays_stored_response(self):
+        """A retried submission is answered from the store without a write"""
+        first = self.submit(self.assignments[0], 'L0', HTTP_IDEMPOTENCY_KEY='attempt-1')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        submitted_at = QuizAssignment.objects.get(pk=self.assignments[0].pk).submitted_at
+
+        with self.assertNumQueries(0):
+            retry = self.submit(self.assignments[0], 'L0', HTTP_IDEMPOTENCY_KEY='attempt-1')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(
+            QuizAssignment.objects.get(pk=self.assignments[0].pk).submitted_at, submitted_at)
+
+    def test_key_reused_for_different_request(self):
+        """Reusing a key with another payload is rejected"""
+        self.submit(self.assignments[0], 'L0', HTTP_IDEMPOTENCY_KEY='attempt-2')
+        response = self.submit(self.assignments[1], 'L1', HTTP_IDEMPOTENCY_KEY='attempt-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_vanishing_entry_is_claimed_again_not_overwritten(self):
+        """A retry that sees the key expire must not take it from a request that claimed it meanwhile"""
+        assignment = self.assignments[0]
+        cache_key = 'lms:idempotency:' + idempotency._digest(str(self.student.id), 'submit_answer', 'race')
+        fingerprint = idempotency._digest({'assignment_id': assignment.id}, {'answer': 'L0'})[:16]
+        # The concurrent request holding the key
+        cache.set(cache_key, (idempotency.IN_PROGRESS, fingerprint), idempotency.IN_PROGRESS_TTL)
+
+        real_get = cache.get
+        seen = []
+
+        def get(key, *args, **kwargs):
+            if key == cache_key and not seen:
+                seen.append(key)
+                return None
+            return real_get(key, *args, **kwargs)
+
+        with mock.patch.object(idempotency.cache, 'get', side_effect=get):
+            response = self.submit(assignment, 'L0', HTTP_IDEMPOTENCY_KEY='race')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(QuizAssignment.objects.get(pk=assignment.pk).completed)
+
+    def test_keys_are_scoped_per_user(self):
+        """Another student's key never replays this student's response"""
+        other = User.objects.create_user(
+            username='submit_other',
+            roll_no='400003',
+            email='submit_other@test.com',
+            password='password123',
+            is_student=True
+        )
+        self.submit(self.assignments[0], 'L0', HTTP_IDEMPOTENCY_KEY='shared')
+        self.client.force_authenticate(user=other)
+        response = self.submit(self.assignments[0], 'L0', HTTP_IDEMPOTENCY_KEY='shared')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AutosaveTests(SubmissionTestCase):
+    def autosave(self, assignment, answer):
+        return self.client.post(
+            reverse('quiz:autosave_answer', args=[assignment.id]),
+            {'answer': answer},
+            format='json'
+        )
+
+    def test_autosave_is_buffered_and_flushed_in_batch(self):
+        """Drafts skip the database until a flush writes them together"""
+        with self.assertNumQueries(0):
+            for answer in ('L', 'L0', 'L0?'):
+                response = self.autosave(self.assignments[0], answer)
+                self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.autosave(self.assignments[1], 'L1')
+        self.assertEqual(autosave.pending_count(), 2)
+        self.assertIsNone(QuizAssignment.objects.get(pk=self.assignments[0].pk).student_answer)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(autosave.flush(), 2)
+        self.assertEqual(autosave.pending_count(), 0)
+
+        first, second = QuizAssignment.objects.filter(quiz=self.quiz).order_by('id')
+        self.assertEqual((first.student_answer, second.student_answer), ('L0?', 'L1'))
+        self.assertFalse(first.completed or second.completed)
+        self.assertFalse(first.is_graded or second.is_graded)
+
+    def test_colliding_log_positions_keep_both_drafts(self):
+        """Two autosaves handed the same log position are both flushed"""
+        real_incr = cache.incr
+        handed_out = []
+
+        def incr(key, *args, **kwargs):
+            if key != autosave.SEQUENCE_KEY:
+                return real_incr(key, *args, **kwargs)
+            # The second writer reads the sequence before the first writes it back
+            if len(handed_out) == 1:
+                handed_out.append(handed_out[0])
+            else:
+                handed_out.append(real_incr(key, *args, **kwargs))
+            return handed_out[-1]
+
+        with mock.patch.object(autosave.cache, 'incr', side_effect=incr):
+            self.autosave(self.assignments[0], 'L0')
+            self.autosave(self.assignments[1], 'L1')
+        self.assertEqual(handed_out, [1, 1, 2])
+
+        self.assertEqual(autosave.flush(), 2)
+        first, second = QuizAssignment.objects.filter(quiz=self.quiz).order_by('id')
+        self.assertEqual((first.student_answer, second.student_answer), ('L0', 'L1'))
+
+    def test_unlogged_draft_is_logged_by_its_next_autosave(self):
+        """A draft that found no free log position is not left marked as queued"""
+        with mock.patch.object(autosave, '_log', return_value=False):
+            self.autosave(self.assignments[0], 'L')
+        self.autosave(self.assignments[0], 'L0')
+
+        self.assertEqual(autosave.flush(), 1)
+        self.assertEqual(QuizAssignment.objects.get(pk=self.assignments[0].pk).student_answer, 'L0')
+
+    def test_submit_grades_latest_draft_and_ignores_late_flush(self):
+        """Only the final submit grades, and a stale draft never overwrites it"""
+        self.autosave(self.assignments[0], 'L0')
+        response = self.client.post(
+            reverse('quiz:submit_answer', args=[self.assignments[0].id]), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        assignment = QuizAssignment.objects.get(pk=self.assignments[0].pk)
+        self.assertTrue(assignment.completed)
+        self.assertEqual(assignment.score, 1)
+
+        autosave.save_draft(assignment.id, self.student.id, 'changed')
+        self.assertEqual(autosave.flush(), 0)
+        self.assertEqual(QuizAssignment.objects.get(pk=assignment.pk).student_answer, 'L0')
+
+    def test_draft_of_another_student_is_not_written(self):
+        """Autosaving someone else's assignment never reaches their row"""
+        other = User.objects.create_user(
+            username='autosave_other',
+            roll_no='400004',
+            email='autosave_other@test.com',
+            password='password123',
+            is_student=True
+        )
+        self.autosave(self.assignments[0], 'L0')
+        self.client.force_authenticate(user=other)
+        self.autosave(self.assignments[0], 'mine')
+
+        # The owner's draft survives and is the only one written
+        self.assertEqual(autosave.get_drafts([self.assignments[0].id], self.student.id),
+                         {self.assignments[0].id: 'L0'})
+        self.assertEqual(autosave.flush(), 1)
+        self.assertEqual(QuizAssignment.objects.get(pk=self.assignments[0].pk).student_answer, 'L0')
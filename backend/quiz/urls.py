@@ -1,14 +1,21 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'quiz'
 
 urlpatterns = [
     path('create/', views.create_quiz, name='create_quiz'),
     path('faculty/quizzes/', views.get_faculty_quizzes, name='faculty_quizzes'),
+    path('bank/questions/', views.question_bank, name='question_bank'),
+    path('bank/search/', views.search_questions, name='search_questions'),
+    path('bank/import/', views.import_questions, name='import_questions'),
+    path('bank/duplicates/', views.question_duplicates, name='question_duplicates'),
     path('student/quizzes/', views.get_student_quizzes, name='student_quizzes'),
+    path('student/dashboard/', views.get_student_dashboard, name='student_dashboard'),
     path('student/quiz/<int:quiz_id>/questions/', views.get_quiz_questions, name='quiz_questions'),
+    path('student/quiz/<int:quiz_id>/start/', views.start_quiz_attempt, name='start_quiz_attempt'),
     path('student/assignment/<int:assignment_id>/submit/', views.submit_answer, name='submit_answer'),
+    path('student/assignment/<int:assignment_id>/autosave/', views.autosave_answer, name='autosave_answer'),
     path('quiz/<int:quiz_id>/', views.quiz_detail_and_edit, name='quiz_detail_and_edit'),
     path('quiz/<int:quiz_id>/delete/', views.delete_quiz, name='delete_quiz'),
     path('quiz/<int:quiz_id>/results/', views.get_quiz_results, name='quiz_results'),
@@ -20,4 +27,13 @@ urlpatterns = [
     path('quiz/<int:quiz_id>/rankings/', views.get_student_rankings, name='student_rankings'),
     path('assignment/<int:assignment_id>/score/', views.update_question_score, name='update_question_score'),
     path('quiz/<int:quiz_id>/performance/', views.get_student_quiz_performance, name='student_quiz_performance'),
+
+    # Async versions of the hot student endpoints, for deployments served over ASGI
+    path('async/student/quizzes/', async_views.get_student_quizzes, name='async_student_quizzes'),
+    path('async/student/quiz/<int:quiz_id>/questions/', async_views.get_quiz_questions, name='async_quiz_questions'),
+    path('async/student/assignment/<int:assignment_id>/submit/', async_views.submit_answer, name='async_submit_answer'),
+    path('async/student/performance/', async_views.get_student_performance, name='async_student_performance'),
+    path('async/student/performance/<int:quiz_id>/', async_views.get_student_performance, name='async_student_quiz_performance'),
+    path('quiz/<int:quiz_id>/live/', async_views.quiz_live_stream, name='quiz_live_stream'),
+    path('quiz/<int:quiz_id>/live/ticket/', views.quiz_live_ticket, name='quiz_live_ticket'),
 ]
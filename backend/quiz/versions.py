@@ -0,0 +1,124 @@
+"""
+Cheap version counters used to build ETags for the read-heavy endpoints.
+
+Every write that changes what a student or faculty member would see bumps the
+matching counter in the cache, so checking ``If-None-Match`` only needs a
+couple of cache reads instead of re-querying the assignment tables.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers, quote_etag
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# Counters live until they are bumped again; a missing counter is re-seeded
+# from the clock so a value can never repeat after a cache eviction.
+VERSION_TIMEOUT = None
+
+CATALOG = 'catalog'
+BANK = 'bank'
+QUESTIONS = 'questions'
+
+
+def _key(scope, object_id=None):
+    if object_id is None:
+        return f'lms:version:{scope}'
+    return f'lms:version:{scope}:{object_id}'
+
+
+def _seed():
+    return time.time_ns()
+
+
+def get_versions(*keys):
+    """Return the current counters for the given (scope, id) pairs"""
+    cache_keys = [_key(*key) for key in keys]
+    found = cache.get_many(cache_keys)
+    missing = {k: _seed() for k in cache_keys if k not in found}
+    if missing:
+        for k, value in missing.items():
+            cache.add(k, value, VERSION_TIMEOUT)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(k, 0) for k in cache_keys]
+
+
+def bump(*keys):
+    """Invalidate every ETag derived from the given (scope, id) pairs"""
+    for key in keys:
+        cache_key = _key(*key)
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            cache.add(cache_key, _seed(), VERSION_TIMEOUT)
+
+
+def quiz_key(quiz_id):
+    return ('quiz', quiz_id)
+
+
+def student_key(student_id):
+    return ('student', student_id)
+
+
+def faculty_key(user_id):
+    return ('faculty', user_id)
+
+
+def catalog_key():
+    return (CATALOG,)
+
+
+def bank_key():
+    return (BANK,)
+
+
+def questions_key():
+    return (QUESTIONS,)
+
+
+def make_etag(name, *keys):
+    """Build a strong ETag for endpoint ``name`` from the given counters"""
+    versions = get_versions(*keys)
+    raw = ':'.join([name] + [str(v) for v in versions])
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def is_not_modified(request, etag):
+    """Whether the request's ``If-None-Match`` already covers ``etag``"""
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+def add_validators(response, etag):
+    # Let the browser keep the payload but revalidate it on every use
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional(etag_func):
+    """
+    Answer ``If-None-Match`` with a 304 when ``etag_func`` returns a matching
+    validator. Must sit below ``@api_view`` so the request is authenticated.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            etag = etag_func(request, *args, **kwargs)
+            if etag is None:
+                return view(request, *args, **kwargs)
+
+            if is_not_modified(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            return add_validators(response, etag)
+        return wrapped
+    return decorator
@@ -6,19 +6,139 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.db import connection, transaction
 from django.contrib.auth import get_user_model
-from .models import Quiz, QuizAssignment, Question, StudentPerformance
+from .models import Quiz, QuizArchive, QuizAssignment, QuizAttempt, Question, QuestionSignature, StudentPerformance
 from .serializers import QuestionSerializer, QuizSerializer, StudentPerformanceSerializer
+from . import archive, autosave, importers, live, sampling, schedule, search, versions
+from .idempotency import idempotent
+from backend.db_router import replica_reads
 import logging
 import json
 from django.utils import timezone
-from django.db.models import Q, Sum, Count
+from django.db.models import F, Q, Sum, Count
 import random
+import zipfile
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 # Create your views here.
 
+def _faculty_quizzes_etag(request):
+    if not request.user.is_faculty:
+        return None
+    return versions.make_etag('faculty_quizzes', versions.faculty_key(request.user.id))
+
+def _student_quizzes_etag(request):
+    if not request.user.is_student:
+        return None
+    # The schedule segment changes whenever any quiz window opens or closes
+    return versions.make_etag(
+        f'student_quizzes:{schedule.get_index().segment()}',
+        versions.student_key(request.user.id), versions.catalog_key())
+
+def _student_performance_etag(request, quiz_id=None):
+    if not request.user.is_student or not quiz_id:
+        return None
+    return versions.make_etag(
+        'student_performance', versions.student_key(request.user.id), versions.quiz_key(quiz_id))
+
+def _quiz_questions_etag(request, quiz_id):
+    if not request.user.is_student:
+        return None
+    return versions.make_etag(
+        'quiz_questions', versions.student_key(request.user.id), versions.quiz_key(quiz_id))
+
+def _rankings_etag(request, quiz_id):
+    if not request.user.is_faculty:
+        return None
+    return versions.make_etag('rankings', versions.quiz_key(quiz_id))
+
+def _quiz_summary(quiz, index):
+    return {
+        'id': quiz.id,
+        'title': quiz.title,
+        'course_id': quiz.course_id,
+        'topic': quiz.topic,
+        'difficulty': quiz.difficulty,
+        'created_at': quiz.created_at,
+        'total_questions': quiz.questions_per_student,
+        'completed_questions': 0,
+        'is_completed': False,
+        'is_available': index.is_open(quiz.id),
+        'closes_at': index.closes_at(quiz.id)
+    }
+
+def _student_quiz_list(assignments, index, archives=()):
+    """Summaries of the student's quizzes, grouped from their assignments and archived quizzes"""
+    # Group by quiz
+    quizzes = {}
+    for assignment in assignments:
+        quiz_id = assignment.quiz.id
+        if quiz_id not in quizzes:
+            quizzes[quiz_id] = _quiz_summary(assignment.quiz, index)
+            
+        if assignment.completed:
+            quizzes[quiz_id]['completed_questions'] += 1
+                
+        if quizzes[quiz_id]['completed_questions'] == quizzes[quiz_id]['total_questions']:
+            quizzes[quiz_id]['is_completed'] = True
+    
+    for record in archives:
+        summary = _quiz_summary(record.quiz, index)
+        summary['completed_questions'] = record.completed_count
+        summary['is_completed'] = record.completed_count == summary['total_questions']
+        quizzes[record.quiz_id] = summary
+        
+    return list(quizzes.values())
+
+def _question_list(request, assignments, drafts):
+    questions = []
+    for assignment in assignments:
+        question = assignment.question
+        image_url = None
+        if question.image:
+            try:
+                image_url = request.build_absolute_uri(question.image.url)
+                logger.info(f"Image URL for question {question.id}: {image_url}")
+            except Exception as e:
+                logger.error(f"Error building image URL for question {question.id}: {str(e)}")
+            
+        questions.append({
+            'assignment_id': assignment.id,
+            'question_text': question.text,
+            'type': question.type,
+            'options': question.options,
+            'image': image_url,
+            'is_completed': assignment.completed,
+            'student_answer': assignment.student_answer if assignment.completed else None,
+            'score': assignment.score if assignment.completed else None,
+            'draft_answer': None if assignment.completed else drafts.get(
+                assignment.id, assignment.student_answer)
+        })
+        
+    return questions
+
+def _performance_data(performance):
+    return {
+        'total_score': str(performance.total_score),
+        'max_possible_score': str(performance.max_possible_score),
+        'rank': performance.rank,
+        'percentile': float(performance.percentile) if performance.percentile else None
+    }
+
+def _complete_submission(assignment, attempt, answer):
+    # Update assignment; saving it queues the performance recomputation
+    assignment.student_answer = answer
+    assignment.completed = True
+    assignment.submitted_at = timezone.now()
+    assignment.save()
+    autosave.discard_draft(assignment.id, assignment.student_id)
+    
+    if not QuizAssignment.objects.filter(
+        quiz_id=assignment.quiz_id, student_id=assignment.student_id, completed=False
+    ).exists():
+        attempt.finish()
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_quiz(request, quiz_id):
@@ -27,7 +147,8 @@ def delete_quiz(request, quiz_id):
         quiz = Quiz.objects.get(id=quiz_id)
         if not request.user.is_faculty or quiz.created_by.id != request.user.id:
             return Response({"error": "You can only delete quizzes you created."}, status=status.HTTP_403_FORBIDDEN)
-        quiz.delete()
+        # Hidden at once; purge_deleted_quizzes removes its rows in the background
+        quiz.mark_deleted()
         return Response({"success": True, "message": "Quiz deleted."})
     except Quiz.DoesNotExist:
         return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -47,17 +168,26 @@ def create_quiz(request):
         if serializer.is_valid():
             quiz = serializer.save()
             User = get_user_model()
-            students = User.objects.filter(is_student=True, is_active=True)
+            students = list(User.objects.filter(is_student=True, is_active=True).values_list('id', flat=True))
             questions = list(quiz.questions.all())
+            quotas = sampling.quota_triples(quiz.quotas.all())
             # Assign questions to students (fixes 0/0 completed issue)
             assignments = []
-            import random
-            for student in students:
-                random.shuffle(questions)
-                assigned_questions = questions[:quiz.questions_per_student]
-                for question in assigned_questions:
-                    assignments.append(QuizAssignment(quiz=quiz, student=student, question=question))
-            QuizAssignment.objects.bulk_create(assignments)
+            if quotas:
+                # Each student gets their own paper drawn from the bank
+                papers = sampling.get_index().draw_papers(quotas, len(students))
+                for student_id, paper in zip(students, papers):
+                    for question_id in paper:
+                        assignments.append(QuizAssignment(quiz=quiz, student_id=student_id, question_id=question_id))
+            else:
+                import random
+                for student_id in students:
+                    random.shuffle(questions)
+                    assigned_questions = questions[:quiz.questions_per_student]
+                    for question in assigned_questions:
+                        assignments.append(QuizAssignment(quiz=quiz, student_id=student_id, question=question))
+            QuizAssignment.objects.bulk_create(assignments, batch_size=1000)
+            versions.bump(versions.faculty_key(request.user.id), versions.catalog_key())
             
             # Get serialized questions
             question_serializer = QuestionSerializer(questions, many=True)
@@ -80,8 +210,146 @@ def create_quiz(request):
         logger.error(f"Error creating quiz: {str(e)}")
         return Response({"error": "Failed to create quiz. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET', 'POST'])
+@parser_classes([MultiPartParser, FormParser, JSONParser])
+@permission_classes([IsAuthenticated])
+def question_bank(request):
+    """GET: bank question counts per topic and difficulty; POST: add a question to the bank"""
+    try:
+        if not request.user.is_faculty:
+            return Response({"error": "Only faculty members can use the question bank"}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == 'GET':
+            strata = sampling.get_index().strata
+            return Response([
+                {'topic': topic, 'difficulty': difficulty, 'count': len(ids)}
+                for (topic, difficulty), ids in sorted(strata.items())
+            ])
+
+        data = request.data.copy()
+        data['created_by'] = request.user.id
+        data.pop('quiz', None)
+        serializer = QuestionSerializer(data=data)
+        if serializer.is_valid():
+            question = serializer.save(quiz=None)
+            data = QuestionSerializer(question).data
+            signature = QuestionSignature.objects.filter(question=question).first()
+            data['duplicate_of'] = signature.duplicate_of_id if signature else None
+            data['similarity'] = signature.similarity if signature else None
+            return Response(data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=400)
+    except Exception as e:
+        logger.error(f"Error in question_bank: {str(e)}")
+        return Response({"error": "Failed to process question bank request. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+@permission_classes([IsAuthenticated])
+def import_questions(request):
+    """Bulk import questions from a CSV, JSON Lines or Moodle XML file, with images in a zip"""
+    try:
+        if not request.user.is_faculty:
+            return Response({"error": "Only faculty members can import questions"}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or importers.detect_format(upload.name)
+        if file_format not in importers.FORMATS:
+            return Response({"error": f"format must be one of {', '.join(importers.FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Into the bank unless one of the faculty member's quizzes is given
+        quiz = None
+        if request.data.get('quiz_id'):
+            try:
+                quiz_id = int(request.data['quiz_id'])
+            except ValueError:
+                return Response({"error": "quiz_id must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+            quiz = Quiz.objects.filter(id=quiz_id, created_by=request.user).first()
+            if quiz is None:
+                return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            report = importers.import_questions(
+                upload.file, file_format, request.user, quiz=quiz,
+                images=request.FILES.get('images'),
+                dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true'),
+            )
+        except zipfile.BadZipFile:
+            return Response({"error": "images must be a zip archive"}, status=status.HTTP_400_BAD_REQUEST)
+        # A dry run creates nothing, however many rows were valid
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error importing questions: {str(e)}")
+        return Response({"error": "Failed to import questions. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def question_duplicates(request):
+    """Bank questions flagged as near-duplicates of an earlier one, most similar first"""
+    try:
+        if not request.user.is_faculty:
+            return Response({"error": "Only faculty members can review duplicate questions"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), search.MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "page and page_size must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        flagged = QuestionSignature.objects.filter(duplicate_of__isnull=False, question__quiz__isnull=True)
+        if request.query_params.get('topic'):
+            flagged = flagged.filter(question__topic=request.query_params['topic'])
+        offset = (page - 1) * page_size
+        signatures = flagged.select_related('question', 'duplicate_of').order_by(
+            '-similarity', 'question_id')[offset:offset + page_size]
+        results = [
+            {
+                'question': QuestionSerializer(signature.question).data,
+                'duplicate_of': QuestionSerializer(signature.duplicate_of).data,
+                'similarity': round(signature.similarity, 4),
+            }
+            for signature in signatures
+        ]
+        return Response({'count': flagged.count(), 'page': page, 'page_size': page_size, 'results': results})
+    except Exception as e:
+        logger.error(f"Error fetching duplicate questions: {str(e)}")
+        return Response({"error": "Failed to fetch duplicate questions. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_questions(request):
+    """Ranked full-text search over the bank and the faculty member's own quiz questions"""
+    try:
+        if not request.user.is_faculty:
+            return Response({"error": "Only faculty members can search questions"}, status=status.HTTP_403_FORBIDDEN)
+
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), search.MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "page and page_size must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        filters = {
+            field: request.query_params[field]
+            for field in ('topic', 'difficulty', 'type') if request.query_params.get(field)
+        }
+
+        count, questions = search.search(request.user, query, page=page, page_size=page_size, **filters)
+        results = QuestionSerializer(questions, many=True).data
+        for result, question in zip(results, questions):
+            result['rank'] = round(question.rank, 4)
+        return Response({'count': count, 'page': page, 'page_size': page_size, 'results': results})
+    except Exception as e:
+        logger.error(f"Error searching questions: {str(e)}")
+        return Response({"error": "Failed to search questions. Please try again."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@versions.conditional(_faculty_quizzes_etag)
 def get_faculty_quizzes(request):
     """Get all quizzes created by the faculty member"""
     try:
@@ -118,6 +386,7 @@ def get_faculty_quizzes(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versions.conditional(_student_quizzes_etag)
 def get_student_quizzes(request):
     """Get all quizzes assigned to the student"""
     try:
@@ -126,42 +395,97 @@ def get_student_quizzes(request):
                           status=status.HTTP_403_FORBIDDEN)
         
         # Get all quiz assignments for the student
-        assignments = QuizAssignment.objects.filter(student=request.user)
+        live = Q(quiz__deleted_at__isnull=True)
+        assignments = QuizAssignment.objects.filter(live, student=request.user).select_related('quiz')
+        archives = QuizArchive.objects.filter(live, student=request.user).select_related('quiz')
+        index = schedule.get_index()
         
-        # Group by quiz
-        quizzes = {}
-        for assignment in assignments:
-            quiz_id = assignment.quiz.id
-            if quiz_id not in quizzes:
-                quizzes[quiz_id] = {
-                    'id': quiz_id,
-                    'title': assignment.quiz.title,
-                    'course_id': assignment.quiz.course_id,
-                    'topic': assignment.quiz.topic,
-                    'difficulty': assignment.quiz.difficulty,
-                    'created_at': assignment.quiz.created_at,
-                    'total_questions': assignment.quiz.questions_per_student,
-                    'completed_questions': 0,
-                    'is_completed': False
+        return Response(_student_quiz_list(assignments, index, archives))
+    
+    except Exception as e:
+        logger.error(f"Error fetching student quizzes: {str(e)}")
+        return Response(
+            {"error": "Failed to fetch quizzes. Please try again."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_student_dashboard(request):
+    """Get every assigned quiz with progress, score, rank and percentile in one call"""
+    try:
+        if not request.user.is_student:
+            return Response({"error": "Only students can access this endpoint"}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        # Progress counters for every quiz, grouped in the database
+        live = Q(quiz__deleted_at__isnull=True)
+        progress = QuizAssignment.objects.filter(live, student=request.user).values(
+            'quiz_id', 'quiz__title', 'quiz__course_id', 'quiz__topic',
+            'quiz__difficulty', 'quiz__created_at', 'quiz__questions_per_student'
+        ).annotate(
+            completed_questions=Count('id', filter=Q(completed=True))
+        )
+        # Closed quizzes that were archived keep their counts on the archive row
+        archived = QuizArchive.objects.filter(live, student=request.user).values(
+            'quiz_id', 'quiz__title', 'quiz__course_id', 'quiz__topic',
+            'quiz__difficulty', 'quiz__created_at', 'quiz__questions_per_student',
+            completed_questions=F('completed_count')
+        )
+        progress = progress.union(archived, all=True).order_by('-quiz__created_at')
+        
+        # Stored scores with rank and percentile computed alongside
+        performances = {
+            perf.quiz_id: perf
+            for perf in StudentPerformance.standings_for_student(request.user)
+        }
+        
+        index = schedule.get_index()
+        quizzes = []
+        for row in progress:
+            total_questions = row['quiz__questions_per_student']
+            perf = performances.get(row['quiz_id'])
+            performance = None
+            if perf is not None:
+                performance = {
+                    'total_score': str(perf.total_score),
+                    'max_possible_score': str(perf.max_possible_score),
+                    'rank': perf.scores_above + 1,
+                    'percentile': (perf.scores_below / perf.total_students) * 100 if perf.total_students else None
                 }
             
-            if assignment.completed:
-                quizzes[quiz_id]['completed_questions'] += 1
-                
-            if quizzes[quiz_id]['completed_questions'] == quizzes[quiz_id]['total_questions']:
-                quizzes[quiz_id]['is_completed'] = True
+            quizzes.append({
+                'id': row['quiz_id'],
+                'title': row['quiz__title'],
+                'course_id': row['quiz__course_id'],
+                'topic': row['quiz__topic'],
+                'difficulty': row['quiz__difficulty'],
+                'created_at': row['quiz__created_at'],
+                'total_questions': total_questions,
+                'completed_questions': row['completed_questions'],
+                'is_completed': row['completed_questions'] == total_questions,
+                'is_available': index.is_open(row['quiz_id']),
+                'performance': performance
+            })
         
-        return Response(list(quizzes.values()))
+        completed_quizzes = sum(1 for quiz in quizzes if quiz['is_completed'])
+        return Response({
+            'total_quizzes': len(quizzes),
+            'completed_quizzes': completed_quizzes,
+            'pending_quizzes': len(quizzes) - completed_quizzes,
+            'quizzes': quizzes
+        })
     
     except Exception as e:
-        logger.error(f"Error fetching student quizzes: {str(e)}")
+        logger.error(f"Error fetching student dashboard: {str(e)}")
         return Response(
-            {"error": "Failed to fetch quizzes. Please try again."},
+            {"error": "Failed to fetch dashboard. Please try again."},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versions.conditional(_student_performance_etag)
 def get_student_performance(request, quiz_id=None):
     """Get student's performance across all quizzes or for a specific quiz"""
     try:
@@ -171,38 +495,34 @@ def get_student_performance(request, quiz_id=None):
         
         if quiz_id:
             try:
-                # First check if the quiz exists and is assigned to the student
-                quiz = Quiz.objects.get(id=quiz_id)
-                assignment_exists = QuizAssignment.objects.filter(
-                    quiz=quiz,
-                    student=request.user
-                ).exists()
-                
-                if not assignment_exists:
-                    return Response({"error": "Quiz not assigned to you"}, 
-                                  status=status.HTTP_404_NOT_FOUND)
-                
-                # Get or create performance record
-                performance, created = StudentPerformance.objects.get_or_create(
+                # Serve the stored row; an existing row implies the quiz is assigned
+                performance = StudentPerformance.objects.filter(
                     student=request.user,
-                    quiz=quiz,
-                    defaults={
-                        'total_score': 0,
-                        'max_possible_score': quiz.total_score or 0
-                    }
-                )
+                    quiz_id=quiz_id
+                ).first()
+
+                if performance is None:
+                    # First check if the quiz exists and is assigned to the student
+                    quiz = Quiz.objects.get(id=quiz_id)
+                    if not archive.is_assigned(quiz, request.user):
+                        return Response({"error": "Quiz not assigned to you"}, 
+                                      status=status.HTTP_404_NOT_FOUND)
+                    
+                    performance, created = StudentPerformance.objects.get_or_create(
+                        student=request.user,
+                        quiz=quiz,
+                        defaults={
+                            'total_score': 0,
+                            'max_possible_score': quiz.total_score or 0
+                        }
+                    )
                 
-                # Always update performance to ensure latest data
-                performance.update_performance()
+                # Only recompute when a submission or grade change invalidated the row
+                if performance.is_stale:
+                    performance.update_performance()
                 
                 # Return formatted response
-                data = {
-                    'total_score': str(performance.total_score),
-                    'max_possible_score': str(performance.max_possible_score),
-                    'rank': performance.rank,
-                    'percentile': float(performance.percentile) if performance.percentile else None
-                }
-                return Response(data)
+                return Response(_performance_data(performance))
                 
             except Quiz.DoesNotExist:
                 return Response({"error": "Quiz not found"}, 
@@ -213,17 +533,10 @@ def get_student_performance(request, quiz_id=None):
                               status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         # Get all performances
-        performances = StudentPerformance.objects.filter(student=request.user)
-        data = []
-        for perf in performances:
-            data.append({
-                'quiz_id': perf.quiz_id,
-                'total_score': str(perf.total_score),
-                'max_possible_score': str(perf.max_possible_score),
-                'rank': perf.rank,
-                'percentile': float(perf.percentile) if perf.percentile else None
-            })
-        return Response(data)
+        performances = StudentPerformance.objects.filter(student=request.user, quiz__deleted_at__isnull=True)
+        return Response([
+            {'quiz_id': perf.quiz_id, **_performance_data(perf)} for perf in performances
+        ])
     
     except Exception as e:
         print(f"Error in get_student_performance: {str(e)}")
@@ -234,6 +547,7 @@ def get_student_performance(request, quiz_id=None):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads()
 def get_class_performance(request, quiz_id):
     """Get class performance statistics for a quiz"""
     try:
@@ -273,28 +587,13 @@ def get_class_performance(request, quiz_id):
         top_performers_data = StudentPerformanceSerializer(top_performers, many=True).data
         
         # Calculate score distribution
-        score_distribution = {
-            '0-20': 0,
-            '21-40': 0,
-            '41-60': 0,
-            '61-80': 0,
-            '81-100': 0
-        }
+        score_distribution = dict.fromkeys(live.SCORE_BUCKETS, 0)
         
         quiz_max_score = quiz.total_score or 0
         if quiz_max_score > 0:
             for perf in performances:
                 score_percent = (float(perf.total_score) / float(quiz_max_score)) * 100
-                if score_percent <= 20:
-                    score_distribution['0-20'] += 1
-                elif score_percent <= 40:
-                    score_distribution['21-40'] += 1
-                elif score_percent <= 60:
-                    score_distribution['41-60'] += 1
-                elif score_percent <= 80:
-                    score_distribution['61-80'] += 1
-                else:
-                    score_distribution['81-100'] += 1
+                score_distribution[live.score_bucket(score_percent)] += 1
         
         response = {
             'quiz_title': quiz.title,
@@ -316,6 +615,8 @@ def get_class_performance(request, quiz_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versions.conditional(_rankings_etag)
+@replica_reads()
 def get_student_rankings(request, quiz_id):
     """Get student rankings for a quiz"""
     try:
@@ -329,23 +630,20 @@ def get_student_rankings(request, quiz_id):
             return Response({"error": "Quiz not found"}, 
                           status=status.HTTP_404_NOT_FOUND)
         
-        # Get all performances for this quiz ordered by score
-        performances = StudentPerformance.objects.filter(quiz=quiz).order_by('-total_score')
-        total_students = performances.count()
-        
-        # Update ranks and percentiles based on position
-        for i, performance in enumerate(performances):
-            # Calculate scores below (number of students with lower scores)
-            scores_below = total_students - (i + 1)
-            
-            # Calculate percentile using the formula:
+        # Ranks and percentiles follow the position in this read and are
+        # only returned, never written: the read may come from a lagging
+        # replica, and stored ranks are kept by the performance queue
+        rankings = list(
+            StudentPerformance.objects.filter(quiz=quiz)
+            .select_related('student', 'quiz')
+            .order_by('-total_score', 'student__roll_no')
+        )
+        total_students = len(rankings)
+        for i, performance in enumerate(rankings):
             # Percentile = (Number of scores below) / (Total number of scores) * 100
-            performance.percentile = (scores_below / total_students) * 100 if total_students > 0 else 100
+            scores_below = total_students - (i + 1)
+            performance.percentile = (scores_below / total_students) * 100
             performance.rank = i + 1
-            performance.save(update_fields=['percentile', 'rank'])
-        
-        # Get updated rankings
-        rankings = performances.order_by('-total_score', 'student__roll_no')
         serializer = StudentPerformanceSerializer(rankings, many=True)
         
         return Response(serializer.data)
@@ -357,6 +655,29 @@ def get_student_rankings(request, quiz_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def quiz_live_ticket(request, quiz_id):
+    """Single-use ticket for opening a quiz's live stream, since EventSource cannot send the JWT"""
+    try:
+        if not request.user.is_faculty:
+            return Response({"error": "Only faculty can access this endpoint"},
+                            status=status.HTTP_403_FORBIDDEN)
+        if not live.streaming_supported(request):
+            return Response({"error": "Live updates need the ASGI server; poll the rankings instead"},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        if not Quiz.objects.filter(id=quiz_id).exists():
+            return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'ticket': live.issue_ticket(request.user.id, quiz_id),
+            'expires_in': live.TICKET_SECONDS,
+        }, status=status.HTTP_201_CREATED)
+    except Exception as e:
+        logger.error(f"Error issuing live ticket: {str(e)}")
+        return Response({"error": "Failed to open live updates. Please try again."},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_question_score(request, assignment_id):
@@ -387,10 +708,10 @@ def update_question_score(request, assignment_id):
             assignment.is_graded = True
             assignment.save()
             
-            # Update student performance
-            performance, created = StudentPerformance.objects.get_or_create(
-                student=assignment.student,
-                quiz=assignment.quiz
+            # Saving the assignment already upserted the performance row
+            performance = StudentPerformance.objects.get(
+                student_id=assignment.student_id,
+                quiz_id=assignment.quiz_id
             )
             performance.update_performance()
             
@@ -409,6 +730,7 @@ def update_question_score(request, assignment_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versions.conditional(_quiz_questions_etag)
 def get_quiz_questions(request, quiz_id):
     """Get questions for a specific quiz"""
     try:
@@ -419,36 +741,23 @@ def get_quiz_questions(request, quiz_id):
         # Get all assignments for this quiz and student
         assignments = QuizAssignment.objects.filter(
             quiz_id=quiz_id,
+            quiz__deleted_at__isnull=True,
             student=request.user
         ).select_related('question')
         
         if not assignments:
             return Response({"error": "Quiz not found or not assigned to you"}, 
                           status=status.HTTP_404_NOT_FOUND)
+        if not schedule.get_index().has_started(quiz_id):
+            return Response({"error": "Quiz has not started yet"}, 
+                          status=status.HTTP_403_FORBIDDEN)
         
-        questions = []
-        for assignment in assignments:
-            question = assignment.question
-            image_url = None
-            if question.image:
-                try:
-                    image_url = request.build_absolute_uri(question.image.url)
-                    logger.info(f"Image URL for question {question.id}: {image_url}")
-                except Exception as e:
-                    logger.error(f"Error building image URL for question {question.id}: {str(e)}")
-            
-            questions.append({
-                'assignment_id': assignment.id,
-                'question_text': question.text,
-                'type': question.type,
-                'options': question.options,
-                'image': image_url,
-                'is_completed': assignment.completed,
-                'student_answer': assignment.student_answer if assignment.completed else None,
-                'score': assignment.score if assignment.completed else None
-            })
-        
-        return Response(questions)
+        drafts = autosave.get_drafts(
+            [assignment.id for assignment in assignments if not assignment.completed],
+            request.user.id
+        )
+
+        return Response(_question_list(request, assignments, drafts))
     
     except Exception as e:
         logger.error(f"Error fetching quiz questions: {str(e)}")
@@ -459,6 +768,45 @@ def get_quiz_questions(request, quiz_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+def start_quiz_attempt(request, quiz_id):
+    """Start (or resume) the student's timed session for a quiz"""
+    try:
+        if not request.user.is_student:
+            return Response({"error": "Only students can attempt quizzes"}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            quiz = Quiz.objects.get(id=quiz_id)
+        except Quiz.DoesNotExist:
+            return Response({"error": "Quiz not found"}, 
+                          status=status.HTTP_404_NOT_FOUND)
+        
+        if not QuizAssignment.objects.filter(quiz=quiz, student=request.user).exists():
+            return Response({"error": "Quiz not found or not assigned to you"}, 
+                          status=status.HTTP_404_NOT_FOUND)
+        if not schedule.is_open(quiz.id):
+            return Response({"error": "Quiz is not available right now"}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        attempt = QuizAttempt.start(quiz, request.user)
+        return Response({
+            'quiz_id': quiz.id,
+            'started_at': attempt.started_at,
+            'deadline': attempt.deadline,
+            'time_remaining_seconds': attempt.time_remaining_seconds(),
+            'is_open': attempt.is_open()
+        })
+    
+    except Exception as e:
+        logger.error(f"Error starting quiz attempt: {str(e)}")
+        return Response(
+            {"error": "Failed to start quiz. Please try again."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
 def submit_answer(request, assignment_id):
     """Submit an answer for a quiz assignment"""
     try:
@@ -467,54 +815,28 @@ def submit_answer(request, assignment_id):
                           status=status.HTTP_403_FORBIDDEN)
         
         try:
-            assignment = QuizAssignment.objects.get(id=assignment_id, student=request.user)
+            assignment = QuizAssignment.objects.select_related('question', 'quiz').get(
+                id=assignment_id, student=request.user)
         except QuizAssignment.DoesNotExist:
             return Response({"error": "Assignment not found"}, 
                           status=status.HTTP_404_NOT_FOUND)
         
-        # Update assignment
-        assignment.student_answer = request.data.get('answer')
-        assignment.completed = True
-        assignment.submitted_at = timezone.now()
-        assignment.save()
-        
-        # Check if all questions are completed
-        quiz = assignment.quiz
-        total_assignments = QuizAssignment.objects.filter(
-            quiz=quiz,
-            student=request.user
-        ).count()
+        # Submissions are only accepted while the quiz and the student's session are open
+        if not schedule.is_open(assignment.quiz_id):
+            return Response({"error": "Quiz is not available right now"}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        attempt = QuizAttempt.start(assignment.quiz, request.user)
+        if not attempt.is_open():
+            return Response({"error": "Time limit for this quiz has expired"}, 
+                          status=status.HTTP_403_FORBIDDEN)
         
-        completed_assignments = QuizAssignment.objects.filter(
-            quiz=quiz,
-            student=request.user,
-            completed=True
-        ).count()
-        
-        if total_assignments == completed_assignments:
-            # Create or update performance record
-            try:
-                performance = StudentPerformance.objects.get(
-                    student=request.user,
-                    quiz=quiz
-                )
-            except StudentPerformance.DoesNotExist:
-                performance = StudentPerformance.objects.create(
-                    student=request.user,
-                    quiz=quiz,
-                    total_score=0,
-                    max_possible_score=quiz.total_score or 0
-                )
-            
-            # Update performance if all questions are graded
-            graded_assignments = QuizAssignment.objects.filter(
-                student=request.user,
-                quiz=quiz,
-                is_graded=True
-            )
-            if graded_assignments.count() == total_assignments:
-                performance.update_performance()
+        # Without an explicit answer the latest autosaved draft is submitted
+        answer = request.data.get('answer')
+        if answer is None:
+            answer = autosave.get_drafts([assignment.id], request.user.id).get(
+                assignment.id, assignment.student_answer)
         
+        _complete_submission(assignment, attempt, answer)
         return Response({"message": "Answer submitted successfully"})
     
     except Exception as e:
@@ -524,8 +846,41 @@ def submit_answer(request, assignment_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def autosave_answer(request, assignment_id):
+    """Buffer a draft answer; it is written back in batches and never graded"""
+    try:
+        if not request.user.is_student:
+            return Response({"error": "Only students can save answers"}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        answer = request.data.get('answer')
+        if answer is None:
+            return Response({"error": "answer is required"}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        answer = str(answer)
+        if len(answer) > autosave.MAX_DRAFT_LENGTH:
+            return Response({"error": "Answer is too long"}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        # Drafts are kept per student; the flush only writes the owner's
+        # draft, and only while the assignment is still open
+        autosave.save_draft(assignment_id, request.user.id, answer)
+        versions.bump(versions.student_key(request.user.id))
+        
+        return Response({"message": "Draft saved"}, status=status.HTTP_202_ACCEPTED)
+    
+    except Exception as e:
+        logger.error(f"Error autosaving answer: {str(e)}")
+        return Response(
+            {"error": "Failed to save draft. Please try again."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads()
 def get_quiz_results(request, quiz_id):
     """Get results for a specific quiz"""
     try:
@@ -536,18 +891,23 @@ def get_quiz_results(request, quiz_id):
                 return Response({"error": "You can only view results for quizzes you created"}, 
                               status=status.HTTP_403_FORBIDDEN)
         elif request.user.is_student:
-            if not QuizAssignment.objects.filter(quiz=quiz, student=request.user).exists():
+            if not archive.is_assigned(quiz, request.user):
                 return Response({"error": "Quiz not found or not assigned to you"}, 
                               status=status.HTTP_404_NOT_FOUND)
         else:
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get all assignments for this quiz
-        assignments = QuizAssignment.objects.filter(quiz=quiz)
-        if request.user.is_student:
-            assignments = assignments.filter(student=request.user)
-        
-        assignments = assignments.select_related('student', 'question')
+        student = request.user if request.user.is_student else None
+        if quiz.archived_at:
+            # Closed quizzes are read back from their compacted records
+            assignments = archive.archived_assignments(quiz, student)
+        else:
+            # Get all assignments for this quiz
+            assignments = QuizAssignment.objects.filter(quiz=quiz)
+            if student is not None:
+                assignments = assignments.filter(student=student)
+            
+            assignments = assignments.select_related('student', 'question')
         
         results = []
         for assignment in assignments:
@@ -594,10 +954,7 @@ def quiz_detail_and_edit(request, quiz_id):
             serializer = QuizSerializer(quiz)
             return Response(serializer.data)
         elif request.method == 'PUT':
-            print('quiz_detail_and_edit PUT called')
-            print('Incoming data:', request.data)
-            questions = request.data.get('questions', None)
-            print('Incoming questions:', questions)
+            logger.debug(f"quiz_detail_and_edit: PUT for quiz id={quiz_id} by user id={request.user.id}")
             if not request.user.is_faculty or quiz.created_by.id != request.user.id:
                 return Response({"error": "You can only edit quizzes you created."}, status=status.HTTP_403_FORBIDDEN)
             from .serializers import QuizSerializer, QuestionSerializer
@@ -613,7 +970,7 @@ def quiz_detail_and_edit(request, quiz_id):
                 
                 return Response(response_data)
             else:
-                print(serializer.errors)
+                logger.debug(f"quiz_detail_and_edit: invalid data for quiz id={quiz_id}: {serializer.errors}")
                 return Response(serializer.errors, status=400)
     except Quiz.DoesNotExist:
         logger.error(f"quiz_detail: Quiz with id={quiz_id} does not exist.")
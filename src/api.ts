@@ -99,8 +99,10 @@ api.interceptors.response.use(
         const response = await axios.post('http://localhost:8000/auth/token/refresh/', {
           refresh: refreshToken
         });
-        const { access } = response.data;
+        const { access, refresh } = response.data;
         localStorage.setItem('access_token', access);
+        // Refresh tokens are rotated and the old one is blacklisted
+        if (refresh) localStorage.setItem('refresh_token', refresh);
         api.defaults.headers.common['Authorization'] = 'Bearer ' + access;
         processQueue(null, access);
         return api(originalRequest);
@@ -201,8 +203,10 @@ axios.interceptors.response.use(
         const response = await axios.post('http://localhost:8000/auth/token/refresh/', {
           refresh: refreshToken
         });
-        const { access } = response.data;
+        const { access, refresh } = response.data;
         localStorage.setItem('access_token', access);
+        // Refresh tokens are rotated and the old one is blacklisted
+        if (refresh) localStorage.setItem('refresh_token', refresh);
         axios.defaults.headers.common['Authorization'] = 'Bearer ' + access;
         processQueue(null, access);
         return axios(originalRequest);
@@ -125,4 +125,55 @@ export const getStudentPerformance = async (studentId: string) => {
     console.error('Error fetching student performance:', error);
     throw error;
   }
-}; 
\ No newline at end of file
+}; 
+// Live progress of a quiz, pushed by the server as it changes
+export interface QuizLiveUpdate {
+  quiz_id?: number;
+  completion?: { students: number; started: number; finished: number; answers: number };
+  histogram?: Record<string, number>;
+  // roll number -> [rank, score]; null when the student left the quiz
+  ranks?: Record<string, [number, string] | null>;
+}
+
+// How often the rankings are re-fetched when live updates are unavailable
+const LIVE_POLL_INTERVAL_MS = 10000;
+
+export const subscribeToQuizLive = (
+  quizId: string | number,
+  onEvent: (type: 'snapshot' | 'update', data: QuizLiveUpdate) => void,
+  onPoll: () => void
+): (() => void) => {
+  let source: EventSource | null = null;
+  let timer: ReturnType<typeof setInterval> | null = null;
+  let closed = false;
+
+  // Without a stream (WSGI server, expired ticket, dropped connection) the
+  // rankings are polled instead; they answer 304 while nothing changed
+  const poll = () => {
+    source?.close();
+    source = null;
+    if (!closed && timer === null) {
+      timer = setInterval(onPoll, LIVE_POLL_INTERVAL_MS);
+    }
+  };
+
+  // EventSource cannot send headers, so the stream is opened with a
+  // short-lived single-use ticket rather than the access token
+  api.post(`/quiz/quiz/${quizId}/live/ticket/`)
+    .then(response => {
+      if (closed) return;
+      source = new EventSource(
+        `${API_BASE_URL}/quiz/quiz/${quizId}/live/?ticket=${encodeURIComponent(response.data.ticket)}`
+      );
+      source.addEventListener('snapshot', (e) => onEvent('snapshot', JSON.parse((e as MessageEvent).data)));
+      source.addEventListener('update', (e) => onEvent('update', JSON.parse((e as MessageEvent).data)));
+      source.onerror = poll;
+    })
+    .catch(poll);
+
+  return () => {
+    closed = true;
+    source?.close();
+    if (timer !== null) clearInterval(timer);
+  };
+};
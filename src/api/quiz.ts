@@ -211,6 +211,43 @@ export const getStudentQuizzes = async (): Promise<Quiz[]> => {
   }
 };
 
+export interface StudentQuizPerformance {
+  total_score: string;
+  max_possible_score: string;
+  rank: number | null;
+  percentile: number | null;
+}
+
+export interface StudentDashboardQuiz extends BaseQuiz {
+  created_at: string;
+  total_questions: number;
+  completed_questions: number;
+  is_completed: boolean;
+  is_available: boolean;
+  performance: StudentQuizPerformance | null;
+}
+
+export interface StudentDashboardData {
+  total_quizzes: number;
+  completed_quizzes: number;
+  pending_quizzes: number;
+  quizzes: StudentDashboardQuiz[];
+}
+
+export const getStudentDashboard = async (): Promise<StudentDashboardData> => {
+  try {
+    const response = await axios.get(`${API_URL}/quiz/student/dashboard/`, {
+      headers: {
+        Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+      },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching student dashboard:', error);
+    throw error;
+  }
+};
+
 export const getStudentQuizQuestions = async (quizId: string): Promise<QuestionData[]> => {
   try {
     const response = await axios.get(`${API_URL}/student/quiz/${quizId}/questions/`, {
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { getFacultyQuizzes } from '../api/quiz';
-import { getStudentQuizPerformance } from '../api/performance';
+import { getStudentQuizPerformance, subscribeToQuizLive } from '../api/performance';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft } from 'lucide-react';
 
@@ -21,6 +21,20 @@ interface StudentPerformance {
   percentile: number;
 }
 
+const fetchPerformances = async (quizId: string): Promise<StudentPerformance[]> => {
+  const performanceData = await getStudentQuizPerformance(quizId);
+  // Transform the API response to match our interface
+  return performanceData.map(p => ({
+    student: p.student,
+    student_name: p.student_name || 'Unknown Student',
+    student_roll_no: p.student_roll_no || 'N/A',
+    total_score: p.total_score,
+    max_possible_score: p.max_possible_score,
+    rank: typeof p.rank === 'string' ? parseInt(p.rank) : (p.rank || 0),
+    percentile: typeof p.percentile === 'string' ? parseFloat(p.percentile) : (p.percentile || 0)
+  }));
+};
+
 const QuizPerformanceView = () => {
   const [quizzes, setQuizzes] = useState<Quiz[]>([]);
   const [selectedQuiz, setSelectedQuiz] = useState<string>('');
@@ -28,6 +42,7 @@ const QuizPerformanceView = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [reloadKey, setReloadKey] = useState(0);
   const navigate = useNavigate();
 
   // Fetch quizzes on component mount
@@ -53,18 +68,7 @@ const QuizPerformanceView = () => {
       
       setLoading(true);
       try {
-        const performanceData = await getStudentQuizPerformance(selectedQuiz);
-        // Transform the API response to match our interface
-        const transformedData = performanceData.map(p => ({
-          student: p.student,
-          student_name: p.student_name || 'Unknown Student',
-          student_roll_no: p.student_roll_no || 'N/A',
-          total_score: p.total_score,
-          max_possible_score: p.max_possible_score,
-          rank: typeof p.rank === 'string' ? parseInt(p.rank) : (p.rank || 0),
-          percentile: typeof p.percentile === 'string' ? parseFloat(p.percentile) : (p.percentile || 0)
-        }));
-        setPerformances(transformedData);
+        setPerformances(await fetchPerformances(selectedQuiz));
         setError(null);
       } catch (err: any) {
         setError(err.message || 'Failed to load student performances');
@@ -75,6 +79,37 @@ const QuizPerformanceView = () => {
     };
 
     loadPerformances();
+  }, [selectedQuiz, reloadKey]);
+
+  // Apply live rank and score changes, or poll the rankings where the
+  // server cannot stream them
+  useEffect(() => {
+    if (!selectedQuiz) return;
+    const poll = async () => {
+      try {
+        setPerformances(await fetchPerformances(selectedQuiz));
+      } catch (err) {
+        console.error('Error refreshing student performances:', err);
+      }
+    };
+    return subscribeToQuizLive(selectedQuiz, (type, data) => {
+      if (type !== 'update' || !data.ranks) return;
+      const ranks = data.ranks;
+      setPerformances(current => {
+        const known = new Set(current.map(p => p.student_roll_no));
+        if (Object.entries(ranks).some(([rollNo, entry]) => entry && !known.has(rollNo))) {
+          // A new student appeared; fetch the full table once
+          setReloadKey(key => key + 1);
+          return current;
+        }
+        return current
+          .filter(p => ranks[p.student_roll_no] !== null)
+          .map(p => {
+            const entry = ranks[p.student_roll_no];
+            return entry ? { ...p, rank: entry[0], total_score: entry[1] } : p;
+          });
+      });
+    }, poll);
   }, [selectedQuiz]);
 
   const selectedQuizData = quizzes.find(q => q.id.toString() === selectedQuiz);
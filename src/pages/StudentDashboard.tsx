@@ -2,8 +2,7 @@ import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Clock, Award, User, Mail, LogOut, ChevronDown } from 'lucide-react';
 import { getStudentDetails } from '../api';
-import { getStudentQuizzes, submitQuizAnswer, QuestionData } from '../api/quiz';
-import { API_BASE_URL } from '../config';
+import { getStudentDashboard, submitQuizAnswer, QuestionData, StudentQuizPerformance } from '../api/quiz';
 
 interface StudentDetails {
   id: number;
@@ -40,6 +39,7 @@ interface Quiz {
   time_limit_minutes?: number | null;
   is_scheduled?: boolean;
   questions_per_student?: number;
+  performance?: StudentQuizPerformance | null;
 }
 
 interface QuizQuestion {
@@ -81,9 +81,9 @@ const StudentDashboard = () => {
           return;
         }
 
-        const [data, quizData] = await Promise.all([
+        const [data, dashboard] = await Promise.all([
           getStudentDetails(),
-          getStudentQuizzes()
+          getStudentDashboard()
         ]);
 
         console.log('Student Details Response:', {
@@ -114,13 +114,26 @@ const StudentDashboard = () => {
           });
         }
 
-        if (quizData) {
-          setQuizzes(quizData.map((quiz: any) => ({
+        if (dashboard) {
+          setQuizzes(dashboard.quizzes.map((quiz: any) => ({
             ...quiz,
             id: String(quiz.id),
             completed: quiz.is_completed || false,
             inProgress: false
           })));
+
+          // Scores, ranks and percentiles arrive with the quiz list
+          setQuizPerformances(dashboard.quizzes
+            .filter(quiz => quiz.is_completed)
+            .map(quiz => ({
+              quizId: quiz.id,
+              quizTitle: quiz.title,
+              rank: quiz.performance?.rank || null,
+              percentile: quiz.performance?.percentile || null,
+              score: quiz.performance?.total_score || '0.00',
+              maxScore: quiz.performance?.max_possible_score || '0.00',
+              courseId: quiz.course_id
+            })));
         }
       } catch (err: any) {
         console.error('Error fetching student details:', err);
@@ -140,45 +153,6 @@ const StudentDashboard = () => {
     checkUserType();
   }, [navigate]);
 
-  useEffect(() => {
-    const fetchQuizPerformances = async () => {
-      const completedQuizzes = quizzes.filter(quiz => quiz.completed);
-      
-      const performancePromises = completedQuizzes.map(async quiz => {
-        try {
-          const response = await fetch(`${API_BASE_URL}/quiz/student/performance/${quiz.id}/`, {
-            headers: {
-              'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
-              'Content-Type': 'application/json'
-            }
-          });
-          
-          const data = await response.json();
-          
-          return {
-            quizId: quiz.id,
-            quizTitle: quiz.title,
-            rank: data.rank || null,
-            percentile: data.percentile || null,
-            score: data.total_score || '0.00',
-            maxScore: data.max_possible_score || '0.00',
-            courseId: quiz.course_id
-          };
-        } catch (error) {
-          console.error(`Error fetching performance for quiz ${quiz.id}:`, error);
-          return null;
-        }
-      });
-
-      const performances = (await Promise.all(performancePromises)).filter(p => p !== null) as QuizPerformanceData[];
-      setQuizPerformances(performances);
-    };
-
-    if (quizzes.length > 0) {
-      fetchQuizPerformances();
-    }
-  }, [quizzes]);
-
   const handleQuizClick = (quizId: number) => {
     navigate(`/student/quiz/${quizId.toString()}/attempt`);
   };
@@ -226,65 +200,18 @@ const StudentDashboard = () => {
       percentile?: number;
     }
 
-    const [performance, setPerformance] = useState<Performance | null>(null);
-    const [loading, setLoading] = useState(true);
-    const [error, setError] = useState<string | null>(null);
-
-    useEffect(() => {
-      const fetchPerformance = async () => {
-        try {
-          setLoading(true);
-          setError(null);
-          
-          const response = await fetch(`${API_BASE_URL}/quiz/student/performance/${quiz.id}/`, {
-            headers: {
-              'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
-              'Content-Type': 'application/json'
-            }
-          });
-          
-          const data = await response.json();
-          
-          if (response.ok && data) {
-            setPerformance({
-              total_score: data.total_score || '0.00',
-              max_possible_score: data.max_possible_score || quiz.total_score?.toFixed(2) || '0.00',
-              rank: data.rank,
-              percentile: data.percentile
-            });
-            setError(null);
-          } else {
-            throw new Error(data.error || 'Failed to fetch performance data');
-          }
-        } catch (error) {
-          console.error('Error fetching performance:', error);
-          setError('Error fetching score');
-          // Set default performance with quiz total score
-          setPerformance({
-            total_score: '0.00',
-            max_possible_score: quiz.total_score?.toFixed(2) || '0.00',
-            rank: undefined,
-            percentile: undefined
-          });
-        } finally {
-          setLoading(false);
-        }
-      };
-
-      if (quiz.completed) {
-        fetchPerformance();
-      } else {
-        setLoading(false);
-      }
-    }, [quiz.id, quiz.completed, quiz.total_score]);
+    const performance: Performance | null = quiz.performance ? {
+      total_score: quiz.performance.total_score || '0.00',
+      max_possible_score: quiz.performance.max_possible_score || quiz.total_score?.toFixed(2) || '0.00',
+      rank: quiz.performance.rank ?? undefined,
+      percentile: quiz.performance.percentile ?? undefined
+    } : null;
 
     if (!quiz.completed) return null;
     
     const displayScore = performance 
       ? `${performance.total_score}/${performance.max_possible_score}`
-      : loading 
-        ? 'Loading...' 
-        : `0.00/${quiz.total_score?.toFixed(2) || '0.00'}`;
+      : `0.00/${quiz.total_score?.toFixed(2) || '0.00'}`;
 
     return (
       <div className="performance-card bg-white rounded-lg shadow-md p-4 mt-4">
@@ -292,11 +219,7 @@ const StudentDashboard = () => {
         <div className="grid grid-cols-2 gap-4">
           <div>
             <p className="text-sm text-gray-600">Score</p>
-            {loading ? (
-              <div className="text-center py-2">Loading score...</div>
-            ) : (
-              <p className="text-xl font-bold">{displayScore}</p>
-            )}
+            <p className="text-xl font-bold">{displayScore}</p>
           </div>
           {performance?.rank && (
             <div>
@@ -311,11 +234,6 @@ const StudentDashboard = () => {
             </div>
           )}
         </div>
-        {error && (
-          <div className="text-red-500 text-sm mt-2">
-            {error}
-          </div>
-        )}
       </div>
     );
   };
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { api } from '../api';
 import { useSession } from '../SessionContext';
@@ -14,6 +14,7 @@ interface Question {
   assignment_id: number;
   max_score: number;
   score?: number;
+  draft_answer?: string | null;
 }
 
 interface Quiz {
@@ -36,6 +37,8 @@ const TakeQuiz: React.FC = () => {
   const [current, setCurrent] = useState(0);
   const [success, setSuccess] = useState(false);
   const { sessionExpired } = useSession();
+  const unsaved = useRef<Set<number>>(new Set());
+  const [secondsLeft, setSecondsLeft] = useState<number | null>(null);
 
   useEffect(() => {
     if (sessionExpired) return;
@@ -46,11 +49,22 @@ const TakeQuiz: React.FC = () => {
         const metaRes = await api.get(`/quiz/quiz/${quizId}/`);
         const title = metaRes.data.title || `Quiz ${quizId}`;
         const questionsRes = await api.get(`/quiz/student/quiz/${quizId}/questions/`);
+        const attemptRes = await api.post(`/quiz/student/quiz/${quizId}/start/`);
+        if (attemptRes.data.time_remaining_seconds !== null) {
+          setSecondsLeft(Math.floor(attemptRes.data.time_remaining_seconds));
+        }
         setQuiz({
           id: Number(quizId),
           title,
           questions: questionsRes.data,
         });
+        const drafts: { [assignmentId: number]: string } = {};
+        questionsRes.data.forEach((question: Question) => {
+          if (question.draft_answer) {
+            drafts[question.assignment_id] = question.draft_answer;
+          }
+        });
+        setAnswers(drafts);
       } catch (err) {
         setError('Failed to load quiz. Please try again.');
         console.error('Error fetching quiz:', err);
@@ -61,7 +75,30 @@ const TakeQuiz: React.FC = () => {
     fetchQuiz();
   }, [quizId, sessionExpired]);
 
+  // The server finalises the attempt at its deadline; this only shows the countdown
+  useEffect(() => {
+    if (secondsLeft === null || secondsLeft <= 0 || success) return;
+    const tick = setTimeout(() => setSecondsLeft(prev => (prev === null ? null : prev - 1)), 1000);
+    return () => clearTimeout(tick);
+  }, [secondsLeft, success]);
+
+  // Autosave drafts shortly after the student stops typing; only submit grades
+  useEffect(() => {
+    if (sessionExpired || submitting || success || unsaved.current.size === 0) return;
+    const timer = setTimeout(() => {
+      const pending = Array.from(unsaved.current);
+      unsaved.current.clear();
+      pending.forEach(assignmentId => {
+        api.post(`/quiz/student/assignment/${assignmentId}/autosave/`, {
+          answer: answers[assignmentId] ?? ''
+        }).catch(err => console.error('Error autosaving answer:', err));
+      });
+    }, 1500);
+    return () => clearTimeout(timer);
+  }, [answers, sessionExpired, submitting, success]);
+
   const handleChange = (assignmentId: number, value: string | string[], type?: string) => {
+    unsaved.current.add(assignmentId);
     setAnswers(prev => ({
       ...prev,
       [assignmentId]: Array.isArray(value) ? value.join(',') : value as string
@@ -82,6 +119,7 @@ const TakeQuiz: React.FC = () => {
   const handleSubmit = async () => {
     if (!quiz) return;
     setSubmitting(true);
+    unsaved.current.clear();
     try {
       const submissionPromises = quiz.questions.map(question => {
         if (answers[question.assignment_id]) {
@@ -214,6 +252,13 @@ const TakeQuiz: React.FC = () => {
         <div className="quiz-progress">
           <Clock size={20} />
           <span>Question {current + 1} of {quiz.questions.length}</span>
+          {secondsLeft !== null && (
+            <span className="quiz-time-left">
+              {secondsLeft > 0
+                ? `${Math.floor(secondsLeft / 60)}:${String(secondsLeft % 60).padStart(2, '0')} left`
+                : 'Time is up'}
+            </span>
+          )}
         </div>
         <div className="progress-bar">
           <div className="progress-fill" style={{ width: `${progress}%` }} />